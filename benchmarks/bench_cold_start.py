@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# bench_cold_start.py — Do início do processo à primeira página, com e sem aquecimento
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_cold_start                      # 500 lojas, 3 ciclos, 3 repetições
+#   python -m benchmarks.bench_cold_start --lojas 2000 --repeat 5
+#
+# Cada medição é um processo novo, como uma réplica recém-criada, com a
+# planilha sintética local e o cache Parquet vazio (primeiro deploy) ou já em
+# disco (volume compartilhado). "pronto" é o tempo até o servidor poder
+# aceitar conexões (com aquecimento, depois de circuito_warmup.warm_up);
+# "primeira página" é a primeira sessão do AppTest, do pedido até a página
+# inteira renderizada; "total" soma os dois, do início do processo.
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def run_child(aquecer: bool, t0: float):
+    sys.path.insert(0, str(ROOT))
+    # O servidor importa o Streamlit e registra os componentes antes de abrir a porta; o AppTest, que
+    # faz o papel do navegador, registra na primeira execução, então ela acontece aqui com um script vazio
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_string("").run()
+    aquecimento = None
+    if aquecer:
+        import circuito_warmup
+        aquecimento = circuito_warmup.warm_up()
+    pronto = time.time() - t0
+
+    tempos = []
+    for _ in range(2):
+        at = AppTest.from_file(str(ROOT / "circuito_lojas_app.py"), default_timeout=300)
+        start = time.perf_counter()
+        at.run()
+        tempos.append(time.perf_counter() - start)
+        if at.exception: raise RuntimeError(at.exception[0].value)
+    print(json.dumps({"pronto_s": pronto, "primeira_s": tempos[0], "segunda_s": tempos[1], "aquecimento": aquecimento}))
+
+def measure(workbook: Path, cache_dir: Path, aquecer: bool, cache_vazio: bool) -> dict:
+    if cache_vazio: shutil.rmtree(cache_dir, ignore_errors=True)
+    env = dict(os.environ, CIRCUITO_WORKBOOK=str(workbook), CIRCUITO_CACHE_DIR=str(cache_dir))
+    t0 = time.time()
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_cold_start", "--child", "--t0", repr(t0)] + (["--aquecer"] if aquecer else []),
+                         cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede do início do processo à primeira página, com e sem aquecimento")
+    parser.add_argument("--lojas", type=int, default=500)
+    parser.add_argument("--ciclos", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--aquecer", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--t0", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args.aquecer, args.t0)
+
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.bench_pipeline import CICLOS
+    from benchmarks.synthetic_workbook import generate_workbook
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = generate_workbook(Path(tmp) / "base.xlsx", args.lojas, CICLOS[-args.ciclos:])
+        cache_dir = Path(tmp) / "cache"
+        print(f"Planilha sintética: {args.lojas} lojas, {args.ciclos} ciclos ({workbook.stat().st_size / 1024:.0f} KB); "
+              f"mediana de {args.repeat} processos")
+        print(f"{'cache':<10}{'aquecimento':<13}{'pronto (s)':>11}{'1ª página (s)':>15}{'total (s)':>11}{'2ª sessão (s)':>15}")
+        for cache_vazio in (True, False):
+            if not cache_vazio: measure(workbook, cache_dir, False, True)  # deixa o cache em disco
+            for aquecer in (False, True):
+                rs = [measure(workbook, cache_dir, aquecer, cache_vazio) for _ in range(args.repeat)]
+                med = lambda k: statistics.median(r[k] for r in rs)
+                print(f"{'vazio' if cache_vazio else 'em disco':<10}{'sim' if aquecer else 'não':<13}{med('pronto_s'):>11.2f}"
+                      f"{med('primeira_s'):>15.2f}{med('pronto_s') + med('primeira_s'):>11.2f}{med('segunda_s'):>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# bench_compact.py — Memória e tempo dos agrupamentos: modo compacto x texto
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_compact                     # 500, 2.000 e 5.000 lojas
+#   python -m benchmarks.bench_compact --lojas 1000 --ciclos 6 --periodos 5
+#
+# Para cada escala prepara a mesma planilha sintética nos dois modos
+# (circuito_engine.COMPACT) e compara o tamanho do quadro preparado em memória
+# e em Parquet, e o tempo dos agrupamentos que rodam a cada carga: o máximo
+# mensal por (Loja, Ciclo), a soma por ciclo (compute_all_rankings) e o
+# replay por período. Mostra também a fração de NaN nas colunas de nota, que
+# é o que um armazenamento esparso economizaria.
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure(sheets, compact: bool, repeat: int) -> dict:
+    import circuito_engine as engine
+
+    engine.COMPACT = compact
+    prepared = engine.load_and_prepare_data(sheets)
+    data, score_cols = prepared.data, prepared.etapas_scores_cols
+    monthly_cols = [f"{e}_Score" for e in engine.MONTHLY_ETAPAS if f"{e}_Score" in data.columns]
+    buf = io.BytesIO()
+    data.to_parquet(buf, index=False)
+    return {
+        "memoria_mb": data.memory_usage(deep=True).sum() / 1e6,
+        "parquet_kb": buf.tell() / 1024,
+        "nan_notas": float(data[score_cols].isna().to_numpy().mean()),
+        "preparo_ms": _best(lambda: engine.load_and_prepare_data(sheets), repeat) * 1000,
+        "max_mensal_ms": _best(lambda: data.groupby(engine._key_codes(data, ["Loja", "Ciclo"]))[monthly_cols].transform("max"), repeat) * 1000,
+        "rankings_ms": _best(lambda: engine.compute_all_rankings(prepared), repeat) * 1000,
+        "replay_ms": _best(lambda: engine.compute_replay_positions(prepared), repeat) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o modo compacto dos dados preparados com o modo texto")
+    parser.add_argument("--lojas", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--ciclos", type=int, default=3)
+    parser.add_argument("--periodos", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    import circuito_metrics
+    from benchmarks.bench_pipeline import CICLOS
+    from benchmarks.synthetic_workbook import generate_sheets
+
+    circuito_metrics.enable(False)
+    metricas = ["memoria_mb", "parquet_kb", "preparo_ms", "max_mensal_ms", "rankings_ms", "replay_ms"]
+    for n in args.lojas:
+        sheets = generate_sheets(n, CICLOS[-args.ciclos:], args.periodos)
+        antes, depois = measure(sheets, False, args.repeat), measure(sheets, True, args.repeat)
+        print(f"\n{n} lojas, {args.ciclos} ciclos, {args.periodos} períodos — NaN nas notas: {depois['nan_notas']:.1%}")
+        print(f"{'métrica':<16}{'texto':>15}{'compacto':>12}{'variação':>11}")
+        for m in metricas:
+            print(f"{m:<16}{antes[m]:>15.2f}{depois[m]:>12.2f}{(depois[m] - antes[m]) / antes[m]:>+11.0%}")
+
+if __name__ == "__main__":
+    main()
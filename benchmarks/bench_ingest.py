@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# bench_ingest.py — Compara pd.read_excel(sheet_name=None) com a leitura enxuta
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_ingest                       # planilha do repositório
+#   python -m benchmarks.bench_ingest --scale 40            # planilha 40x maior (linhas replicadas)
+#   python -m benchmarks.bench_ingest --workbook outra.xlsx
+#
+# Cada modo roda num subprocesso novo, para que o pico de memória (RSS) de um
+# não contamine o do outro.
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = ("pandas", "streaming", "streaming-paralelo")
+
+def _maxrss_mb(who) -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_child(mode: str, path: str, workers: int):
+    sys.path.insert(0, str(ROOT))
+    import circuito_ingest
+
+    content = Path(path).read_bytes()
+    base_rss = _maxrss_mb(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    if mode == "pandas":
+        sheets = circuito_ingest.read_workbook(content, mode="pandas")
+    else:
+        sheets = circuito_ingest.read_etapa_sheets(content, parallel=(mode == "streaming-paralelo"), max_workers=workers)
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        "modo": mode, "tempo_s": round(wall, 3),
+        "pico_rss_mb": round(_maxrss_mb(resource.RUSAGE_SELF), 1),
+        "acrescimo_rss_mb": round(_maxrss_mb(resource.RUSAGE_SELF) - base_rss, 1),
+        "pico_rss_worker_mb": round(_maxrss_mb(resource.RUSAGE_CHILDREN), 1),
+        "linhas": int(sum(len(df) for df in sheets.values())),
+        "celulas": int(sum(df.size for df in sheets.values())),
+    }))
+
+def build_scaled_workbook(source: Path, scale: int, dest: Path):
+    # Replica as linhas de cada aba 'scale' vezes, com loja_key deslocado, mantendo todas as colunas
+    from openpyxl import Workbook, load_workbook
+
+    src = load_workbook(source, read_only=True, data_only=True)
+    out = Workbook(write_only=True)
+    for ws in src.worksheets:
+        rows = list(ws.iter_rows(values_only=True))
+        target = out.create_sheet(ws.title)
+        if not rows: continue
+        header = rows[0]
+        target.append(header)
+        key_idx = header.index("loja_key") if "loja_key" in header else None
+        name_idx = header.index("NomeLoja") if "NomeLoja" in header else None
+        for rep in range(scale):
+            for row in rows[1:]:
+                row = list(row)
+                if rep and key_idx is not None and isinstance(row[key_idx], (int, float)): row[key_idx] += rep * 1000
+                if rep and name_idx is not None and row[name_idx]: row[name_idx] = f"{row[name_idx]} {rep}"
+                target.append(row)
+    out.save(dest)
+    src.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a leitura da planilha com pandas e com o modo streaming")
+    parser.add_argument("--workbook", default=str(ROOT / "BaseCircuito.xlsx"))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="processos no modo paralelo (padrão: nº de CPUs)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args.child, args.workbook, args.workers)
+
+    workbook = Path(args.workbook)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.scale > 1:
+            scaled = Path(tmp) / f"BaseCircuito_x{args.scale}.xlsx"
+            build_scaled_workbook(workbook, args.scale, scaled)
+            workbook = scaled
+        print(f"Planilha: {workbook.name} ({workbook.stat().st_size / 1024:.0f} KB)")
+        print(f"{'modo':<20}{'tempo (s)':>10}{'pico RSS (MB)':>15}{'acréscimo (MB)':>16}{'maior worker (MB)':>19}{'células':>10}")
+        for mode in MODES:
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_ingest", "--child", mode, "--workbook", str(workbook)]
+                                 + (["--workers", str(args.workers)] if args.workers else []),
+                                 cwd=ROOT, check=True, capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['modo']:<20}{r['tempo_s']:>10.3f}{r['pico_rss_mb']:>15.1f}{r['acrescimo_rss_mb']:>16.1f}{r['pico_rss_worker_mb']:>19.1f}{r['celulas']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# bench_load.py — Latência de rerun, CPU e RSS do servidor com N sessões ativas ao mesmo tempo
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_load                            # 1 a 50 sessões, 20 s por degrau
+#   python -m benchmarks.bench_load --sessoes 1 10 20 40 80 --duracao 30 --pausa 1
+#
+# Sobe o app de verdade (circuito_warmup.py, já aquecido) num processo
+# separado, com a planilha sintética local, e o dirige como vários navegadores
+# sem interface: cada sessão é uma conexão WebSocket em /_stcore/stream que
+# manda os mesmos BackMsg do frontend e espera o script_finished. Entre uma
+# ação e outra a sessão "pensa" (--pausa, com variação aleatória) e depois
+# troca de ciclo, de página, de loja ou de etapa. O AppTest não serve aqui:
+# ele troca o runtime global a cada execução, então não roda sessões em
+# paralelo como o servidor, que usa uma thread de script por sessão.
+#
+# Para cada degrau: reruns por segundo, latência p50/p95/p99 (do envio ao
+# script_finished, sem contar a primeira carga da sessão), CPU do servidor
+# (100% = um núcleo) e picos de RSS e de threads do processo. Quando a vazão
+# para de crescer e o p95 dispara, o processo saturou: o GIL serializa os
+# scripts das sessões. O resumo final indica quantas sessões cabem numa
+# réplica com p95 abaixo de --slo-ms.
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGINAS = {"Geral": "Visão Geral", "Loja": "Visão por Loja", "Etapa": "Visão por Etapa", "Campeonato": "Campeonato"}
+CICLO, LOJA, ETAPA = "Selecione o Ciclo", "Selecione a Loja:", "Selecione a Etapa:"
+
+# ---------------------------------------------------------------------------
+# Processo do servidor: CPU e memória lidos de /proc (ou psutil fora do Linux)
+# ---------------------------------------------------------------------------
+def proc_stats(pid: int) -> dict:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+        status = {}
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                k, _, v = line.partition(":")
+                status[k] = v.split()
+        return {"cpu_s": cpu_s, "rss_mb": int(status["VmRSS"][0]) / 1024, "threads": int(status["Threads"][0])}
+    except OSError:
+        import psutil
+        p = psutil.Process(pid)
+        cpu = p.cpu_times()
+        return {"cpu_s": cpu.user + cpu.system, "rss_mb": p.memory_info().rss / (1024 * 1024), "threads": p.num_threads()}
+
+def start_server(workbook: Path, cache_dir: Path, porta: int, log) -> subprocess.Popen:
+    env = dict(os.environ, CIRCUITO_WORKBOOK=str(workbook), CIRCUITO_CACHE_DIR=str(cache_dir))
+    proc = subprocess.Popen([sys.executable, str(ROOT / "circuito_warmup.py"), "--server.port", str(porta),
+                             "--server.headless", "true", "--server.fileWatcherType", "none",
+                             "--browser.gatherUsageStats", "false"],
+                            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 600
+    while time.time() < deadline:
+        if proc.poll() is not None: raise RuntimeError("O servidor terminou antes de ficar pronto")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{porta}/_stcore/health", timeout=2): return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("O servidor não ficou pronto em 10 minutos")
+
+# ---------------------------------------------------------------------------
+# Sessão sem interface: guarda as escolhas e os widgets vistos no último rerun
+# ---------------------------------------------------------------------------
+class Sessao:
+    def __init__(self, url: str, rng: random.Random):
+        self.url, self.rng = url, rng
+        self.escolhas = {}   # rótulo do selectbox -> opção escolhida
+        self.widgets = {}    # rótulo -> (tipo, id, opções) do último rerun
+        self.pagina = "Geral"
+        self.erros = 0
+
+    async def __aenter__(self):
+        import websockets
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    async def rerun(self, gatilho: str = None) -> float:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for rotulo, (tipo, wid, opcoes) in self.widgets.items():
+            if tipo == "selectbox" and self.escolhas.get(rotulo) in opcoes:
+                w = msg.rerun_script.widget_states.widgets.add()
+                w.id, w.string_value = wid, self.escolhas[rotulo]
+            elif tipo == "button" and rotulo == gatilho:
+                w = msg.rerun_script.widget_states.widgets.add()
+                w.id, w.trigger_value = wid, True
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        widgets = {}
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            tipo = fwd.WhichOneof("type")
+            if tipo == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                el = fwd.delta.new_element
+                kind = el.WhichOneof("type")
+                if kind == "exception": self.erros += 1
+                elif kind in ("selectbox", "button"):
+                    w = getattr(el, kind)
+                    widgets[w.label] = (kind, w.id, list(w.options) if kind == "selectbox" else [])
+            elif tipo == "script_finished":
+                break
+        self.widgets = widgets
+        return time.perf_counter() - start
+
+    async def acao(self) -> float:
+        # Troca de ciclo, de página, de loja ou de etapa, como um usuário navegando
+        escolha = self.rng.choice(("ciclo", "pagina", "loja", "etapa"))
+        if escolha == "ciclo" and CICLO in self.widgets:
+            self.escolhas[CICLO] = self.rng.choice(self.widgets[CICLO][2])
+            return await self.rerun()
+        if escolha == "loja" and LOJA in self.widgets:
+            self.escolhas[LOJA] = self.rng.choice(self.widgets[LOJA][2])
+            return await self.rerun()
+        if escolha == "etapa" and ETAPA in self.widgets:
+            self.escolhas[ETAPA] = self.rng.choice(self.widgets[ETAPA][2])
+            return await self.rerun()
+        destino = {"loja": "Loja", "etapa": "Etapa"}.get(escolha) or self.rng.choice([p for p in PAGINAS if p != self.pagina])
+        self.pagina = destino
+        return await self.rerun(PAGINAS[destino])
+
+# ---------------------------------------------------------------------------
+# Degraus de carga
+# ---------------------------------------------------------------------------
+async def run_degrau(url: str, n: int, duracao: float, pausa: float, seed: int, pid: int = None) -> dict:
+    latencias, erros, picos = [], [0], {"rss_mb": 0.0, "threads": 0}
+
+    async def usuario(i: int, fim: float):
+        rng = random.Random(seed * 1000 + i)
+        async with Sessao(url, rng) as s:
+            await s.rerun()  # primeira carga da página, fora da estatística
+            while True:
+                await asyncio.sleep(pausa * rng.uniform(0.5, 1.5))
+                if time.perf_counter() >= fim: break
+                latencias.append(await s.acao())
+            erros[0] += s.erros
+
+    # As sessões chegam espalhadas no primeiro segundo, não todas no mesmo instante
+    fim = time.perf_counter() + duracao
+    async def chegada(i):
+        await asyncio.sleep(i / max(n, 1))
+        await usuario(i, fim)
+    async def amostras():
+        # Pico de threads (uma por script em execução) e de RSS durante o degrau
+        while pid:
+            st = proc_stats(pid)
+            picos["rss_mb"], picos["threads"] = max(picos["rss_mb"], st["rss_mb"]), max(picos["threads"], st["threads"])
+            await asyncio.sleep(0.25)
+    amostrador = asyncio.ensure_future(amostras())
+    await asyncio.gather(*(chegada(i) for i in range(n)))
+    amostrador.cancel()
+    return {"latencias": latencias, "erros": erros[0], **picos}
+
+def percentil(valores, p: float) -> float:
+    if not valores: return float("nan")
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede latência de rerun, CPU e RSS do app com N sessões simultâneas")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--lojas", type=int, default=500)
+    parser.add_argument("--ciclos", type=int, default=3)
+    parser.add_argument("--duracao", type=float, default=20.0, help="segundos de carga por degrau")
+    parser.add_argument("--pausa", type=float, default=2.0, help="tempo médio de 'leitura' entre ações, em segundos")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p95 máximo aceitável para dimensionar réplicas")
+    parser.add_argument("--porta", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.bench_pipeline import CICLOS
+    from benchmarks.synthetic_workbook import generate_workbook
+
+    url = f"ws://localhost:{args.porta}/_stcore/stream"
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = generate_workbook(Path(tmp) / "base.xlsx", args.lojas, CICLOS[-args.ciclos:])
+        with open(Path(tmp) / "server.log", "w") as log:
+            server = start_server(workbook, Path(tmp) / "cache", args.porta, log)
+            try:
+                # Uma sessão percorre todas as telas antes de medir (caches de ranking e figuras)
+                asyncio.run(run_degrau(url, 1, min(args.duracao, 10.0), 0.0, args.seed))
+                print(f"Planilha sintética: {args.lojas} lojas, {args.ciclos} ciclos; {os.cpu_count()} CPU(s); "
+                      f"pausa média {args.pausa:.1f} s; {args.duracao:.0f} s por degrau")
+                print(f"{'sessões':>8}{'reruns':>8}{'reruns/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+                      f"{'CPU (%)':>9}{'RSS pico':>10}{'threads':>9}{'erros':>7}")
+                resultados = []
+                for n in sorted(args.sessoes):
+                    antes, t0 = proc_stats(server.pid), time.perf_counter()
+                    r = asyncio.run(run_degrau(url, n, args.duracao, args.pausa, args.seed + n, server.pid))
+                    depois, wall = proc_stats(server.pid), time.perf_counter() - t0
+                    lat = [x * 1000 for x in r["latencias"]]
+                    linha = {"n": n, "reruns": len(lat), "vazao": len(lat) / wall,
+                             "p50": percentil(lat, 50), "p95": percentil(lat, 95), "p99": percentil(lat, 99),
+                             "cpu": (depois["cpu_s"] - antes["cpu_s"]) / wall * 100, "rss": r["rss_mb"],
+                             "threads": r["threads"], "erros": r["erros"]}
+                    resultados.append(linha)
+                    print(f"{n:>8}{linha['reruns']:>8}{linha['vazao']:>10.1f}{linha['p50']:>10.0f}{linha['p95']:>10.0f}"
+                          f"{linha['p99']:>10.0f}{linha['cpu']:>9.0f}{linha['rss']:>10.1f}{linha['threads']:>9}{linha['erros']:>7}")
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    dentro = [r for r in resultados if r["p95"] <= args.slo_ms]
+    pico = max(resultados, key=lambda r: r["vazao"])
+    print(f"\nVazão máxima: {pico['vazao']:.1f} reruns/s com {pico['n']} sessões "
+          f"(p50 com {resultados[0]['n']} sessão(ões): {resultados[0]['p50']:.0f} ms).")
+    if dentro:
+        print(f"Maior degrau com p95 ≤ {args.slo_ms:.0f} ms: {dentro[-1]['n']} sessões por réplica "
+              f"(com pausa média de {args.pausa:.1f} s entre ações).")
+    else:
+        print(f"Nenhum degrau ficou com p95 ≤ {args.slo_ms:.0f} ms.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# bench_pipeline.py — Tempo por etapa e pico de memória do pipeline completo
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_pipeline                          # 50, 500 e 2.000 lojas
+#   python -m benchmarks.bench_pipeline --lojas 100 1000 --ciclos 6 --periodos 5
+#   python -m benchmarks.bench_pipeline --save-baseline          # grava benchmarks/baseline.json
+#
+# Para cada escala gera uma planilha sintética (synthetic_workbook) e mede, num
+# subprocesso novo, da busca da planilha (equivalente a get_data do app)
+# até build_pista_fig. Se houver baseline gravado para a mesma escala, etapas
+# mais lentas que o baseline além da tolerância são marcadas como regressão e
+# o comando termina com código 1.
+#
+# benchmarks/baseline.json vem gravado no repositório, com a máquina em que foi
+# medido na chave "_maquina" (plataforma, CPUs, Python e data). Tempos só são
+# comparáveis na mesma máquina: em outra, o comando avisa, e o certo é gravar
+# um baseline local com --save-baseline antes da mudança a medir.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+CICLOS = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+# Diferenças abaixo disso são ruído de medição, mesmo que passem da tolerância relativa
+MIN_DIFF_S = 0.005
+
+def _maxrss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_child(path: str, repeat: int):
+    sys.path.insert(0, str(ROOT))
+    import circuito_analysis
+    import circuito_cache
+    import circuito_campeonato
+    import circuito_engine as engine
+    import circuito_fetch
+    import circuito_ingest
+    from circuito_charts import PISTA_MAX_LANES, build_pista_fig, select_lanes
+    from circuito_html import build_ranking_table_html
+
+    stages, state = [], {}
+    def stage(name, fn):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        stages.append({"etapa": name, "tempo_s": round(best, 5), "pico_rss_mb": round(_maxrss_mb(), 1)})
+        return result
+
+    # O servidor do app é um processo longo: o custo de primeira chamada do plotly (validadores) fica de fora
+    import plotly.graph_objects as go
+    go.Figure([go.Bar(), go.Heatmap(), go.Scatter()]).to_json()
+    base_rss = _maxrss_mb()
+    # Busca: mesmo caminho do app (fetcher + origem), com uma planilha local
+    workbook = stage("fetch", lambda: circuito_fetch.WorkbookFetcher(circuito_fetch.LocalFileSource(path), 0).get())
+    sheets = stage("read_workbook", lambda: circuito_ingest.read_workbook(workbook.content))
+    prepared = stage("prepare_data", lambda: engine.load_and_prepare_data(sheets))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        circuito_cache.load_prepared(workbook.content, cache_dir=cache_dir, digest=workbook.digest)
+        stage("cache_parquet_hit", lambda: circuito_cache.load_prepared(workbook.content, cache_dir=cache_dir, digest=workbook.digest))
+        # O que o app lê ao abrir: o catálogo e uma única partição (Temporada, Ciclo)
+        stage("cache_particao_hit", lambda: (lambda cat: cat.load(cat.temporadas()[-1], cat.ciclos(cat.temporadas()[-1])[-1]))(
+            circuito_cache.load_catalog(workbook.content, cache_dir=cache_dir, digest=workbook.digest)))
+    rankings = stage("all_rankings", lambda: engine.compute_all_rankings(prepared))
+    ciclo = list(rankings)[-1]
+    df_final = rankings[ciclo].df_final
+    stage("replay_positions", lambda: engine.compute_replay_positions(prepared))
+    stage("gap_analysis", lambda: circuito_analysis.compute_gap_analysis(df_final, prepared.etapas_pesos_df, prepared.etapas_scores_cols, ciclo))
+    stage("etapa_top_k", lambda: circuito_analysis.compute_etapa_top_k(df_final, prepared.etapas_scores_cols))
+    # Campeonato: todos os ciclos de uma vez (store vazio) e só o ciclo corrente refeito (planilha nova)
+    ordem = list(rankings)
+    stage("campeonato", lambda: circuito_campeonato.compute_campeonato(None, circuito_campeonato.resultados_temporada(prepared), ordem))
+    anteriores = {c: circuito_campeonato.resultado_ciclo(r.df_final) for c, r in rankings.items()}
+    stage("campeonato_ciclo", lambda: circuito_campeonato.compute_campeonato(
+        None, {**anteriores, ciclo: circuito_campeonato.resultado_ciclo(df_final)}, ordem))
+    html = stage("ranking_html", lambda: build_ranking_table_html(df_final, prepared.etapas_scores_cols, show_details=True))
+    pista = select_lanes(df_final, PISTA_MAX_LANES, df_final["Nome_Exibicao"].iloc[-1])
+    fig = stage("build_pista_fig", lambda: build_pista_fig(pista, rankings[ciclo].duracao_horas, df_final["Nome_Exibicao"].iloc[-1]))
+    state.update(html_kb=round(len(html) / 1024, 1), pista_json_kb=round(len(fig.to_json()) / 1024, 1))
+    print(json.dumps({"stages": stages, "pico_rss_mb": round(_maxrss_mb(), 1), "rss_inicial_mb": round(base_rss, 1),
+                      "lojas": len(df_final), **state}))
+
+def compare(result: dict, baseline: dict, tolerancia: float):
+    # Devolve {etapa: (variação relativa, é regressão?)}
+    base_stages = {s["etapa"]: s["tempo_s"] for s in baseline.get("stages", [])}
+    out = {}
+    for s in result["stages"]:
+        base = base_stages.get(s["etapa"])
+        if base is None: continue
+        delta = (s["tempo_s"] - base) / base if base > 0 else 0.0
+        out[s["etapa"]] = (delta, delta > tolerancia and s["tempo_s"] - base > MIN_DIFF_S)
+    if baseline.get("pico_rss_mb"):
+        delta = (result["pico_rss_mb"] - baseline["pico_rss_mb"]) / baseline["pico_rss_mb"]
+        out["pico_rss_mb"] = (delta, delta > tolerancia)
+    return out
+
+def maquina() -> dict:
+    return {"plataforma": platform.platform(), "processador": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version(), "gravado_em": time.strftime("%Y-%m-%d")}
+
+def _mesma_maquina(a: dict, b: dict) -> bool:
+    return all(a.get(k) == b.get(k) for k in ("plataforma", "processador", "cpus", "python"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede cada etapa do pipeline em várias escalas e compara com o baseline")
+    parser.add_argument("--lojas", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--ciclos", type=int, default=3, help="quantidade de ciclos (meses) na planilha")
+    parser.add_argument("--periodos", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo aceito antes de marcar regressão")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args.child, args.repeat)
+
+    from benchmarks.synthetic_workbook import generate_workbook
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    origem = baseline.get("_maquina", {})
+    if baseline and not args.save_baseline and not _mesma_maquina(origem, maquina()):
+        print(f"Aviso: baseline gravado em outra máquina ({origem.get('plataforma', '?')}, {origem.get('cpus', '?')} CPUs, "
+              f"Python {origem.get('python', '?')}, {origem.get('gravado_em', '?')}); grave um local com --save-baseline.")
+    ciclos = CICLOS[-args.ciclos:]
+    resultados, regressoes = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.lojas:
+            escala = f"{n}x{args.ciclos}x{args.periodos}"
+            path = generate_workbook(Path(tmp) / f"base_{escala}.xlsx", n, ciclos, args.periodos)
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_pipeline", "--child", str(path), "--repeat", str(args.repeat)],
+                                 cwd=ROOT, check=True, capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            resultados[escala] = r
+            comparacao = compare(r, baseline.get(escala, {}), args.tolerancia)
+
+            print(f"\n{escala} ({n} lojas, {args.ciclos} ciclos, {args.periodos} períodos) — planilha {path.stat().st_size / 1024:.0f} KB, "
+                  f"tabela {r['html_kb']} KB, pista {r['pista_json_kb']} KB")
+            print(f"{'etapa':<20}{'tempo (ms)':>12}{'pico RSS (MB)':>15}{'vs baseline':>13}")
+            for s in r["stages"] + [{"etapa": "pico_rss_mb", "tempo_s": None, "pico_rss_mb": r["pico_rss_mb"]}]:
+                delta, regressao = comparacao.get(s["etapa"], (None, False))
+                tempo = f"{s['tempo_s'] * 1000:>12.1f}" if s["tempo_s"] is not None else f"{'':>12}"
+                marca = f"{delta:>+12.0%}" + (" REGRESSÃO" if regressao else "") if delta is not None else f"{'-':>12}"
+                print(f"{s['etapa']:<20}{tempo}{s['pico_rss_mb']:>15.1f} {marca}")
+                if regressao: regressoes.append(f"{escala}/{s['etapa']}")
+
+    if args.save_baseline:
+        # Escalas medidas em outra máquina não se misturam com as novas
+        if not _mesma_maquina(origem, maquina()): baseline = {}
+        baseline.update(resultados, _maquina=maquina())
+        baseline_path.write_text(json.dumps(baseline, indent=1, ensure_ascii=False))
+        print(f"\nBaseline gravado em {baseline_path}")
+    elif regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+        sys.exit(1)
+    elif not baseline:
+        print(f"\nSem baseline em {baseline_path}; rode com --save-baseline para gravar um.")
+
+if __name__ == "__main__":
+    main()
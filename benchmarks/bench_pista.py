@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# bench_pista.py — Tamanho do JSON e tempo de montagem da pista por número de lojas
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_pista
+#   python -m benchmarks.bench_pista --lojas 50 500 5000
+#
+# Compara o desenho anterior (um shape por faixa, um quadrado por casa da
+# bandeira e uma imagem por carro) com o atual (traces agrupados), mostrando
+# a pista inteira e a janela padrão de PISTA_MAX_LANES faixas. Também mede o
+# replay por Periodo (cálculo das posições acumuladas + frames da animação).
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from circuito_charts import PISTA_MAX_LANES, build_pista_fig, build_replay_fig, select_lanes  # noqa: E402
+from circuito_engine import (PreparedData, calculate_final_scores, compute_all_rankings,  # noqa: E402
+                             compute_replay_positions, format_hours_and_minutes)
+
+CAR_ICON_URL = "https://raw.githubusercontent.com/AlefeMiniPreco/circuito-minipreco/main/assets/carro-corrida_anim.webp"
+
+def build_pista_fig_anterior(data: pd.DataFrame, duracao_total_horas: float) -> go.Figure:
+    # Cópia do desenho antigo, mantida só como referência de comparação
+    fig = go.Figure()
+    limite_eixo = max(duracao_total_horas, data['Posicao_Horas'].max())
+    for i in range(len(data)):
+        fig.add_shape(type="rect", x0=0, y0=i-0.5, x1=limite_eixo, y1=i+0.5, line=dict(color='rgba(255, 255, 255, 0.1)', width=1.5), fillcolor="#2C3E50", layer="below")
+    fig.add_shape(type="line", x0=0, y0=-0.5, x1=0, y1=len(data)-0.5, line=dict(color="#10B981", width=4, dash="solid"), layer="above")
+    square_size = max(0.5, duracao_total_horas / 40)
+    for i in range(math.ceil((len(data)+0.5) / square_size)):
+        for j in range(2):
+            color = "white" if (i + j) % 2 == 0 else "black"
+            fig.add_shape(type="rect", x0=duracao_total_horas + (j * square_size), y0=i*square_size - 0.5, x1=duracao_total_horas + ((j+1) * square_size), y1=(i+1)*square_size - 0.5, line=dict(width=0.5, color="black"), fillcolor=color, layer="above")
+    hover_texts = [
+        f"<b>{row['Nome_Exibicao']}</b><br>Avanço: {row['Posicao_Horas']:.2f}h<br>Progresso: {row['Progresso']:.1f}%<br>Impulso: {format_hours_and_minutes(row['Boost_Total_Min'] / 60)}<br>Faltam: {format_hours_and_minutes(row['Tempo_Faltante_Horas'])}<br>Rank: #{row['Rank']}"
+        for i, row in data.iterrows()
+    ]
+    fig.add_trace(go.Scatter(x=data['Posicao_Horas'], y=data.index - 0.35, mode='text', text=data['Nome_Exibicao'], textposition="top center", hoverinfo='text', hovertext=hover_texts, showlegend=False))
+    for i, row in data.iterrows():
+        fig.add_layout_image(dict(source=CAR_ICON_URL, xref="x", yref="y", x=row['Posicao_Horas'], y=i, sizex=max(1.8, duracao_total_horas / 20), sizey=0.9, layer="below", xanchor="center", yanchor="middle"))
+    fig.update_layout(height=max(600, 300 + 60*len(data)))
+    return fig
+
+def synthetic_ranking(n_lojas: int, duracao: float = 30, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Loja": np.arange(1, n_lojas + 1),
+        "Nome_Exibicao": [f"Loja {i:05d}" for i in range(1, n_lojas + 1)],
+        "PlanoVoo_Score": rng.integers(0, 200, n_lojas).astype(float),
+        "Qualidade_Score": rng.integers(0, 400, n_lojas).astype(float),
+    })
+    return calculate_final_scores(df, ["PlanoVoo_Score", "Qualidade_Score"], duracao, 0)
+
+def synthetic_prepared(n_lojas: int, n_periodos: int, ciclo: str = "Março", seed: int = 0) -> PreparedData:
+    rng = np.random.default_rng(seed)
+    periodos = [f"Semana {p:02d}" for p in range(1, n_periodos + 1)]
+    data = pd.DataFrame({
+        "Loja": np.tile(np.arange(1, n_lojas + 1), n_periodos),
+        "Nome_Exibicao": np.tile([f"Loja {i:05d}" for i in range(1, n_lojas + 1)], n_periodos),
+        "Ciclo": ciclo,
+        "Periodo": np.repeat(periodos, n_lojas),
+        "PlanoVoo_Score": rng.integers(0, 50, n_lojas * n_periodos).astype(float),
+        "Qualidade_Score": rng.integers(0, 100, n_lojas * n_periodos).astype(float),
+    })
+    periodos_df = pd.DataFrame({"Ciclo": ciclo, "Periodo": periodos})
+    return PreparedData(data, ["PlanoVoo_Score", "Qualidade_Score"], periodos_df, pd.DataFrame())
+
+def _measure_replay(n_lojas: int, n_periodos: int, repeat: int):
+    prepared = synthetic_prepared(n_lojas, n_periodos)
+    df_final = compute_all_rankings(prepared)["Março"].df_final
+    best_calc, best_fig, payload, frames = float("inf"), float("inf"), "", 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        replay = compute_replay_positions(prepared)["Março"]
+        best_calc = min(best_calc, time.perf_counter() - start)
+        start = time.perf_counter()
+        fig = build_replay_fig(select_lanes(df_final, PISTA_MAX_LANES, df_final["Nome_Exibicao"].iloc[-1]), replay, 31)
+        payload = fig.to_json()
+        best_fig = min(best_fig, time.perf_counter() - start)
+        frames = len(fig.frames)
+    return best_calc, best_fig, len(payload), frames
+
+def _measure(fn, repeat: int):
+    best, fig = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = fn()
+        payload = fig.to_json()
+        best = min(best, time.perf_counter() - start)
+    return best, len(payload), len(fig.data), len(fig.layout.shapes), len(fig.layout.images)
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo de montar a pista de corrida")
+    parser.add_argument("--lojas", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--periodos", type=int, default=10, help="períodos por ciclo no replay")
+    parser.add_argument("--anterior-max", type=int, default=200, help="maior número de lojas em que o desenho anterior é medido (o custo dele cresce de forma quadrática)")
+    args = parser.parse_args()
+    print(f"{'lojas':>6} {'desenho':<22}{'tempo (s)':>10}{'JSON (KB)':>11}{'traces':>8}{'shapes':>8}{'imagens':>9}")
+    for n in args.lojas:
+        df = synthetic_ranking(n)
+        casos = [
+            ("anterior", lambda: build_pista_fig_anterior(df, 30)),
+            ("agrupado", lambda: build_pista_fig(df, 30)),
+            (f"agrupado top {PISTA_MAX_LANES}+loja", lambda: build_pista_fig(select_lanes(df, PISTA_MAX_LANES, df["Nome_Exibicao"].iloc[-1]), 30)),
+        ]
+        for nome, fn in casos:
+            if nome == "anterior" and n > args.anterior_max:
+                print(f"{n:>6} {nome:<22}{'omitido (--anterior-max)':>46}")
+                continue
+            tempo, tamanho, traces, shapes, imagens = _measure(fn, args.repeat)
+            print(f"{n:>6} {nome:<22}{tempo:>10.3f}{tamanho / 1024:>11.1f}{traces:>8}{shapes:>8}{imagens:>9}")
+
+    print(f"\nReplay com {args.periodos} períodos (janela top {PISTA_MAX_LANES}+loja)")
+    print(f"{'lojas':>6}{'posições (s)':>14}{'figura (s)':>12}{'JSON (KB)':>11}{'frames':>8}")
+    for n in args.lojas:
+        calc, fig, tamanho, frames = _measure_replay(n, args.periodos, args.repeat)
+        print(f"{n:>6}{calc:>14.3f}{fig:>12.3f}{tamanho / 1024:>11.1f}{frames:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# bench_sessions.py — Memória (RSS) do processo do app conforme as sessões crescem
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_sessions                        # 1 a 200 sessões, planilha de 500 lojas
+#   python -m benchmarks.bench_sessions --sessoes 1 50 --lojas 2000
+#
+# Abre sessões simultâneas do app com o AppTest do Streamlit, todas no mesmo
+# processo (como no servidor), mantendo cada uma viva, e mede o RSS atual
+# depois de cada degrau. Com os dados num único store compartilhado, o RSS
+# deve ficar praticamente estável; cópias por sessão aparecem como crescimento
+# linear.
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def current_rss_mb() -> float:
+    # RSS atual (não o pico): /proc no Linux; em outros sistemas, psutil se estiver instalado
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o RSS do app com 1 a N sessões simultâneas")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--lojas", type=int, default=500)
+    parser.add_argument("--ciclos", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.bench_pipeline import CICLOS
+    from benchmarks.synthetic_workbook import generate_workbook
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = generate_workbook(Path(tmp) / "base.xlsx", args.lojas, CICLOS[-args.ciclos:])
+        os.environ["CIRCUITO_WORKBOOK"] = str(workbook)
+        os.environ["CIRCUITO_CACHE_DIR"] = str(Path(tmp) / "cache")
+        from streamlit.testing.v1 import AppTest
+
+        sessoes = []
+        def nova_sessao():
+            at = AppTest.from_file(str(ROOT / "circuito_lojas_app.py"), default_timeout=300)
+            at.run()
+            # Cada sessão passa pelas três páginas, como um usuário navegando
+            for page in ("Loja", "Etapa", "Geral"):
+                at.session_state.page = page
+                at.run()
+            if at.exception: raise RuntimeError(at.exception[0].value)
+            sessoes.append(at)
+
+        nova_sessao()
+        gc.collect()
+        base = current_rss_mb()
+        print(f"Planilha sintética: {args.lojas} lojas, {args.ciclos} ciclos ({workbook.stat().st_size / 1024:.0f} KB)")
+        print(f"{'sessões':>8}{'RSS (MB)':>10}{'Δ vs 1 (MB)':>13}{'por sessão (KB)':>17}{'tempo (s)':>11}")
+        for alvo in sorted(args.sessoes):
+            start = time.perf_counter()
+            while len(sessoes) < alvo:
+                nova_sessao()
+            gc.collect()
+            rss = current_rss_mb()
+            por_sessao = (rss - base) * 1024 / (len(sessoes) - 1) if len(sessoes) > 1 else 0.0
+            print(f"{len(sessoes):>8}{rss:>10.1f}{rss - base:>13.1f}{por_sessao:>17.1f}{time.perf_counter() - start:>11.1f}")
+
+if __name__ == "__main__":
+    main()
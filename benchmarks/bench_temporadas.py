@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# bench_temporadas.py — Abertura e memória do app conforme as temporadas se acumulam
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.bench_temporadas                       # 1, 2, 4 e 8 temporadas
+#   python -m benchmarks.bench_temporadas --temporadas 1 3 --lojas 500 --ciclos 6
+#
+# Para cada quantidade de temporadas gera uma planilha sintética com os mesmos
+# ciclos repetidos em cada ano, monta o cache particionado e mede, com um
+# DataStore novo (como um processo recém-iniciado com o cache já em disco): o
+# tempo até o ranking do ciclo mais recente, a memória das partições depois
+# disso e depois de visitar todas as partições com o LRU limitado. A última
+# coluna é a memória do quadro preparado inteiro, que era o que cada processo
+# carregava antes das partições. Abertura e memória devem ficar estáveis.
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def measure(path: Path, cache_dir: Path, max_particoes: int) -> dict:
+    import circuito_cache
+    import circuito_engine as engine
+    import circuito_fetch
+    import circuito_store
+
+    fetcher = lambda: circuito_fetch.WorkbookFetcher(circuito_fetch.LocalFileSource(str(path)), 0)
+    circuito_store.DataStore(fetcher(), cache_dir).current()  # grava o cache (miss)
+
+    start = time.perf_counter()
+    store = circuito_store.DataStore(fetcher(), cache_dir, max_particoes)
+    snap = store.current()
+    temporada = snap.temporada_atual()
+    store.particao(snap, temporada, snap.ciclos(temporada)[-1])
+    abrir_s = time.perf_counter() - start
+    mb_aberto = sum(p["mb"] for p in store.particoes_em_memoria())
+
+    for t in snap.temporadas():
+        for c in snap.ciclos(t):
+            store.particao(snap, t, c)
+    return {
+        "particoes": len(snap.catalog.partitions), "abrir_ms": abrir_s * 1000, "mb_aberto": mb_aberto,
+        "mb_lru": sum(p["mb"] for p in store.particoes_em_memoria()),
+        "mb_tudo": engine.load_and_prepare_data(circuito_cache.parse_workbook(path.read_bytes())).data.memory_usage(deep=True).sum() / 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede abertura e memória do store com 1 a N temporadas na planilha")
+    parser.add_argument("--temporadas", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--lojas", type=int, default=200)
+    parser.add_argument("--ciclos", type=int, default=3)
+    parser.add_argument("--periodos", type=int, default=4)
+    parser.add_argument("--max-particoes", type=int, default=4)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    import circuito_metrics
+    from benchmarks.bench_pipeline import CICLOS
+    from benchmarks.synthetic_workbook import generate_workbook
+
+    circuito_metrics.enable(False)
+    print(f"{args.lojas} lojas, {args.ciclos} ciclos por temporada, LRU de {args.max_particoes} partições")
+    print(f"{'temporadas':>10}{'partições':>11}{'planilha (KB)':>15}{'abrir (ms)':>12}{'MB aberto':>11}{'MB LRU':>9}{'MB tudo':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.temporadas:
+            anos = list(range(2025 - n + 1, 2026))
+            path = generate_workbook(Path(tmp) / f"base_{n}.xlsx", args.lojas, CICLOS[-args.ciclos:], args.periodos, anos=anos)
+            r = measure(path, Path(tmp) / f"cache_{n}", args.max_particoes)
+            print(f"{n:>10}{r['particoes']:>11}{path.stat().st_size / 1024:>15.0f}{r['abrir_ms']:>12.1f}"
+                  f"{r['mb_aberto']:>11.3f}{r['mb_lru']:>9.3f}{r['mb_tudo']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# synthetic_workbook.py — Gera uma BaseCircuito.xlsx sintética para benchmarks
+#
+# Uso (na raiz do repositório):
+#   python -m benchmarks.synthetic_workbook --lojas 500 --ciclos Agosto Setembro --periodos 4 --saida /tmp/base.xlsx
+#   python -m benchmarks.synthetic_workbook --anos 2023 2024 2025        # mesmos ciclos em três temporadas
+#
+# Mesmas abas (ETAPA_SHEETS + Periodo, Ciclos e perfilLojas) e mesmas colunas
+# da planilha real. Cada etapa tem PesoDaEtapa e NotaMaxima fixos; as etapas
+# de MONTHLY_ETAPAS só têm o primeiro período do ciclo e as de JOKER_ETAPAS
+# (Meta) têm peso, mas o motor não as soma no avanço nem no peso máximo.
+
+import argparse
+import calendar
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from circuito_engine import ETAPA_SHEETS, MONTH_MAP, MONTHLY_ETAPAS  # noqa: E402
+
+# (PesoDaEtapa, NotaMaxima) de cada etapa, como na planilha de Setembro/2025
+ETAPA_REGRAS = {
+    "PlanoVoo": (3, 2), "ProjetoFast": (4, 2), "PontoPartida": (5, 1), "AcoesComerciais": (6, 2),
+    "PainelVendas": (1, 2), "Engajamento": (7, 1), "VisualMerchandising": (9, 2), "ModeloAtendimento": (8, 1),
+    "EvolucaoComercial": (2, 2), "Qualidade": (10, 3), "Meta": (4, 4),
+}
+ETAPA_COLUMNS = ["NomeLoja", "loja_key", "Nota", "NotaMaxima", "PesoDaEtapa", "Observação", "DataAtualizacao",
+                 "Ciclo", "Período", "Data Início", "Data Fim", "Usuario", "ChaveNota", "__PowerAppsId__"]
+PERFIL_COLUMNS = ["Loja", "Nome_Loja_Simples", "Loja Key", "Praça", "Regional", "M²", "Porte de Loja", "Tipo de Negócio",
+                  "Coordenadas", "Email", "Email_CC"]
+
+def _periodos_do_ciclo(ciclo: str, ano: int, n_periodos: int):
+    # Períodos semanais a partir do dia 1; o último vai até o fim do mês
+    mes = MONTH_MAP[ciclo]
+    fim_mes = datetime(ano, mes, calendar.monthrange(ano, mes)[1])
+    inicio = datetime(ano, mes, 1)
+    periodos = []
+    for p in range(n_periodos):
+        ini = inicio + timedelta(days=7 * p)
+        fim = fim_mes if p == n_periodos - 1 else min(fim_mes, ini + timedelta(days=6))
+        periodos.append((f"Semana {p + 1}", ini, fim))
+    return periodos
+
+def nomes_lojas(n_lojas: int) -> List[str]:
+    return [f"Loja {i:05d}" for i in range(1, n_lojas + 1)]
+
+def generate_sheets(n_lojas: int = 50, ciclos: Optional[List[str]] = None, n_periodos: int = 4, ano: int = 2025,
+                    seed: int = 0, sem_nota: float = 0.1, anos: Optional[List[int]] = None) -> Dict[str, pd.DataFrame]:
+    # Com anos, os ciclos se repetem em cada temporada (a temporada sai da Data Início)
+    rng = np.random.default_rng(seed)
+    ciclos = ciclos or ["Setembro"]
+    anos = anos or [ano]
+    keys = np.arange(1, n_lojas + 1)
+    nomes = np.array(nomes_lojas(n_lojas), dtype=object)
+    sheets = {
+        "Periodo": pd.DataFrame({"Períodos": [f"Semana {p + 1}" for p in range(n_periodos)],
+                                 "__PowerAppsId__": [str(uuid.UUID(int=int(rng.integers(2**63)))) for _ in range(n_periodos)]}),
+        "Ciclos": pd.DataFrame({"Ciclo": ciclos, "__PowerAppsId__": [str(uuid.UUID(int=int(rng.integers(2**63)))) for _ in ciclos]}),
+    }
+    for etapa in ETAPA_SHEETS:
+        peso, nota_max = ETAPA_REGRAS[etapa]
+        partes = []
+        for ano, ciclo in [(a, c) for a in anos for c in ciclos]:
+            periodos = _periodos_do_ciclo(ciclo, ano, n_periodos)
+            if etapa in MONTHLY_ETAPAS: periodos = periodos[:1]
+            for nome_periodo, ini, fim in periodos:
+                nota = rng.integers(0, nota_max + 1, n_lojas).astype(float)
+                nota[rng.random(n_lojas) < sem_nota] = np.nan
+                partes.append(pd.DataFrame({
+                    "NomeLoja": nomes, "loja_key": keys, "Nota": nota, "NotaMaxima": nota_max, "PesoDaEtapa": peso,
+                    "Observação": np.where(rng.random(n_lojas) < 0.2, "Nt", None), "DataAtualizacao": np.nan,
+                    "Ciclo": ciclo, "Período": nome_periodo, "Data Início": ini, "Data Fim": fim, "Usuario": np.nan,
+                    "ChaveNota": [f"{k}{ciclo}{nome_periodo}" for k in keys],
+                    "__PowerAppsId__": [str(uuid.UUID(int=int(v))) for v in rng.integers(2**63, size=n_lojas)],
+                }, columns=ETAPA_COLUMNS))
+        sheets[etapa] = pd.concat(partes, ignore_index=True)
+    sheets["perfilLojas"] = pd.DataFrame({
+        "Loja": [f"LJ {k:02d} - {n.upper()}" for k, n in zip(keys, nomes)], "Nome_Loja_Simples": nomes, "Loja Key": keys,
+        "Praça": "PARANA", "Regional": [f"PR {1 + k % 4}" for k in keys], "M²": rng.uniform(500, 4000, n_lojas).round(2),
+        "Porte de Loja": rng.choice(["P", "M", "G"], n_lojas), "Tipo de Negócio": "MiniPreço",
+        "Coordenadas": "0", "Email": "", "Email_CC": "",
+    }, columns=PERFIL_COLUMNS)
+    return sheets
+
+def write_workbook(sheets: Dict[str, pd.DataFrame], path) -> Path:
+    # openpyxl em modo write-only: escreve linha a linha sem montar a planilha inteira em memória
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(list(df.columns))
+        valores = df.astype(object).where(df.notna(), None)
+        for col in df.select_dtypes("datetime").columns:
+            valores[col] = df[col].dt.to_pydatetime()
+        for row in valores.to_numpy().tolist():
+            ws.append(row)
+    path = Path(path)
+    wb.save(path)
+    return path
+
+def generate_workbook(path, n_lojas: int = 50, ciclos: Optional[List[str]] = None, n_periodos: int = 4, seed: int = 0,
+                      anos: Optional[List[int]] = None) -> Path:
+    return write_workbook(generate_sheets(n_lojas, ciclos, n_periodos, seed=seed, anos=anos), path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma BaseCircuito.xlsx sintética")
+    parser.add_argument("--lojas", type=int, default=50)
+    parser.add_argument("--ciclos", nargs="+", default=["Setembro"], choices=list(MONTH_MAP))
+    parser.add_argument("--periodos", type=int, default=4)
+    parser.add_argument("--anos", type=int, nargs="+", default=[2025], help="temporadas geradas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", default="BaseCircuito_sintetica.xlsx")
+    args = parser.parse_args()
+    path = generate_workbook(args.saida, args.lojas, args.ciclos, args.periodos, args.seed, args.anos)
+    print(f"{path} ({path.stat().st_size / 1024:.0f} KB): {args.lojas} lojas, {len(args.anos)} temporadas, {len(args.ciclos)} ciclos, {args.periodos} períodos")
+
+if __name__ == "__main__":
+    main()
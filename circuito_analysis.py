@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# circuito_analysis.py — Análises por ciclo calculadas para todas as lojas de uma vez
+#
+# Plano de Ação: a matriz (loja x etapa) de gaps até o peso máximo da etapa,
+# o rival de cada loja (a loja uma posição acima, ou o vice para o líder) e a
+# diferença em horas até ele. Tudo é calculado numa passada vetorizada por
+# ciclo; a página da loja só consulta o resultado pelo nome. O top-K de cada
+# etapa também sai de uma única seleção parcial sobre a matriz de scores.
+
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+MELHORIA_COLS = ['Etapa', 'Impulso Atual', 'Impulso Máximo', 'Gap']
+
+# ----------------------------------------------------------------------
+# Resultado tipado
+# ----------------------------------------------------------------------
+class LojaAnalise(NamedTuple):
+    loja_row: pd.Series
+    df_melhoria: pd.DataFrame
+    rival: Optional[pd.Series]
+
+class GapAnalysis(NamedTuple):
+    df_final: pd.DataFrame
+    etapas: List[str]          # colunas <Etapa>_Score com peso máximo > 0 no ciclo
+    impulso_maximo: np.ndarray # peso máximo de cada etapa (mesma ordem de etapas)
+    gap_matrix: pd.DataFrame   # lojas (linhas de df_final) x etapas
+    rivals: pd.DataFrame       # uma linha por loja, mesma ordem de df_final
+    row_by_nome: dict          # Nome_Exibicao -> posição em df_final
+
+    def for_loja(self, nome: str) -> Optional[LojaAnalise]:
+        pos = self.row_by_nome.get(nome)
+        if pos is None: return None
+        loja_row = self.df_final.iloc[pos]
+        gaps = self.gap_matrix.iloc[pos].to_numpy()
+        ordem = np.argsort(-gaps, kind='stable')
+        df_melhoria = pd.DataFrame({
+            'Etapa': [self.etapas[i].replace('_Score', '') for i in ordem],
+            'Impulso Atual': loja_row.reindex(self.etapas, fill_value=0).to_numpy(dtype=float)[ordem],
+            'Impulso Máximo': self.impulso_maximo[ordem],
+            'Gap': gaps[ordem],
+        }, columns=MELHORIA_COLS)
+        rival_row = self.rivals.iloc[pos]
+        rival = rival_row if pd.notna(rival_row['Rival_Nome']) else None
+        return LojaAnalise(loja_row, df_melhoria, rival)
+
+# ----------------------------------------------------------------------
+# Cálculo
+# ----------------------------------------------------------------------
+def compute_pesos_ciclo(etapas_pesos_df: pd.DataFrame, ciclo: str) -> pd.Series:
+    if etapas_pesos_df is None or etapas_pesos_df.empty: return pd.Series(dtype=float)
+    return etapas_pesos_df[etapas_pesos_df['Ciclo'] == ciclo].groupby('Etapa')['PesoMaximo'].sum()
+
+def compute_rivals(df_final: pd.DataFrame) -> pd.DataFrame:
+    # O alvo de cada loja é a primeira loja com Rank - 1; o do líder é a primeira com Rank 2
+    rank = df_final['Rank'].to_numpy()
+    primeiro_por_rank = df_final.drop_duplicates('Rank').set_index('Rank')
+    alvo = np.where(rank == 1, 2, rank - 1)
+    rival_nome = primeiro_por_rank['Nome_Exibicao'].reindex(alvo).to_numpy()
+    rival_pos = primeiro_por_rank['Posicao_Horas'].reindex(alvo).to_numpy(dtype=float)
+    posicao = df_final['Posicao_Horas'].to_numpy(dtype=float)
+    # Para o líder a diferença é a vantagem sobre o vice; para os demais, o que falta para ultrapassar
+    diferenca = np.where(rank == 1, posicao - rival_pos, rival_pos - posicao)
+    return pd.DataFrame({
+        'Nome_Exibicao': df_final['Nome_Exibicao'].to_numpy(),
+        'Rank': rank,
+        'Lider': rank == 1,
+        'Rival_Nome': rival_nome,
+        'Rival_Rank': alvo,
+        'Rival_Posicao_Horas': rival_pos,
+        'Diferenca_Horas': diferenca,
+    })
+
+def compute_gap_analysis(df_final: pd.DataFrame, etapas_pesos_df: pd.DataFrame, etapas_scores_cols: list, ciclo: str) -> GapAnalysis:
+    pesos = compute_pesos_ciclo(etapas_pesos_df, ciclo)
+    etapas = [c for c in etapas_scores_cols if pesos.get(c, 0) > 0]
+    impulso_maximo = pesos.reindex(etapas).to_numpy(dtype=float)
+    if df_final is None or df_final.empty:
+        return GapAnalysis(pd.DataFrame(), etapas, impulso_maximo, pd.DataFrame(columns=etapas), pd.DataFrame(), {})
+    scores = df_final.reindex(columns=etapas, fill_value=0).to_numpy(dtype=float)
+    # fmax ignora NaN, como o max(0, ...) do Python fazia célula a célula
+    gaps = np.fmax(0, impulso_maximo - scores)
+    gap_matrix = pd.DataFrame(gaps, columns=etapas, index=df_final['Nome_Exibicao'].to_numpy())
+    row_by_nome = {nome: pos for pos, nome in reversed(list(enumerate(df_final['Nome_Exibicao'])))}
+    return GapAnalysis(df_final, etapas, impulso_maximo, gap_matrix, compute_rivals(df_final), row_by_nome)
+
+def overtake_report(analysis: GapAnalysis, limite_gap: float = 0.1) -> pd.DataFrame:
+    # "Quem pode ultrapassar quem": o potencial é a soma dos gaps (minutos) convertida em horas
+    if analysis.rivals.empty: return pd.DataFrame()
+    gaps = analysis.gap_matrix.to_numpy()
+    report = analysis.rivals.copy()
+    report['Potencial_Horas'] = np.where(gaps > limite_gap, gaps, 0).sum(axis=1) / 60.0
+    report['Pode_Ultrapassar'] = ~report['Lider'] & (report['Potencial_Horas'] > report['Diferenca_Horas'])
+    return report
+
+# ----------------------------------------------------------------------
+# Top-K por etapa
+# ----------------------------------------------------------------------
+ETAPA_TOP_K = 10
+ETAPA_VALUE_COL = "Impulso na Etapa (min)"
+
+class EtapaTopK(NamedTuple):
+    etapas_com_dados: List[str]   # nomes (sem _Score) das etapas com impulso no ciclo, em ordem alfabética
+    top: dict                     # nome da etapa -> DataFrame [Nome_Exibicao, Impulso na Etapa (min)]
+    k: int
+
+    def for_etapa(self, etapa: str, k: Optional[int] = None) -> pd.DataFrame:
+        df = self.top.get(etapa)
+        if df is None: return pd.DataFrame(columns=['Nome_Exibicao', ETAPA_VALUE_COL])
+        return df.head(k or self.k)
+
+def _top_k_indices(values: np.ndarray, kth_value: float, k: int) -> np.ndarray:
+    # Candidatos >= k-ésimo maior valor (podem passar de k por empates); o desempate segue a ordem do ranking
+    cand = np.flatnonzero(values >= kth_value)
+    return cand[np.argsort(-values[cand], kind='stable')][:k]
+
+def compute_etapa_top_k(df_final: pd.DataFrame, etapas_scores_cols: list, k: int = ETAPA_TOP_K) -> EtapaTopK:
+    if k < 1: raise ValueError(f"k deve ser positivo (recebido: {k})")
+    cols = [c for c in etapas_scores_cols if df_final is not None and c in df_final.columns]
+    if not cols or df_final.empty: return EtapaTopK([], {}, k)
+    matrix = df_final[cols].to_numpy(dtype=float)
+    com_dados = np.nansum(matrix, axis=0) > 0
+    # Seleção parcial (np.partition) em todas as colunas de uma vez, sem ordenar o ciclo inteiro
+    values = np.where(np.isnan(matrix), -np.inf, matrix)
+    n = len(values)
+    kth = np.partition(values, n - k, axis=0)[n - k] if n > k else np.full(len(cols), -np.inf)
+    nomes = df_final['Nome_Exibicao'].to_numpy()
+    top = {}
+    for j, col in enumerate(cols):
+        if not com_dados[j]: continue
+        idx = _top_k_indices(values[:, j], kth[j], k)
+        top[col.replace('_Score', '')] = pd.DataFrame({'Nome_Exibicao': nomes[idx], ETAPA_VALUE_COL: matrix[idx, j]})
+    return EtapaTopK(sorted(top), top, k)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# circuito_api.py — API JSON somente leitura dos rankings (sem Streamlit)
+#
+# Para TVs das lojas e sistemas internos: em vez de uma sessão Streamlit por
+# tela, um GET barato. Lê do mesmo DataStore do app (circuito_store): mesma
+# busca, mesmo cache Parquet e, quando roda ao lado do app, os mesmos objetos. As respostas levam ETag derivado da
+# versão da planilha, do dia e da URL; com If-None-Match igual a resposta é
+# 304, sem montar o JSON.
+#
+# Rotas (todas as de ciclo aceitam ?temporada=2025; sem ela, a temporada mais recente):
+#   GET /api/temporadas
+#   GET /api/ciclos
+#   GET /api/ciclos/<ciclo>/ranking?limit=50&offset=0
+#   GET /api/ciclos/<ciclo>/podio
+#   GET /api/ciclos/<ciclo>/lojas/<nome>
+#   GET /api/ciclos/<ciclo>/etapas                (etapas com dados no ciclo)
+#   GET /api/ciclos/<ciclo>/etapas/<etapa>?k=10
+#   GET /api/campeonato?limit=50&offset=0       (classificação da temporada)
+#   GET /api/health
+#
+# Uso: python circuito_api.py [--port 8502] [--workbook BaseCircuito.xlsx]
+
+import hashlib
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+import circuito_analysis
+import circuito_engine as engine
+import circuito_fetch
+import circuito_store
+
+logger = logging.getLogger("circuito.api")
+
+DEFAULT_PORT = 8502
+MAX_LIMIT = 1000
+RANKING_COLS = ['Rank', 'Loja', 'Nome_Exibicao', 'Posicao_Horas', 'Progresso', 'Tempo_Faltante_Horas', 'Boost_Total_Min']
+OVERTAKE_COLS = ['Nome_Exibicao', 'Rank', 'Rival_Nome', 'Rival_Rank', 'Diferenca_Horas', 'Potencial_Horas', 'Pode_Ultrapassar']
+
+class NotFound(Exception):
+    pass
+
+def _records(df: pd.DataFrame) -> list:
+    # to_json converte NaN em null e tipos numpy em JSON nativo de uma vez só
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+# ----------------------------------------------------------------------
+# Dados: os mesmos quadros do app, recalculados só quando a planilha ou o dia mudam
+# ----------------------------------------------------------------------
+class RankingService:
+    def __init__(self, store: circuito_store.DataStore):
+        self.store = store
+        self.fetcher = store.fetcher
+        self._local = threading.local()
+
+    @property
+    def _snap(self) -> circuito_store.Snapshot:
+        # Cada requisição (thread) lê do Snapshot obtido no seu refresh, mesmo que outro o substitua no meio
+        return self._local.snap
+
+    def refresh(self) -> str:
+        # Devolve a versão atual (hash da planilha + dia), usada no ETag
+        self._local.snap = self.store.current()
+        return self._local.snap.version
+
+    def particao(self, ciclo: str, temporada: Optional[int] = None) -> circuito_store.Particao:
+        temporada = self.temporada(temporada)
+        part = self.store.particao(self._snap, temporada, ciclo)
+        if part is None: raise NotFound(f"Ciclo {ciclo!r} não encontrado na temporada {temporada}")
+        return part
+
+    def temporada(self, temporada: Optional[int]) -> int:
+        if temporada is None: temporada = self._snap.temporada_atual()
+        if temporada not in self._snap.temporadas(): raise NotFound(f"Temporada {temporada!r} não encontrada")
+        return temporada
+
+    def ciclo(self, ciclo: str, temporada: Optional[int] = None) -> engine.CicloRanking:
+        return self.particao(ciclo, temporada).ranking
+
+    # ------------------------------------------------------------------
+    # Respostas
+    # ------------------------------------------------------------------
+    def temporadas(self) -> dict:
+        return {"temporadas": [{"temporada": t, "ciclos": self._snap.ciclos(t)} for t in self._snap.temporadas()]}
+
+    def ciclos(self, temporada: Optional[int] = None) -> dict:
+        temporada = self.temporada(temporada)
+        rankings = {c: self.ciclo(c, temporada) for c in self._snap.ciclos(temporada)}
+        return {"temporada": temporada,
+                "ciclos": [{"ciclo": c, "duracao_horas": r.duracao_horas, "baseline_horas": r.baseline_horas, "lojas": len(r.df_final)}
+                           for c, r in rankings.items()]}
+
+    def ranking(self, ciclo: str, limit: int = 50, offset: int = 0, temporada: Optional[int] = None) -> dict:
+        part = self.particao(ciclo, temporada)
+        r = part.ranking
+        df = r.df_final
+        page = df.iloc[offset:offset + limit][[c for c in RANKING_COLS if c in df.columns]]
+        return {"temporada": part.temporada, "ciclo": ciclo, "duracao_horas": r.duracao_horas, "baseline_horas": r.baseline_horas,
+                "total": len(df), "offset": offset, "limit": limit, "lojas": _records(page)}
+
+    def podio(self, ciclo: str, temporada: Optional[int] = None) -> dict:
+        ranking = self.ranking(ciclo, 3, temporada=temporada)
+        return {"temporada": ranking["temporada"], "ciclo": ciclo, "podio": ranking["lojas"]}
+
+    def loja(self, ciclo: str, nome: str, temporada: Optional[int] = None) -> dict:
+        part = self.particao(ciclo, temporada)
+        analise = self.store.gap_analysis(part).for_loja(nome)
+        if analise is None: raise NotFound(f"Loja {nome!r} não encontrada no ciclo {ciclo!r}")
+        loja_row, df_melhoria, rival = analise
+        etapas = {c.replace('_Score', ''): loja_row[c] for c in part.prepared.etapas_scores_cols if c in loja_row.index}
+        detalhe = json.loads(loja_row[[c for c in RANKING_COLS if c in loja_row.index]].to_json(force_ascii=False))
+        detalhe["etapas_min"] = json.loads(pd.Series(etapas, dtype=float).to_json(force_ascii=False))
+        detalhe["plano_de_acao"] = _records(df_melhoria)
+        # Rival, diferença e se os gaps bastam para ultrapassá-lo (linha da loja no relatório de ultrapassagens)
+        alvo = self.store.overtake_report(part).iloc[self.store.gap_analysis(part).row_by_nome[nome]] if rival is not None else None
+        detalhe["rival"] = json.loads(alvo[OVERTAKE_COLS[2:]].to_json(force_ascii=False)) if alvo is not None else None
+        return {"temporada": part.temporada, "ciclo": ciclo, "loja": detalhe}
+
+    def etapas(self, ciclo: str, temporada: Optional[int] = None) -> dict:
+        part = self.particao(ciclo, temporada)
+        return {"temporada": part.temporada, "ciclo": ciclo, "etapas": self.store.etapa_top_k(part, k=MAX_LIMIT).etapas_com_dados}
+
+    def etapa(self, ciclo: str, etapa: str, k: int = circuito_analysis.ETAPA_TOP_K, temporada: Optional[int] = None) -> dict:
+        part = self.particao(ciclo, temporada)
+        top = self.store.etapa_top_k(part, k=MAX_LIMIT)
+        if etapa not in top.top: raise NotFound(f"Etapa {etapa!r} sem dados no ciclo {ciclo!r}")
+        return {"temporada": part.temporada, "ciclo": ciclo, "etapa": etapa, "k": k, "top": _records(top.for_etapa(etapa, k))}
+
+    def ultrapassagens(self, ciclo: str, limit: int = 50, offset: int = 0, temporada: Optional[int] = None) -> dict:
+        # Lojas que, fechando os gaps do Plano de Ação, passam o rival (a loja uma posição acima)
+        part = self.particao(ciclo, temporada)
+        report = self.store.overtake_report(part)
+        if not report.empty: report = report.loc[report['Pode_Ultrapassar'], OVERTAKE_COLS]
+        return {"temporada": part.temporada, "ciclo": ciclo, "total": len(report), "offset": offset, "limit": limit,
+                "lojas": _records(report.iloc[offset:offset + limit])}
+
+    def campeonato(self, limit: int = 50, offset: int = 0, temporada: Optional[int] = None) -> dict:
+        camp = self.store.campeonato(self._snap, self.temporada(temporada))
+        df = camp.classificacao
+        return {"temporada": camp.temporada, "ciclos": camp.ciclos, "total": len(df), "offset": offset, "limit": limit,
+                "lojas": _records(df.iloc[offset:offset + limit])}
+
+    def route(self, path: str, query: dict) -> dict:
+        partes = [unquote(p) for p in path.strip("/").split("/")]
+        if partes[:1] != ["api"]: raise NotFound(path)
+        partes = partes[1:]
+        inteiro = lambda nome, padrao: max(0, min(MAX_LIMIT, int(query.get(nome, [padrao])[0])))
+        temporada = int(query["temporada"][0]) if "temporada" in query else None
+        if partes == ["health"]: return {"status": "ok", "versao": self._snap.version, "ultimo_erro": self.fetcher.last_error}
+        if partes == ["temporadas"]: return self.temporadas()
+        if partes == ["ciclos"]: return self.ciclos(temporada)
+        if partes == ["campeonato"]: return self.campeonato(inteiro("limit", 50), inteiro("offset", 0), temporada)
+        if len(partes) >= 3 and partes[0] == "ciclos":
+            ciclo, recurso = partes[1], partes[2:]
+            if recurso == ["ranking"]: return self.ranking(ciclo, inteiro("limit", 50), inteiro("offset", 0), temporada)
+            if recurso == ["podio"]: return self.podio(ciclo, temporada)
+            if recurso == ["etapas"]: return self.etapas(ciclo, temporada)
+            if recurso == ["ultrapassagens"]: return self.ultrapassagens(ciclo, inteiro("limit", 50), inteiro("offset", 0), temporada)
+            if len(recurso) == 2 and recurso[0] == "lojas": return self.loja(ciclo, recurso[1], temporada)
+            if len(recurso) == 2 and recurso[0] == "etapas": return self.etapa(ciclo, recurso[1], inteiro("k", circuito_analysis.ETAPA_TOP_K) or 1, temporada)
+        raise NotFound(path)
+
+# ----------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------
+def make_etag(version: str, target: str) -> str:
+    return '"' + hashlib.sha1(f"{version}|{target}".encode()).hexdigest()[:20] + '"'
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header: return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+class ApiHandler(BaseHTTPRequestHandler):
+    service: RankingService = None  # definido por make_server
+    max_age = 60
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            version = self.service.refresh()
+        except circuito_fetch.FetchError as e:
+            return self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"erro": str(e)})
+        except Exception:
+            # Planilha ilegível, cache corrompido etc.: a requisição recebe JSON, não a conexão fechada
+            logger.exception("Falha ao carregar os dados para %s", self.path)
+            return self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"erro": "Dados indisponíveis no momento"})
+        # O ETag depende só da versão dos dados e da URL: o 304 sai sem montar a resposta
+        etag = make_etag(version, self.path)
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={self.max_age}")
+            self.end_headers()
+            return
+        try:
+            body = self.service.route(url.path, parse_qs(url.query))
+        except NotFound as e:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"erro": f"Não encontrado: {e}"})
+        except ValueError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"erro": str(e)})
+        except Exception:
+            logger.exception("Erro ao responder %s", self.path)
+            return self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno"})
+        self._send_json(HTTPStatus.OK, body, etag)
+
+    def _send_json(self, status: HTTPStatus, body: dict, etag: Optional[str] = None):
+        data = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={self.max_age}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+def make_server(service: RankingService, host: str = "0.0.0.0", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    handler = type("CircuitoApiHandler", (ApiHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve_in_background(store: circuito_store.DataStore, host: str = "0.0.0.0", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    # Ao lado do app: mesmo store, servidor numa thread daemon
+    server = make_server(RankingService(store), host, port)
+    threading.Thread(target=server.serve_forever, name="circuito-api", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API JSON somente leitura dos rankings do Circuito")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workbook", default=circuito_fetch.WORKBOOK_SOURCE, help="URL ou caminho da planilha")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    store = circuito_store.DataStore(circuito_fetch.WorkbookFetcher(circuito_fetch.make_source(args.workbook)))
+    store.start_refresher()
+    server = make_server(RankingService(store), args.host, args.port)
+    print(f"API do Circuito em http://{args.host}:{args.port}/api/ciclos (planilha: {args.workbook})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
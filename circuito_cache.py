@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# circuito_cache.py — Cache colunar (Parquet) em disco dos dados preparados
+#
+# A chave é o hash do conteúdo da planilha: enquanto a BaseCircuito.xlsx não
+# mudar, os quadros preparados são lidos dos arquivos Parquet em vez de
+# reprocessar o xlsx com openpyxl. O cache sobrevive a reinícios do servidor
+# e é compartilhado por todos os processos que apontam para a mesma pasta.
+#
+# Cada entrada é particionada por (Temporada, Ciclo): uma subpasta por
+# partição com os três quadros, e um meta.json com o catálogo (temporadas,
+# ciclos e o hash de cada partição e de cada etapa). Quem abre a entrada lê só
+# o catálogo; as partições são carregadas quando pedidas (Catalog.load), de
+# modo que o custo de abrir o app não cresce com o número de temporadas.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+import circuito_engine as engine
+import circuito_ingest
+from circuito_metrics import timed
+
+# ----------------------------------------------------------------------
+# Configuração
+# ----------------------------------------------------------------------
+CACHE_DIR = Path(os.environ.get("CIRCUITO_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "circuito"))
+# Incrementar quando a saída de load_and_prepare_data mudar, para invalidar entradas antigas
+CACHE_VERSION = 5
+MAX_ENTRIES = 3
+FRAMES = ("data", "periodos_df", "etapas_pesos_df")
+
+# ----------------------------------------------------------------------
+# Estatísticas
+# ----------------------------------------------------------------------
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    last_key: str = ""
+    last_load_s: float = 0.0
+    last_rebuild_s: float = 0.0
+    total_rebuild_s: float = 0.0
+
+_stats = CacheStats()
+_lock = threading.Lock()
+
+def cache_stats() -> dict:
+    with _lock:
+        return asdict(_stats)
+
+def reset_cache_stats():
+    global _stats
+    with _lock:
+        _stats = CacheStats()
+
+def _record(cache_dir: Path, **changes):
+    with _lock:
+        for field, value in changes.items():
+            if field in ("hits", "misses", "errors", "total_rebuild_s"):
+                value = getattr(_stats, field) + value
+            setattr(_stats, field, value)
+        snapshot = asdict(_stats)
+    # Retrato do último processo que usou o cache, legível por fora (ex.: `cat .cache/circuito/stats.json`)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (cache_dir / "stats.json").write_text(json.dumps(snapshot, indent=2))
+    except OSError:
+        pass
+
+# ----------------------------------------------------------------------
+# Leitura e escrita das entradas
+# ----------------------------------------------------------------------
+def workbook_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def cache_key(content: bytes = b"", digest: Optional[str] = None) -> str:
+    # O modo compacto muda os tipos dos quadros: cada modo tem a sua entrada
+    modo = "c" if engine.COMPACT else ""
+    return f"v{CACHE_VERSION}{modo}-{(digest or workbook_hash(content))[:32]}"
+
+# ----------------------------------------------------------------------
+# Catálogo de partições (Temporada, Ciclo)
+# ----------------------------------------------------------------------
+def _hash(obj) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+def partition_digests(part: engine.PreparedData) -> Dict[str, str]:
+    # Um hash das chaves (loja x período), um por coluna de nota e um dos pesos
+    partes = {"_chaves": _hash(part.data[['Loja', 'Nome_Exibicao', 'Periodo']])}
+    partes.update({c: _hash(part.data[c]) for c in part.etapas_scores_cols})
+    if not part.etapas_pesos_df.empty: partes["_pesos"] = _hash(part.etapas_pesos_df)
+    return partes
+
+class Partition(NamedTuple):
+    temporada: int
+    ciclo: str
+    subdir: str
+    digests: Dict[str, str]                  # parte -> hash, ver partition_digests
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha1(json.dumps(self.digests, sort_keys=True).encode()).hexdigest()[:16]
+
+class Catalog:
+    # Índice de uma entrada do cache; as partições só são lidas do disco em load()
+    def __init__(self, key: str, entry: Optional[Path], etapas_scores_cols: List[str], partitions: List[Partition],
+                 rebuild: Callable[[], Dict[Tuple[int, str], engine.PreparedData]], memory: Optional[dict] = None):
+        self.key = key
+        self.entry = entry
+        self.etapas_scores_cols = etapas_scores_cols
+        self.partitions = {(p.temporada, p.ciclo): p for p in partitions}
+        self._rebuild = rebuild
+        self._memory = memory                # sem cache em disco, as partições ficam aqui
+
+    def temporadas(self) -> List[int]:
+        return sorted({t for t, _ in self.partitions})
+
+    def ciclos(self, temporada: int) -> List[str]:
+        return [c for t, c in self.partitions if t == temporada]
+
+    def partition(self, temporada: int, ciclo: str) -> Optional[Partition]:
+        return self.partitions.get((temporada, ciclo))
+
+    @timed("load_partition")
+    def load(self, temporada: int, ciclo: str) -> engine.PreparedData:
+        if (temporada, ciclo) not in self.partitions: raise KeyError((temporada, ciclo))
+        if self._memory is None:
+            try:
+                return _read_partition(self.entry / self.partitions[(temporada, ciclo)].subdir, self.etapas_scores_cols, temporada)
+            except OSError:
+                # Entrada removida por outro processo (limpeza): refaz a partir da planilha e segue em memória
+                _record(self.entry.parent, errors=1)
+                self._memory = self._rebuild()
+        return self._memory[(temporada, ciclo)]
+
+    def load_temporada(self, temporada: Optional[int] = None, ciclos: Optional[List[str]] = None) -> engine.PreparedData:
+        # Todos os ciclos de uma temporada (a mais recente, por padrão), ou só os pedidos, num único PreparedData
+        temporadas = self.temporadas()
+        if not temporadas: return engine.PreparedData(pd.DataFrame(), [], pd.DataFrame(), pd.DataFrame())
+        temporada = temporada if temporada is not None else temporadas[-1]
+        partes = [self.load(temporada, c) for c in self.ciclos(temporada) if ciclos is None or c in ciclos]
+        if not partes: raise KeyError(temporada)
+        concat = lambda name: pd.concat([getattr(p, name) for p in partes], ignore_index=True)
+        return engine.PreparedData(concat("data"), self.etapas_scores_cols, concat("periodos_df"), concat("etapas_pesos_df"), temporada)
+
+def _read_partition(path: Path, etapas_scores_cols: List[str], temporada: int) -> engine.PreparedData:
+    if not (path / "data.parquet").exists(): raise FileNotFoundError(path)
+    frames = {name: pd.read_parquet(path / f"{name}.parquet") if (path / f"{name}.parquet").exists() else pd.DataFrame()
+              for name in FRAMES}
+    return engine.PreparedData(frames["data"], etapas_scores_cols, frames["periodos_df"], frames["etapas_pesos_df"], temporada)
+
+def _read_entry(entry: Path) -> Optional[dict]:
+    meta_path = entry / "meta.json"
+    if not meta_path.exists(): return None
+    meta = json.loads(meta_path.read_text())
+    os.utime(entry)  # marca como usada recentemente para a limpeza
+    meta["particoes"] = [Partition(p["temporada"], p["ciclo"], p["subdir"], p["digests"]) for p in meta["particoes"]]
+    return meta
+
+def _write_entry(entry: Path, etapas_scores_cols: List[str], partes: Dict[Tuple[int, str], engine.PreparedData],
+                 particoes: List[Partition]):
+    # Escreve numa pasta temporária e renomeia: leitores nunca veem uma entrada pela metade
+    tmp = entry.with_name(f"{entry.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    try:
+        for p in particoes:
+            (tmp / p.subdir).mkdir(parents=True, exist_ok=True)
+            for name in FRAMES:
+                df = getattr(partes[(p.temporada, p.ciclo)], name)
+                if not df.empty: df.to_parquet(tmp / p.subdir / f"{name}.parquet", index=False)
+        (tmp / "meta.json").write_text(json.dumps({"etapas_scores_cols": list(etapas_scores_cols), "created": time.time(),
+                                                   "particoes": [p._asdict() for p in particoes]}, ensure_ascii=False))
+        os.replace(tmp, entry)
+    except OSError:
+        # Outro processo gravou a mesma entrada antes: basta descartar a nossa
+        if not (entry / "meta.json").exists(): raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _prune(cache_dir: Path, keep: int = MAX_ENTRIES):
+    entries = sorted((p for p in cache_dir.iterdir() if p.is_dir() and ".tmp-" not in p.name),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in entries[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+def parse_workbook(content: bytes) -> dict:
+    return circuito_ingest.read_workbook(content)
+
+def _prepare_partitions(content: bytes) -> Dict[Tuple[int, str], engine.PreparedData]:
+    return engine.split_partitions(engine.load_and_prepare_data(parse_workbook(content)))
+
+@timed("load_catalog")
+def load_catalog(content: bytes, cache_dir: Optional[Path] = None, digest: Optional[str] = None) -> Catalog:
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    key = cache_key(content, digest)
+    entry = cache_dir / key
+    rebuild = lambda: _prepare_partitions(content)
+    start = time.perf_counter()
+    try:
+        meta = _read_entry(entry)
+    except Exception:
+        meta = None
+        _record(cache_dir, errors=1)
+    if meta is not None:
+        _record(cache_dir, hits=1, last_key=key, last_load_s=time.perf_counter() - start)
+        return Catalog(key, entry, meta["etapas_scores_cols"], meta["particoes"], rebuild)
+
+    partes = rebuild()
+    etapas_scores_cols = next(iter(partes.values())).etapas_scores_cols if partes else []
+    particoes = [Partition(t, c, f"{t}/{i:02d}", partition_digests(p)) for i, ((t, c), p) in enumerate(partes.items())]
+    rebuild_s = time.perf_counter() - start
+    try:
+        _write_entry(entry, etapas_scores_cols, partes, particoes)
+        _prune(cache_dir)
+        catalog = Catalog(key, entry, etapas_scores_cols, particoes, rebuild)
+    except Exception:
+        # Sem pyarrow ou sem permissão de escrita: segue sem cache em disco, com as partições em memória
+        _record(cache_dir, errors=1)
+        catalog = Catalog(key, None, etapas_scores_cols, particoes, rebuild, memory=partes)
+    _record(cache_dir, misses=1, last_key=key, last_load_s=rebuild_s, last_rebuild_s=rebuild_s, total_rebuild_s=rebuild_s)
+    return catalog
+
+def load_prepared(content: bytes, cache_dir: Optional[Path] = None, digest: Optional[str] = None,
+                  temporada: Optional[int] = None) -> engine.PreparedData:
+    # Uma temporada inteira (a mais recente, por padrão), para exportação e benchmarks
+    return load_catalog(content, cache_dir, digest).load_temporada(temporada)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# circuito_campeonato.py — Classificação da temporada (Campeonato) a partir dos resultados de cada ciclo
+#
+# Cada ciclo vale pontos pela posição final da loja (PONTOS_POR_POSICAO, como
+# num campeonato de corrida; empates no Rank levam os mesmos pontos). Os
+# resultados de todos os ciclos saem do mesmo agrupamento que já calcula os
+# rankings (engine.compute_all_rankings): uma passada para a temporada, ou só
+# para os ciclos pedidos. A classificação acumulada, vitórias, pódios e a
+# variação de posição são derivados desses resultados, sem voltar aos dados
+# por loja. O circuito_store guarda os resultados por ciclo e recalcula só os
+# ciclos cuja partição mudou (em geral, apenas o ciclo corrente).
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import circuito_engine as engine
+
+PONTOS_POR_POSICAO = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+PODIO = 3
+RESULTADO_COLS = ['Loja', 'Nome_Exibicao', 'Rank', 'Pontos']
+
+class Campeonato(NamedTuple):
+    temporada: Optional[int]
+    ciclos: List[str]              # ciclos com resultado, na ordem da corrida
+    classificacao: pd.DataFrame    # uma linha por loja, da líder para a última
+    evolucao: pd.DataFrame         # (Ciclo, Loja, Nome_Exibicao): pontos acumulados e posição ao fim de cada ciclo
+
+# ----------------------------------------------------------------------
+# Resultados por ciclo
+# ----------------------------------------------------------------------
+def pontos(ranks) -> np.ndarray:
+    tabela = np.zeros(len(PONTOS_POR_POSICAO) + 2, dtype=int)
+    tabela[1:len(PONTOS_POR_POSICAO) + 1] = PONTOS_POR_POSICAO
+    return tabela[np.clip(np.asarray(ranks, dtype=int), 0, len(tabela) - 1)]
+
+def resultado_ciclo(df_final: pd.DataFrame) -> pd.DataFrame:
+    # Posição final e pontos de cada loja num ciclo (o df_final de um CicloRanking)
+    if df_final is None or df_final.empty: return pd.DataFrame(columns=RESULTADO_COLS)
+    resultado = df_final[['Loja', 'Nome_Exibicao', 'Rank']].reset_index(drop=True)
+    resultado['Pontos'] = pontos(resultado['Rank'])
+    return resultado
+
+def resultados_temporada(prepared: engine.PreparedData, hoje: Optional[datetime] = None,
+                         ciclos: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    # Um único agrupamento para todos os ciclos pedidos (os rankings por ciclo)
+    rankings = engine.compute_all_rankings(prepared, hoje, ciclos)
+    return {ciclo: resultado_ciclo(r.df_final) for ciclo, r in rankings.items()}
+
+# ----------------------------------------------------------------------
+# Classificação acumulada
+# ----------------------------------------------------------------------
+def compute_campeonato(temporada: Optional[int], resultados: Dict[str, pd.DataFrame], ordem: List[str]) -> Campeonato:
+    ciclos = [c for c in ordem if c in resultados and not resultados[c].empty]
+    if not ciclos: return Campeonato(temporada, [], pd.DataFrame(), pd.DataFrame())
+    longo = pd.concat([resultados[c] for c in ciclos], ignore_index=True)
+    # Matrizes loja x ciclo a partir dos códigos de grupo (como os agrupamentos do engine), sem pivot:
+    # pontos (0 para quem não correu o ciclo) e posição no ciclo (NaN para quem não correu)
+    grupos = longo.groupby(['Loja', 'Nome_Exibicao'], sort=False)
+    linha = grupos.ngroup().to_numpy()
+    coluna = np.repeat(np.arange(len(ciclos)), [len(resultados[c]) for c in ciclos])
+    lojas = pd.MultiIndex.from_frame(longo.loc[~grupos.cumcount().astype(bool).to_numpy(), ['Loja', 'Nome_Exibicao']])
+    pts = np.zeros((len(lojas), len(ciclos)), dtype=int)
+    np.add.at(pts, (linha, coluna), longo['Pontos'].to_numpy())
+    rnk = np.full(pts.shape, np.inf)
+    np.minimum.at(rnk, (linha, coluna), longo['Rank'].to_numpy(dtype=float))
+    rnk[np.isinf(rnk)] = np.nan
+    colunas = pd.Index(ciclos, name='Ciclo')
+    por_ciclo = pd.DataFrame(pts, index=lojas, columns=colunas)
+    rank = pd.DataFrame(rnk, index=lojas, columns=colunas)
+    acumulado = por_ciclo.cumsum(axis=1)
+    # Posição no campeonato ao fim de cada ciclo: empates em pontos dividem a posição
+    posicao = acumulado.rank(axis=0, method='min', ascending=False).astype(int)
+
+    ultimo = ciclos[-1]
+    classificacao = pd.DataFrame({
+        'Posicao': posicao[ultimo],
+        'Pontos': acumulado[ultimo],
+        'Vitorias': (rank == 1).sum(axis=1),
+        'Podios': (rank <= PODIO).sum(axis=1),
+        'Melhor_Posicao': rank.min(axis=1),
+        'Ciclos': rank.notna().sum(axis=1),
+        # Posições ganhas (+) ou perdidas (-) com o último ciclo
+        'Movimento': (posicao[ciclos[-2]] - posicao[ultimo]) if len(ciclos) > 1 else 0,
+    }).join(por_ciclo).reset_index()
+    classificacao.sort_values(['Posicao', 'Vitorias', 'Podios', 'Nome_Exibicao'], ascending=[True, False, False, True],
+                              inplace=True, ignore_index=True)
+    classificacao['Melhor_Posicao'] = classificacao['Melhor_Posicao'].astype('Int64')
+
+    evolucao = pd.concat({'Pontos_Acumulados': acumulado.stack(), 'Posicao': posicao.stack()}, axis=1).reset_index()
+    evolucao['Ciclo'] = pd.Categorical(evolucao['Ciclo'], categories=ciclos, ordered=True)
+    evolucao.sort_values(['Ciclo', 'Posicao', 'Nome_Exibicao'], inplace=True, ignore_index=True)
+    return Campeonato(temporada, ciclos, classificacao, evolucao)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# circuito_charts.py — Gráficos Plotly do Circuito (sem Streamlit)
+#
+# A pista é desenhada com um número fixo de traces, qualquer que seja o
+# número de lojas: faixas (um Bar), bandeira quadriculada (um Heatmap) e
+# carros (um Scatter). Para redes grandes, select_lanes mostra só uma janela
+# do ranking (ex.: top N) mais a loja em destaque. O replay reaproveita a
+# mesma pista e acrescenta um frame por Periodo que só move os carros, então
+# a animação roda inteira no navegador.
+
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from circuito_engine import format_hours_and_minutes
+from circuito_metrics import timed
+
+PISTA_MAX_LANES = 30
+RANK_COLORS = {1: "#facc15", 2: "#e5e7eb", 3: "#f59e0b"}
+CAR_COLOR = "#6EE7B7"
+DESTAQUE_COLOR = "#EF4444"
+
+# ----------------------------------------------------------------------
+# Janela de faixas
+# ----------------------------------------------------------------------
+def select_lanes(data: pd.DataFrame, max_lanes: int = PISTA_MAX_LANES, destaque: Optional[str] = None, page: int = 0) -> pd.DataFrame:
+    # Mantém a ordem do ranking; a loja em destaque entra no fim se estiver fora da janela
+    if data is None or data.empty or len(data) <= max_lanes: return data
+    start = max(0, page) * max_lanes
+    window = data.iloc[start:start + max_lanes]
+    if destaque and not (window["Nome_Exibicao"] == destaque).any():
+        window = pd.concat([window, data[data["Nome_Exibicao"] == destaque].head(1)])
+    return window.reset_index(drop=True)
+
+# ----------------------------------------------------------------------
+# Pista de corrida
+# ----------------------------------------------------------------------
+CARS_TRACE = 2  # índice do trace dos carros (depois das faixas e da bandeira)
+
+def _rank_colors(ranks) -> list:
+    return [RANK_COLORS.get(int(r), CAR_COLOR) for r in ranks]
+
+@timed("build_pista_fig")
+def build_pista_fig(data: pd.DataFrame, duracao_total_horas: float, destaque: Optional[str] = None) -> go.Figure:
+    if data is None or data.empty: return go.Figure()
+    n = len(data)
+    lanes = np.arange(n)
+    posicao = data['Posicao_Horas'].to_numpy(dtype=float)
+    limite_eixo = max(duracao_total_horas, float(np.nanmax(posicao)) if n else 0)
+    fig = go.Figure()
+
+    # Faixas da pista: uma barra por loja, todas no mesmo trace
+    fig.add_trace(go.Bar(
+        x=np.full(n, limite_eixo), y=lanes, base=0, orientation='h', width=1.0,
+        marker=dict(color="#2C3E50", line=dict(color='rgba(255, 255, 255, 0.1)', width=1.5)),
+        hoverinfo='skip', showlegend=False
+    ))
+
+    # Bandeira de chegada: quadriculado 2 colunas x N linhas num único heatmap
+    square_size = max(0.5, duracao_total_horas / 40)
+    num_rows, num_cols = math.ceil((n + 0.5) / square_size), 2
+    checker = (np.add.outer(np.arange(num_rows), np.arange(num_cols)) % 2 == 0).astype(int)
+    fig.add_trace(go.Heatmap(
+        z=checker, x0=duracao_total_horas + square_size / 2, dx=square_size, y0=-0.5 + square_size / 2, dy=square_size,
+        colorscale=[[0, "black"], [1, "white"]], zmin=0, zmax=1, showscale=False, hoverinfo='skip'
+    ))
+
+    # Linha de partida
+    fig.add_shape(type="line", x0=0, y0=-0.5, x1=0, y1=n-0.5, line=dict(color="#10B981", width=4, dash="solid"), layer="above")
+
+    # Carros: marcadores coloridos pelo pódio, nome da loja e hover num único trace
+    ranks = data['Rank'].to_numpy()
+    nomes = data['Nome_Exibicao'].astype(str).to_numpy()
+    cores = _rank_colors(ranks)
+    is_destaque = nomes == destaque if destaque else np.zeros(n, dtype=bool)
+    hover_texts = [
+        f"<b>{nome}</b><br>Avanço: {pos:.2f}h<br>Progresso: {prog:.1f}%<br>Impulso: {format_hours_and_minutes(boost / 60)}<br>Faltam: {format_hours_and_minutes(falta)}<br>Rank: #{rank}"
+        for nome, pos, prog, boost, falta, rank in zip(nomes, posicao, data['Progresso'], data['Boost_Total_Min'], data['Tempo_Faltante_Horas'], ranks)
+    ]
+    fig.add_trace(go.Scatter(
+        x=posicao, y=lanes, mode='markers+text', text=nomes, textposition="top center",
+        textfont=dict(color='white', size=10),
+        marker=dict(symbol='triangle-right', size=np.where(is_destaque, 24, 18), color=cores,
+                    line=dict(color=np.where(is_destaque, DESTAQUE_COLOR, "#111827").tolist(), width=np.where(is_destaque, 3, 1))),
+        hoverinfo='text', hovertext=hover_texts, showlegend=False
+    ))
+
+    # Configuração dos eixos e layout
+    fig.update_xaxes(
+        range=[-limite_eixo*0.02, limite_eixo * 1.05],
+        title_text="Avanço na Pista (dias/horas) →",
+        fixedrange=True,
+        tick0=0,
+        dtick=1,
+        showgrid=False
+    )
+    fig.update_yaxes(
+        range=[-0.5, n - 0.5],
+        showgrid=False,
+        zeroline=False,
+        tickvals=list(range(n)),
+        ticktext=[],
+        fixedrange=True
+    )
+
+    fig.update_layout(
+        height=max(600, 300 + 60*n),
+        margin=dict(l=10, r=10, t=80, b=40),
+        plot_bgcolor="#1A2A3A",
+        paper_bgcolor="rgba(26,42,58,0.7)",
+        bargap=0
+    )
+
+    return fig
+
+def warm_up():
+    # A primeira figura do processo paga a carga dos validadores do plotly (~0,3 s); o aquecimento
+    # (circuito_warmup) a antecipa com um trace de cada tipo usado nos gráficos
+    go.Figure([go.Bar(), go.Heatmap(), go.Scatter(), go.Scatterpolar()]).to_json()
+
+# ----------------------------------------------------------------------
+# Radar de desempenho por etapa (Visão por Loja e relatório em PDF)
+# ----------------------------------------------------------------------
+
+def build_radar_fig(df_melhoria: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+
+    # Camada 1: Desempenho Atual (área preenchida)
+    fig.add_trace(go.Scatterpolar(
+        r=df_melhoria['Impulso Atual'],
+        theta=df_melhoria['Etapa'],
+        fill='toself',
+        fillcolor='rgba(0, 176, 246, 0.4)',
+        line=dict(color='rgba(0, 176, 246, 1)', width=2),
+        name='Impulso Atual (minutos)'
+    ))
+
+    # Layout adaptativo com EIXO RADIAL VISÍVEL
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(x=0.5, y=-0.15, xanchor="center", orientation="h"),
+        polar=dict(
+            # Configuração do eixo radial (notas) para ser visível
+            radialaxis=dict(
+                visible=True,
+                showticklabels=True,
+                range=[0, df_melhoria['Impulso Máximo'].max()],
+                gridcolor="rgba(128, 128, 128, 0.3)" # Cor neutra para a grade
+            ),
+            # Configuração do eixo angular (etapas)
+            angularaxis=dict(
+                linewidth=1,
+                gridcolor="rgba(128, 128, 128, 0.3)" # Cor neutra para a grade
+            )
+        ),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=60, r=60, t=80, b=60),
+        height=450
+    )
+    return fig
+
+# ----------------------------------------------------------------------
+# Replay por Periodo
+# ----------------------------------------------------------------------
+@timed("build_replay_fig")
+def build_replay_fig(data: pd.DataFrame, replay: pd.DataFrame, duracao_total_horas: float, destaque: Optional[str] = None,
+                     frame_ms: int = 800) -> go.Figure:
+    # data: lojas da pista (janela do ranking final); replay: posições acumuladas por Periodo do ciclo.
+    # Cada frame traz só x, hover e cor dos carros dessas faixas — o tamanho é faixas x períodos.
+    fig = build_pista_fig(data, duracao_total_horas, destaque)
+    if data is None or data.empty or replay is None or replay.empty: return fig
+    periodos = replay['Periodo'].drop_duplicates().tolist()
+    faixas = pd.MultiIndex.from_frame(data[['Loja', 'Nome_Exibicao']])
+    por_periodo = replay.set_index(['Periodo', 'Loja', 'Nome_Exibicao'])
+    nomes = data['Nome_Exibicao'].astype(str).to_numpy()
+    frames = []
+    for periodo in periodos:
+        atual = por_periodo.loc[periodo].reindex(faixas)
+        posicao = atual['Posicao_Horas'].to_numpy(dtype=float).round(3)
+        ranks = atual['Rank'].fillna(0).astype(int).to_numpy()
+        hover = [f"<b>{nome}</b><br>{periodo}<br>Avanço: {pos:.2f}h<br>Rank: #{rank}" for nome, pos, rank in zip(nomes, posicao, ranks)]
+        frames.append(go.Frame(name=periodo, traces=[CARS_TRACE],
+                               data=[go.Scatter(x=posicao, hovertext=hover, marker=dict(color=_rank_colors(ranks)))]))
+    fig.frames = frames
+    # A figura abre na posição final; Play reproduz do primeiro ao último período
+    anim = dict(frame=dict(duration=frame_ms, redraw=False), transition=dict(duration=frame_ms // 2, easing="linear"), mode="immediate")
+    fig.update_layout(
+        updatemenus=[dict(type="buttons", direction="left", x=0, y=1.08, xanchor="left", yanchor="bottom", showactive=False, buttons=[
+            dict(label="▶ Replay", method="animate", args=[None, dict(anim, fromcurrent=False)]),
+            dict(label="❚❚ Pausar", method="animate", args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+        ])],
+        sliders=[dict(active=len(periodos) - 1, x=0.2, len=0.8, y=1.08, yanchor="bottom", currentvalue=dict(prefix="Período: "),
+                      steps=[dict(label=p, method="animate", args=[[p], anim]) for p in periodos])],
+    )
+    return fig
+
+# ----------------------------------------------------------------------
+# Campeonato da temporada
+# ----------------------------------------------------------------------
+CAMPEONATO_TOP = 10
+
+@timed("build_campeonato_fig")
+def build_campeonato_fig(evolucao: pd.DataFrame, lojas: list, destaque: Optional[str] = None) -> go.Figure:
+    # Posição no campeonato ao fim de cada ciclo (1º no topo), uma linha por loja pedida
+    # (as primeiras da classificação e, se houver, a loja em destaque)
+    fig = go.Figure()
+    if evolucao is None or evolucao.empty: return fig
+    por_loja = dict(tuple(evolucao[evolucao['Nome_Exibicao'].isin(lojas)].groupby('Nome_Exibicao', sort=False)))
+    for i, nome in enumerate(lojas):
+        linha = por_loja.get(nome)
+        if linha is None: continue
+        cor = DESTAQUE_COLOR if nome == destaque else RANK_COLORS.get(i + 1)
+        hover = [f"<b>{nome}</b><br>{ciclo}<br>Posição: {pos}º<br>Pontos: {pts}"
+                 for ciclo, pos, pts in zip(linha['Ciclo'].astype(str), linha['Posicao'], linha['Pontos_Acumulados'])]
+        fig.add_trace(go.Scatter(
+            x=linha['Ciclo'].astype(str), y=linha['Posicao'], mode='lines+markers', name=str(nome),
+            line=dict(color=cor, width=4 if cor else 2), marker=dict(size=9), hoverinfo='text', hovertext=hover
+        ))
+    fig.update_yaxes(autorange="reversed", title_text="Posição no campeonato", dtick=1, gridcolor="rgba(128, 128, 128, 0.3)")
+    fig.update_xaxes(type="category", showgrid=False)
+    fig.update_layout(
+        height=450,
+        legend=dict(orientation="h", y=-0.15),
+        margin=dict(l=10, r=10, t=20, b=40),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font_color="white"
+    )
+    return fig
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+# circuito_engine.py — Motor de pontuação do Circuito MiniPreço (sem Streamlit)
+#
+# Pode ser importado por jobs em lote, benchmarks e pela própria aplicação
+# Streamlit sem configurar página, injetar CSS ou baixar a planilha.
+
+import calendar
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from circuito_metrics import timed
+
+logger = logging.getLogger("circuito.engine")
+
+# ----------------------------------------------------------------------
+# Constantes Globais
+# ----------------------------------------------------------------------
+MONTH_MAP = {
+    'Janeiro': 1, 'Fevereiro': 2, 'Março': 3, 'Abril': 4, 'Maio': 5, 'Junho': 6,
+    'Julho': 7, 'Agosto': 8, 'Setembro': 9, 'Outubro': 10, 'Novembro': 11, 'Dezembro': 12
+}
+
+ETAPA_SHEETS = [
+    "PlanoVoo", "ProjetoFast", "PontoPartida", "AcoesComerciais", "PainelVendas",
+    "Engajamento", "VisualMerchandising", "ModeloAtendimento", "EvolucaoComercial",
+    "Qualidade", "Meta"
+]
+MONTHLY_ETAPAS = ["Engajamento", "VisualMerchandising", "Meta"]
+JOKER_ETAPAS = ["Meta"]
+
+# Representação compacta dos dados preparados: Nome_Exibicao, Ciclo e Periodo como categorias
+# (códigos inteiros; Ciclo na ordem dos meses); Loja já é o loja_key inteiro. As notas ficam em
+# float64 nos dois modos: em float32 somas de notas fracionárias que deveriam empatar no Rank
+# passam a diferir na última casa. Os agrupamentos rodam sobre os códigos; CIRCUITO_COMPACT=0
+# volta às colunas de texto.
+COMPACT = os.environ.get("CIRCUITO_COMPACT", "1") != "0"
+
+# ----------------------------------------------------------------------
+# Resultados tipados
+# ----------------------------------------------------------------------
+class PreparedData(NamedTuple):
+    data: pd.DataFrame
+    etapas_scores_cols: List[str]
+    periodos_df: pd.DataFrame
+    etapas_pesos_df: pd.DataFrame
+    temporada: Optional[int] = None   # definido quando os quadros já são de uma única temporada
+
+class CicloRanking(NamedTuple):
+    df_final: pd.DataFrame
+    duracao_horas: float
+    baseline_horas: float
+
+# ----------------------------------------------------------------------
+# Funções Utilitárias
+# ----------------------------------------------------------------------
+def format_hours_and_minutes(hours_float: float):
+    if pd.isna(hours_float): return "N/A"
+    if hours_float < 0: return "Finalizou!"
+    hours = math.floor(hours_float)
+    minutes = round((hours_float - hours) * 60)
+    return f"{hours}h {minutes:02d}min"
+
+def format_hours_and_minutes_series(hours) -> pd.Series:
+    # Versão vetorizada de format_hours_and_minutes: formata a coluna inteira de uma vez
+    values = pd.Series(hours).astype(float)
+    horas = np.floor(values)
+    minutos = ((values - horas) * 60).round()
+    texto = (horas.fillna(0).astype('int64').astype(str) + "h "
+             + minutos.fillna(0).astype('int64').astype(str).str.zfill(2) + "min")
+    texto = texto.astype(object)
+    texto[values < 0] = "Finalizou!"
+    texto[values.isna()] = "N/A"
+    return texto
+
+def get_race_duration_hours(ciclo: str, temporada: Optional[int] = None):
+    # Um dia de pista por dia do mês, no ano da temporada (Fevereiro de ano bissexto tem 29)
+    if ciclo not in MONTH_MAP: return 30
+    return calendar.monthrange(temporada or datetime.now().year, MONTH_MAP[ciclo])[1]
+
+def plain(col: pd.Series) -> pd.Series:
+    # Categoria -> valores originais; usado nos resultados agregados, que são pequenos
+    return col.astype(col.cat.categories.dtype) if isinstance(col.dtype, pd.CategoricalDtype) else col
+
+def _plain_keys(df: pd.DataFrame, cols) -> pd.DataFrame:
+    return df.assign(**{c: plain(df[c]) for c in cols if c in df.columns})
+
+def _key_codes(df: pd.DataFrame, keys: list) -> list:
+    # Chaves de agrupamento como inteiros: o código da categoria (-1 = NaN) ou a própria coluna
+    return [df[k].cat.codes.rename(k) if isinstance(df[k].dtype, pd.CategoricalDtype) else df[k] for k in keys]
+
+def _decode_keys(result: pd.DataFrame, df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    # Volta dos códigos para os valores; grupos com chave NaN saem, como no groupby comum
+    cats = {k: df[k].cat.categories for k in keys if isinstance(df[k].dtype, pd.CategoricalDtype)}
+    if not cats: return result
+    validos = np.logical_and.reduce([result[k].to_numpy() >= 0 for k in cats])
+    result = result[validos].reset_index(drop=True)
+    return result.assign(**{k: c.take(result[k].to_numpy()) for k, c in cats.items()})
+
+# ----------------------------------------------------------------------
+# Processamento
+# ----------------------------------------------------------------------
+ID_COLS = ['Loja', 'Nome_Exibicao', 'Temporada', 'Ciclo', 'Periodo']
+REQUIRED_SHEET_COLS = ['NomeLoja', 'loja_key', 'Nota', 'Ciclo', 'Período']
+ETAPA_SCORE_COLS = [f'{s}_Score' for s in ETAPA_SHEETS]
+
+def _temporada(df_raw: pd.DataFrame, stripped: dict) -> pd.Series:
+    # Temporada (ano) de cada linha: coluna Temporada, se a planilha tiver; senão o ano da Data Início.
+    # Linhas sem nenhum dos dois ficam NaN e são resolvidas em _infer_temporada.
+    if 'Temporada' in stripped:
+        return pd.to_numeric(df_raw[stripped['Temporada']], errors='coerce')
+    if 'Data Início' in stripped:
+        return pd.to_datetime(df_raw[stripped['Data Início']], errors='coerce').dt.year
+    return pd.Series(np.nan, index=df_raw.index)
+
+def _moda(s: pd.Series):
+    return s.mode().iloc[0] if s.notna().any() else np.nan
+
+def _infer_temporada(df_long: pd.DataFrame) -> pd.DataFrame:
+    # Linha sem ano (ex.: Data Início em branco) herda a temporada do mesmo (Ciclo, Período) na aba,
+    # depois do mesmo (Ciclo, Período) nas outras abas e, por fim, a mais comum da aba. Se nada
+    # resolver, a linha sai com um aviso em vez de abrir uma temporada que não existe.
+    ano = df_long['Temporada']
+    if ano.isna().all():
+        # Nenhuma aba traz ano: planilha de uma temporada só, a corrente
+        return df_long.assign(Temporada=np.int16(datetime.now().year))
+    for chaves in (['Etapa', 'Ciclo', 'Periodo'], ['Ciclo', 'Periodo'], ['Etapa']):
+        if not ano.isna().any(): break
+        ano = ano.fillna(ano.groupby([df_long[c] for c in chaves], observed=True).transform(_moda))
+    sem_ano = ano.isna()
+    if sem_ano.any():
+        descartadas = df_long.loc[sem_ano, ['Etapa', 'Ciclo', 'Periodo']].astype(str).drop_duplicates()
+        logger.warning("%d linha(s) sem Temporada/Data Início descartadas: %s", int(sem_ano.sum()),
+                       ", ".join(" / ".join(r) for r in descartadas.itertuples(index=False)))
+        df_long, ano = df_long[~sem_ano].reset_index(drop=True), ano[~sem_ano].reset_index(drop=True)
+    return df_long.assign(Temporada=ano.astype('int16'))
+
+def _normalize_etapa_sheet(df_raw: pd.DataFrame, sheet_name: str):
+    # Só as colunas usadas são copiadas; as demais da planilha são ignoradas
+    stripped = {c.strip(): c for c in df_raw.columns}
+    if not all(col in stripped for col in REQUIRED_SHEET_COLS): return None
+    has_peso = 'PesoDaEtapa' in stripped
+    df_long = pd.DataFrame({
+        'Loja': df_raw[stripped['loja_key']],
+        'Nome_Exibicao': df_raw[stripped['NomeLoja']],
+        'Temporada': _temporada(df_raw, stripped),
+        'Ciclo': df_raw[stripped['Ciclo']].astype(str),
+        'Periodo': df_raw[stripped['Período']].astype(str),
+    })
+    df_long['Etapa'] = pd.Categorical.from_codes([ETAPA_SHEETS.index(sheet_name)] * len(df_long), categories=ETAPA_SCORE_COLS)
+    score = pd.to_numeric(df_raw[stripped['Nota']], errors='coerce').fillna(0.0)
+    peso = pd.to_numeric(df_raw[stripped['PesoDaEtapa']], errors='coerce') if has_peso else None
+    df_long['Score'] = score * peso.fillna(0.0) if has_peso else score
+    # PesoMaximo só conta para etapas com peso e que não são coringa
+    tem_peso = has_peso and sheet_name not in JOKER_ETAPAS
+    df_long['Peso'] = peso if tem_peso else float('nan')
+    df_long['Tem_Peso'] = tem_peso
+    return df_long
+
+def _encode_keys(df_long: pd.DataFrame) -> pd.DataFrame:
+    # Ciclos fora do MONTH_MAP (grafia diferente) vão para o fim, em vez de virar NaN
+    ciclos = df_long['Ciclo']
+    extras = sorted(set(ciclos.dropna().unique()) - set(MONTH_MAP))
+    return df_long.assign(
+        Nome_Exibicao=df_long['Nome_Exibicao'].astype('category'),
+        Ciclo=pd.Categorical(ciclos, categories=list(MONTH_MAP) + extras, ordered=True),
+        Periodo=df_long['Periodo'].astype('category'))
+
+def _pivot_etapas(df_long: pd.DataFrame, etapas: list):
+    # Cada linha (Loja, Nome, Ciclo, Periodo) vira um código ordenado e cada etapa uma coluna;
+    # as notas são espalhadas numa matriz de uma só vez. Retorna None se houver chaves repetidas.
+    row_codes = df_long.groupby(ID_COLS, sort=True, dropna=False, observed=True).ngroup().to_numpy()
+    etapa_pos = np.array([ETAPA_SCORE_COLS.index(e) for e in etapas])
+    col_lookup = np.full(len(ETAPA_SCORE_COLS), -1)
+    col_lookup[etapa_pos] = np.arange(len(etapas))
+    col_codes = col_lookup[df_long['Etapa'].cat.codes.to_numpy()]
+    n_rows, n_cols = (row_codes.max() + 1 if len(row_codes) else 0), len(etapas)
+    flat = row_codes * n_cols + col_codes
+    if len(flat) and np.bincount(flat).max() > 1: return None
+    scores = np.full(n_rows * n_cols, np.nan)
+    scores[flat] = df_long['Score'].to_numpy(dtype=float)
+    first = np.empty(n_rows, dtype=np.int64)
+    first[row_codes[::-1]] = np.arange(len(row_codes))[::-1]
+    df_wide = df_long[ID_COLS].iloc[first].reset_index(drop=True)
+    return pd.concat([df_wide, pd.DataFrame(scores.reshape(n_rows, n_cols), columns=etapas)], axis=1)
+
+def _merge_etapas_legacy(df_long: pd.DataFrame, etapas: list) -> pd.DataFrame:
+    # Caminho antigo (merge outer por etapa): só usado quando alguma planilha tem chaves repetidas,
+    # pois o produto cartesiano do merge não é reproduzível com um pivot.
+    df_merged = pd.DataFrame(columns=ID_COLS)
+    for etapa in etapas:
+        df = df_long.loc[df_long['Etapa'] == etapa, ID_COLS + ['Score']].rename(columns={'Score': etapa})
+        df_merged = pd.merge(df_merged, df, on=ID_COLS, how='outer')
+    return df_merged
+
+@timed("prepare_data")
+def load_and_prepare_data(all_sheets: dict) -> PreparedData:
+    # 1) Empilha todas as etapas em formato longo (Loja, Ciclo, Periodo, Etapa, Score)
+    long_frames, etapas = [], []
+    for sheet_name in ETAPA_SHEETS:
+        if sheet_name in all_sheets:
+            try:
+                df_long = _normalize_etapa_sheet(all_sheets[sheet_name], sheet_name)
+            except Exception: continue
+            if df_long is None: continue
+            long_frames.append(df_long)
+            etapas.append(f'{sheet_name}_Score')
+    if not long_frames: return PreparedData(pd.DataFrame(), [], pd.DataFrame(), pd.DataFrame())
+    df_long = _infer_temporada(pd.concat(long_frames, ignore_index=True))
+    if COMPACT: df_long = _encode_keys(df_long)
+
+    # 2) Pivot único para o formato largo (uma coluna <Etapa>_Score por etapa)
+    df_merged = _pivot_etapas(df_long, etapas)
+    if df_merged is None: df_merged = _merge_etapas_legacy(df_long, etapas)
+    month_order = list(MONTH_MAP.keys())
+    df_merged['Ciclo_Cat'] = pd.Categorical(df_merged['Ciclo'], categories=month_order, ordered=True)
+    df_merged.sort_values(['Temporada','Ciclo_Cat','Periodo','Nome_Exibicao'], inplace=True, ignore_index=True)
+
+    # 3) Etapas mensais: vale a maior nota do ciclo (um único groupby para todas)
+    monthly_cols = [f"{etapa}_Score" for etapa in MONTHLY_ETAPAS if f"{etapa}_Score" in df_merged.columns]
+    if monthly_cols:
+        df_merged[monthly_cols] = df_merged.groupby(_key_codes(df_merged, ['Loja', 'Temporada', 'Ciclo']))[monthly_cols].transform('max')
+    etapas_scores_cols = [c for c in df_merged.columns if c.endswith('_Score')]
+    periodos_df = (df_merged[["Temporada","Ciclo","Periodo","Ciclo_Cat"]].drop_duplicates()
+                   .sort_values(["Temporada","Ciclo_Cat","Periodo"]).reset_index(drop=True))
+    periodos_df = _plain_keys(periodos_df, ["Ciclo", "Periodo"])
+
+    # 4) Peso máximo por (Etapa, Ciclo, Periodo), na ordem das etapas
+    df_pesos = df_long[df_long['Tem_Peso']]
+    if df_pesos.empty:
+        etapas_pesos_df = pd.DataFrame()
+    else:
+        etapas_pesos_df = (df_pesos.groupby(['Etapa', 'Temporada', 'Ciclo', 'Periodo'], observed=True)['Peso'].sum()
+                           .astype(float).rename('PesoMaximo').reset_index())
+        etapas_pesos_df = _plain_keys(etapas_pesos_df.assign(Etapa=etapas_pesos_df['Etapa'].astype(str)), ['Ciclo', 'Periodo'])
+    return PreparedData(df_merged, etapas_scores_cols, periodos_df, etapas_pesos_df)
+
+@timed("final_scores")
+def calculate_final_scores(df: pd.DataFrame, etapas_scores_cols: list, duracao_total_horas, baseline_horas, group_col: Optional[str] = None):
+    # duracao_total_horas / baseline_horas podem ser escalares (um ciclo) ou Series alinhadas ao df
+    # (vários ciclos); com group_col o Rank é calculado dentro de cada grupo.
+    df_copy = df.copy()
+    for e in etapas_scores_cols:
+        if e not in df_copy.columns: df_copy[e] = 0.0
+    score_cols_sem_coringa = [c for c in etapas_scores_cols if not any(joker in c for joker in JOKER_ETAPAS)]
+    df_copy["Boost_Total_Min"] = df_copy[score_cols_sem_coringa].sum(axis=1)
+    df_copy["Posicao_Horas"] = baseline_horas + (df_copy["Boost_Total_Min"] / 60.0)
+    if not np.isscalar(duracao_total_horas):
+        df_copy["Progresso"] = np.where(duracao_total_horas > 0, (df_copy["Posicao_Horas"] / duracao_total_horas) * 100.0, 0.0)
+    elif duracao_total_horas > 0:
+        df_copy["Progresso"] = (df_copy["Posicao_Horas"] / duracao_total_horas) * 100.0
+    else:
+        df_copy["Progresso"] = 0.0
+    df_copy["Tempo_Faltante_Horas"] = duracao_total_horas - df_copy["Posicao_Horas"]
+    posicao = df_copy.groupby(group_col)["Posicao_Horas"] if group_col else df_copy["Posicao_Horas"]
+    df_copy["Rank"] = posicao.rank(method="dense", ascending=False).astype(int)
+    sort_cols, ascending = ["Posicao_Horas","Nome_Exibicao"], [False,True]
+    if group_col: sort_cols, ascending = [group_col] + sort_cols, [True] + ascending
+    df_copy.sort_values(sort_cols, ascending=ascending, inplace=True, ignore_index=True)
+    return df_copy
+
+def get_baseline_horas(ciclo: str, hoje: Optional[datetime] = None, temporada: Optional[int] = None):
+    # Avanço base: no ciclo do mês corrente (da temporada corrente), cada dia já corrido vale uma hora de pista
+    hoje = hoje or datetime.now()
+    if MONTH_MAP.get(ciclo) == hoje.month and (temporada or hoje.year) == hoje.year:
+        return hoje.day
+    return 0
+
+# ----------------------------------------------------------------------
+# Temporadas e partições (Temporada, Ciclo)
+# ----------------------------------------------------------------------
+def temporadas(prepared: PreparedData) -> List[int]:
+    if prepared.temporada is not None: return [prepared.temporada]
+    if prepared.periodos_df.empty or 'Temporada' not in prepared.periodos_df.columns: return []
+    return sorted(int(t) for t in prepared.periodos_df['Temporada'].unique())
+
+def select_temporada(prepared: PreparedData, temporada: Optional[int] = None) -> PreparedData:
+    # Rankings e replay são sempre de uma temporada: sem temporada pedida, a mais recente
+    if prepared.temporada is not None or 'Temporada' not in prepared.data.columns: return prepared
+    disponiveis = temporadas(prepared)
+    if not disponiveis: return prepared
+    temporada = temporada if temporada is not None else disponiveis[-1]
+    filtra = lambda df: df[df['Temporada'] == temporada].reset_index(drop=True) if 'Temporada' in df.columns else df
+    return PreparedData(filtra(prepared.data), prepared.etapas_scores_cols, filtra(prepared.periodos_df),
+                        filtra(prepared.etapas_pesos_df), temporada)
+
+def split_partitions(prepared: PreparedData) -> Dict[Tuple[int, str], PreparedData]:
+    # Uma partição por (Temporada, Ciclo), na ordem da corrida; cada uma é um PreparedData completo.
+    # Um groupby por quadro (sobre os códigos das categorias) em vez de um filtro por partição.
+    if prepared.data.empty: return {}
+    def particiona(df):
+        if df.empty: return lambda t, c: df
+        indices = df.groupby(_key_codes(df, ['Temporada', 'Ciclo']), sort=False).indices
+        categorico = isinstance(df['Ciclo'].dtype, pd.CategoricalDtype)
+        return lambda t, c: df.iloc[indices.get((t, df['Ciclo'].cat.categories.get_loc(c) if categorico else c), [])].reset_index(drop=True)
+    data, periodos, pesos = particiona(prepared.data), particiona(prepared.periodos_df), particiona(prepared.etapas_pesos_df)
+    return {(int(t), c): PreparedData(data(t, c), prepared.etapas_scores_cols, periodos(t, c), pesos(t, c), int(t))
+            for t, c in prepared.periodos_df[['Temporada', 'Ciclo']].drop_duplicates().itertuples(index=False)}
+
+def filter_and_aggregate_data(data_original: pd.DataFrame, etapas_scores_cols: list, ciclo: str, hoje: Optional[datetime] = None,
+                              temporada: Optional[int] = None) -> CicloRanking:
+    if not ciclo: return CicloRanking(pd.DataFrame(), 0, 0)
+    if 'Temporada' in data_original.columns and not data_original.empty:
+        temporada = temporada if temporada is not None else int(data_original['Temporada'].max())
+        data_original = data_original[data_original['Temporada'] == temporada]
+    df = data_original[data_original["Ciclo"] == str(ciclo)].copy()
+    if df.empty: return CicloRanking(pd.DataFrame(), 0, 0)
+    score_cols = [c for c in etapas_scores_cols if c in df.columns]
+    if not score_cols: return CicloRanking(pd.DataFrame(), 0, 0)
+    id_vars = ['Loja', 'Nome_Exibicao']
+    aggregated = _aggregate(df, id_vars, score_cols)
+    baseline_horas = get_baseline_horas(ciclo, hoje, temporada)
+    duracao_horas = get_race_duration_hours(ciclo, temporada)
+    final_df = calculate_final_scores(aggregated, etapas_scores_cols, duracao_horas, baseline_horas)
+    return CicloRanking(final_df, duracao_horas, baseline_horas)
+
+def _aggregate(df: pd.DataFrame, keys: list, score_cols: list) -> pd.DataFrame:
+    # Soma por chave sobre os códigos das categorias; a saída volta a texto e float64,
+    # então rankings, tabelas e a API não dependem do modo de armazenamento
+    aggregated = df[score_cols].groupby(_key_codes(df, keys)).sum(min_count=0).reset_index()
+    return _decode_keys(aggregated, df, keys).astype({c: np.float64 for c in score_cols})
+
+@timed("all_rankings")
+def compute_all_rankings(prepared: PreparedData, hoje: Optional[datetime] = None, ciclos: Optional[List[str]] = None) -> Dict[str, CicloRanking]:
+    # Um único groupby para todos os ciclos; o resultado é particionado por Ciclo,
+    # então trocar de ciclo na interface é só uma consulta ao dicionário.
+    # Com ciclos, só esses são recalculados (atualização incremental do circuito_store).
+    # Os ciclos são de uma temporada: a do PreparedData ou, se ele tiver várias, a mais recente.
+    prepared = select_temporada(prepared)
+    data, etapas_scores_cols, temporada = prepared.data, prepared.etapas_scores_cols, prepared.temporada
+    if data.empty or prepared.periodos_df.empty: return {}
+    if ciclos is not None: data = data[data['Ciclo'].isin(ciclos)]
+    score_cols = [c for c in etapas_scores_cols if c in data.columns]
+    if not score_cols: return {}
+    aggregated = _aggregate(data, ['Ciclo', 'Loja', 'Nome_Exibicao'], score_cols)
+    ciclo_col = aggregated['Ciclo']
+    duracao_map = {c: get_race_duration_hours(c, temporada) for c in ciclo_col.unique()}
+    baseline_map = {c: get_baseline_horas(c, hoje, temporada) for c in duracao_map}
+    final_df = calculate_final_scores(aggregated, etapas_scores_cols, ciclo_col.map(duracao_map), ciclo_col.map(baseline_map), group_col='Ciclo')
+    partes = {ciclo: parte.drop(columns='Ciclo').reset_index(drop=True) for ciclo, parte in final_df.groupby('Ciclo', sort=False)}
+    ordem = prepared.periodos_df["Ciclo"].dropna().unique().tolist()
+    return {ciclo: CicloRanking(partes[ciclo], duracao_map[ciclo], baseline_map[ciclo]) for ciclo in ordem if ciclo in partes}
+
+@timed("replay_positions")
+def compute_replay_positions(prepared: PreparedData, hoje: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+    # Replay da corrida: posição acumulada e rank de cada loja ao fim de cada Periodo do ciclo.
+    # Um groupby por (Ciclo, Loja, Nome, Periodo) e uma soma acumulada por loja, sem reprocessar
+    # o ciclo a cada período; o último período coincide com o ranking final do ciclo.
+    prepared = select_temporada(prepared)
+    data, etapas_scores_cols = prepared.data, prepared.etapas_scores_cols
+    score_cols = [c for c in etapas_scores_cols if c in data.columns and not any(joker in c for joker in JOKER_ETAPAS)]
+    if data.empty or prepared.periodos_df.empty: return {}
+    boost = data[score_cols].astype(np.float64).sum(axis=1) if score_cols else pd.Series(0.0, index=data.index)
+    keys = ['Ciclo', 'Loja', 'Nome_Exibicao']
+    por_periodo = boost.groupby(_key_codes(data, keys + ['Periodo']), sort=False).sum().rename('Boost_Periodo_Min').reset_index()
+    por_periodo = _decode_keys(por_periodo, data, keys + ['Periodo'])
+    # Grade completa loja x período do ciclo: quem não pontuou num período mantém a posição anterior
+    periodos = prepared.periodos_df[['Ciclo', 'Periodo']].copy()
+    periodos['Ordem'] = np.arange(len(periodos))
+    grade = por_periodo[keys].drop_duplicates().merge(periodos, on='Ciclo')
+    grade = grade.merge(por_periodo, on=keys + ['Periodo'], how='left').sort_values(keys[:1] + ['Ordem'] + keys[1:], ignore_index=True)
+    grade['Boost_Periodo_Min'] = grade['Boost_Periodo_Min'].fillna(0.0)
+    grade['Boost_Acumulado_Min'] = grade.groupby(keys, sort=False)['Boost_Periodo_Min'].cumsum()
+    baseline_map = {c: get_baseline_horas(c, hoje, prepared.temporada) for c in grade['Ciclo'].unique()}
+    grade['Posicao_Horas'] = grade['Ciclo'].map(baseline_map) + grade['Boost_Acumulado_Min'] / 60.0
+    grade['Rank'] = grade.groupby(['Ciclo', 'Periodo'], sort=False)['Posicao_Horas'].rank(method="dense", ascending=False).astype(int)
+    grade.sort_values(['Ciclo', 'Ordem', 'Posicao_Horas', 'Nome_Exibicao'], ascending=[True, True, False, True], inplace=True, ignore_index=True)
+    partes = {ciclo: parte.drop(columns=['Ciclo', 'Ordem']).reset_index(drop=True) for ciclo, parte in grade.groupby('Ciclo', sort=False)}
+    ordem = prepared.periodos_df["Ciclo"].dropna().unique().tolist()
+    return {ciclo: partes[ciclo] for ciclo in ordem if ciclo in partes}
+
+# ----------------------------------------------------------------------
+# Execução em lote: python circuito_engine.py BaseCircuito.xlsx [pasta_saida]
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    if len(sys.argv) < 2:
+        sys.exit("Uso: python circuito_engine.py <planilha.xlsx> [pasta_saida]")
+    sheets = pd.read_excel(sys.argv[1], sheet_name=None, engine="openpyxl")
+    prepared = load_and_prepare_data(sheets)
+    saida = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    if saida: saida.mkdir(parents=True, exist_ok=True)
+    for temporada in temporadas(prepared):
+        for ciclo, ranking in compute_all_rankings(select_temporada(prepared, temporada)).items():
+            print(f"{temporada} {ciclo}: {len(ranking.df_final)} lojas | líder: {ranking.df_final['Nome_Exibicao'].iloc[0] if not ranking.df_final.empty else 'N/A'}")
+            if saida: ranking.df_final.to_csv(saida / f"ranking_{temporada}_{ciclo}.csv", index=False)
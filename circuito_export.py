@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# circuito_export.py — Relatórios em PDF por loja (sem Streamlit)
+#
+# Gera, para cada loja de um ciclo, um PDF com as métricas da Visão por Loja,
+# o radar de desempenho, a tabela de gaps e a pista de corrida. As lojas são
+# divididas num pool de processos; cada processo monta uma única vez a pista
+# base (janela do topo do ranking) e mantém o kaleido aberto entre as lojas.
+# Um manifest guarda o hash dos dados de cada loja: se nada mudou desde a
+# última exportação, o PDF não é refeito.
+#
+# Uso: python circuito_export.py BaseCircuito.xlsx [ciclo] [--temporada 2025] [--saida relatorios] [--workers N] [--force] [--png]
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import circuito_analysis
+import circuito_engine as engine
+from circuito_charts import CARS_TRACE, DESTAQUE_COLOR, PISTA_MAX_LANES, build_pista_fig, build_radar_fig
+from circuito_engine import format_hours_and_minutes
+
+EXPORT_VERSION = 1  # mudar o layout do relatório invalida os PDFs já gerados
+MANIFEST_NAME = "manifest.json"
+IMAGE_WIDTH_PX = 1000
+
+class ExportResult(NamedTuple):
+    gerados: List[str]
+    inalterados: List[str]
+    segundos: float
+
+# ----------------------------------------------------------------------
+# Hash dos dados de cada loja
+# ----------------------------------------------------------------------
+def loja_digest(ciclo: str, duracao_horas: float, pista: pd.DataFrame, analise: circuito_analysis.LojaAnalise) -> str:
+    # Tudo o que aparece no relatório: a própria loja, gaps, rival e as posições da pista
+    h = hashlib.sha256(f"v{EXPORT_VERSION}|{ciclo}|{duracao_horas}".encode())
+    h.update(analise.loja_row.to_json().encode())
+    h.update(analise.df_melhoria.to_json(orient="split").encode())
+    if analise.rival is not None: h.update(analise.rival.to_json().encode())
+    h.update(pista[['Nome_Exibicao', 'Posicao_Horas', 'Rank']].to_json(orient="split").encode())
+    return h.hexdigest()
+
+def file_name(nome: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", str(nome)).strip("_") or "loja"
+
+def file_names(lojas: pd.DataFrame) -> Dict[str, str]:
+    # Nome do arquivo de cada loja (Nome_Exibicao -> nome sem extensão). Nomes que viram o mesmo
+    # arquivo ("Loja 1/A" e "Loja 1 A", ou só maiúsculas/minúsculas) levam o loja_key no fim.
+    base = lojas['Nome_Exibicao'].map(file_name)
+    repetido = base.str.lower().duplicated(keep=False)
+    base[repetido] = base[repetido] + "_" + lojas.loc[repetido, 'Loja'].astype(str)
+    return dict(zip(lojas['Nome_Exibicao'], base))
+
+# ----------------------------------------------------------------------
+# Processo de exportação (estado compartilhado entre as lojas do mesmo processo)
+# ----------------------------------------------------------------------
+_WORKER: dict = {}
+
+def _init_worker(ciclo: str, duracao_horas: float, topo: pd.DataFrame):
+    # A pista do topo do ranking é montada uma vez; cada loja só copia e destaca o seu carro
+    _WORKER.update(ciclo=ciclo, duracao_horas=duracao_horas, topo=topo,
+                   pista_base=build_pista_fig(topo, duracao_horas).to_dict())
+
+def _pista_fig(nome: str, linha_extra: Optional[pd.DataFrame]) -> go.Figure:
+    # Loja fora do topo: a pista ganha uma faixa a mais e é montada do zero
+    if linha_extra is not None:
+        return build_pista_fig(pd.concat([_WORKER['topo'], linha_extra], ignore_index=True), _WORKER['duracao_horas'], nome)
+    fig = go.Figure(_WORKER['pista_base'])
+    destaque = _WORKER['topo']['Nome_Exibicao'].to_numpy() == nome
+    fig.data[CARS_TRACE].marker.update(size=np.where(destaque, 24, 18),
+                                       line=dict(color=np.where(destaque, DESTAQUE_COLOR, "#111827").tolist(), width=np.where(destaque, 3, 1)))
+    return fig
+
+def _png(fig: go.Figure, height: Optional[int] = None) -> bytes:
+    return fig.to_image(format="png", engine="kaleido", width=IMAGE_WIDTH_PX, height=height or fig.layout.height or 500)
+
+def _scaled_image(png: bytes, largura: float, altura_max: float) -> Image:
+    img = Image(io.BytesIO(png))
+    escala = min(largura / img.imageWidth, altura_max / img.imageHeight)
+    img.drawWidth, img.drawHeight = img.imageWidth * escala, img.imageHeight * escala
+    return img
+
+def _build_pdf(path: Path, analise: circuito_analysis.LojaAnalise, radar_png: Optional[bytes], pista_png: bytes):
+    loja_row, df_melhoria, rival = analise
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(str(path), pagesize=A4, leftMargin=1.5*cm, rightMargin=1.5*cm, topMargin=1.5*cm, bottomMargin=1.5*cm,
+                            title=f"Circuito MiniPreço — {loja_row['Nome_Exibicao']}")
+    story = [
+        Paragraph(f"Circuito MiniPreço — {_WORKER['ciclo']}", styles['Title']),
+        Paragraph(str(loja_row['Nome_Exibicao']), styles['Heading2']),
+    ]
+    metricas = Table([
+        ["Rank Atual", "Avanço na Pista", "Progresso Total", "Tempo Restante"],
+        [f"#{loja_row['Rank']}", format_hours_and_minutes(loja_row['Posicao_Horas']), f"{loja_row['Progresso']:.1f}%", format_hours_and_minutes(loja_row['Tempo_Faltante_Horas'])],
+    ], hAlign="LEFT")
+    metricas.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                                  ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#E5E7EB"))]))
+    story += [metricas, Spacer(1, 0.4*cm)]
+
+    # Mesmos textos da Análise Estratégica da Visão por Loja
+    if rival is None:
+        story.append(Paragraph("<b>Você é o líder isolado do Circuito!</b>", styles['Normal']))
+    elif loja_row['Rank'] == 1:
+        story.append(Paragraph(f"<b>Você é o líder do Circuito!</b> Sua vantagem sobre a loja <b>{rival['Rival_Nome']}</b> é de <b>{format_hours_and_minutes(rival['Diferenca_Horas'])}</b>.", styles['Normal']))
+    else:
+        story.append(Paragraph(f"<b>Meta: Ultrapassar {rival['Rival_Nome']}!</b> A diferença é de apenas <b>{format_hours_and_minutes(rival['Diferenca_Horas'])}</b>.", styles['Normal']))
+    story.append(Spacer(1, 0.3*cm))
+
+    if radar_png:
+        story += [Paragraph("Desempenho por Etapa", styles['Heading3']), _scaled_image(radar_png, doc.width, 9*cm)]
+    if not df_melhoria.empty:
+        linhas = [circuito_analysis.MELHORIA_COLS] + [
+            [etapa] + [format_hours_and_minutes(minutos / 60) for minutos in valores]
+            for etapa, *valores in df_melhoria[circuito_analysis.MELHORIA_COLS].itertuples(index=False)
+        ]
+        gaps = Table(linhas, hAlign="LEFT", repeatRows=1)
+        gaps.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                                  ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#E5E7EB")), ('FONTSIZE', (0, 0), (-1, -1), 9)]))
+        story += [Paragraph("Plano de Ação (gap até o impulso máximo)", styles['Heading3']), gaps]
+
+    story += [PageBreak(), Paragraph("Pista de Corrida do Circuito", styles['Heading3']), _scaled_image(pista_png, doc.width, doc.height - 2*cm)]
+    doc.build(story)
+
+def _export_loja(job) -> tuple:
+    nome, digest, destino, analise, linha_extra, png = job
+    radar_png = _png(build_radar_fig(analise.df_melhoria), 450) if not analise.df_melhoria.empty else None
+    pista_png = _png(_pista_fig(nome, linha_extra))
+    tmp = destino.with_suffix(".tmp")
+    _build_pdf(tmp, analise, radar_png, pista_png)
+    os.replace(tmp, destino)
+    if png:
+        destino.with_name(destino.stem + "_pista.png").write_bytes(pista_png)
+        if radar_png: destino.with_name(destino.stem + "_radar.png").write_bytes(radar_png)
+    return nome, digest
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+def export_ciclo(prepared: engine.PreparedData, ciclo: str, saida, workers: Optional[int] = None, force: bool = False,
+                 png: bool = False, hoje=None) -> ExportResult:
+    inicio = time.perf_counter()
+    # Um ciclo de uma temporada: a do PreparedData ou, se ele tiver várias, a mais recente
+    prepared = engine.select_temporada(prepared)
+    ranking = engine.compute_all_rankings(prepared, hoje).get(ciclo)
+    if ranking is None or ranking.df_final.empty: return ExportResult([], [], 0.0)
+    df_final, duracao_horas = ranking.df_final, ranking.duracao_horas
+    analysis = circuito_analysis.compute_gap_analysis(df_final, prepared.etapas_pesos_df, prepared.etapas_scores_cols, ciclo)
+    pasta = Path(saida) / str(prepared.temporada) / file_name(ciclo) if prepared.temporada is not None else Path(saida) / file_name(ciclo)
+    pasta.mkdir(parents=True, exist_ok=True)
+    manifest_path = pasta / MANIFEST_NAME
+    manifest: Dict[str, str] = json.loads(manifest_path.read_text()) if manifest_path.exists() and not force else {}
+
+    topo = df_final.head(PISTA_MAX_LANES)
+    no_topo = set(topo['Nome_Exibicao'])
+    lojas = df_final['Nome_Exibicao'].drop_duplicates().index
+    arquivos = file_names(df_final.loc[lojas, ['Loja', 'Nome_Exibicao']])
+    jobs, inalterados, novo_manifest = [], [], {}
+    for pos in lojas:
+        nome = df_final.at[pos, 'Nome_Exibicao']
+        analise = analysis.for_loja(nome)
+        linha_extra = None if nome in no_topo else df_final.loc[[pos]]
+        pista = topo if linha_extra is None else pd.concat([topo, linha_extra])
+        digest = loja_digest(ciclo, duracao_horas, pista, analise)
+        destino = pasta / f"{arquivos[nome]}.pdf"
+        novo_manifest[nome] = digest
+        if manifest.get(nome) == digest and destino.exists():
+            inalterados.append(nome)
+        else:
+            jobs.append((nome, digest, destino, analise, linha_extra, png))
+
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers < 2:
+        _init_worker(ciclo, duracao_horas, topo)
+        gerados = [nome for nome, _ in map(_export_loja, jobs)]
+    else:
+        # spawn, como na leitura da planilha; cada processo sobe o seu kaleido uma única vez
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(ciclo, duracao_horas, topo)) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            gerados = [nome for nome, _ in pool.map(_export_loja, jobs, chunksize=chunksize)]
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(novo_manifest, ensure_ascii=False, indent=1))
+    os.replace(tmp, manifest_path)
+    return ExportResult(gerados, inalterados, time.perf_counter() - inicio)
+
+# ----------------------------------------------------------------------
+# Execução em lote
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import circuito_cache
+    import circuito_fetch
+
+    parser = argparse.ArgumentParser(description="Gera um relatório PDF por loja do ciclo")
+    parser.add_argument("planilha", help="caminho, URL ou URL do SharePoint da planilha")
+    parser.add_argument("ciclo", nargs="?", help="padrão: último ciclo da temporada")
+    parser.add_argument("--temporada", type=int, help="padrão: temporada mais recente da planilha")
+    parser.add_argument("--saida", default="relatorios")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--force", action="store_true", help="refaz todos os PDFs, mesmo sem mudança nos dados")
+    parser.add_argument("--png", action="store_true", help="salva também as imagens da pista e do radar")
+    args = parser.parse_args()
+
+    # Mesma origem do app e da API: arquivo local, URL ou SharePoint (credenciais em CIRCUITO_SHAREPOINT_*)
+    try:
+        content, _, _ = circuito_fetch.make_source(args.planilha).fetch()
+    except circuito_fetch.FetchError as e:
+        raise SystemExit(str(e))
+    # Só a partição (Temporada, Ciclo) exportada é lida do cache
+    catalog = circuito_cache.load_catalog(content)
+    temporadas = catalog.temporadas()
+    temporada = args.temporada or (temporadas[-1] if temporadas else None)
+    if temporada not in temporadas: raise SystemExit(f"Temporada {temporada!r} não encontrada. Disponíveis: {', '.join(map(str, temporadas))}")
+    ciclos = catalog.ciclos(temporada)
+    ciclo = args.ciclo or ciclos[-1]
+    if ciclo not in ciclos: raise SystemExit(f"Ciclo {ciclo!r} não encontrado em {temporada}. Disponíveis: {', '.join(ciclos)}")
+    resultado = export_ciclo(catalog.load(temporada, ciclo), ciclo, args.saida, args.workers, args.force, args.png)
+    print(f"{temporada} {ciclo}: {len(resultado.gerados)} PDFs gerados, {len(resultado.inalterados)} inalterados em {resultado.segundos:.1f}s "
+          f"-> {Path(args.saida) / str(temporada) / file_name(ciclo)}")
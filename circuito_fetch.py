@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# circuito_fetch.py — Busca condicional da planilha BaseCircuito
+#
+# Origens (WorkbookSource), escolhidas por make_source a partir da URL/caminho:
+# - HttpSource (GitHub raw e qualquer URL HTTP) reaproveita uma sessão HTTP
+#   (pool de conexões) e envia If-None-Match / If-Modified-Since: quando o
+#   servidor responde 304 nada é baixado.
+# - SharePointSource reaproveita um único ClientContext autenticado e consulta
+#   só os metadados do arquivo (ETag); o conteúdo é baixado quando o ETag muda.
+# - LocalFileSource lê um arquivo local só quando mtime/tamanho mudam.
+# WorkbookFetcher limita a frequência de consultas à origem e informa se o
+# conteúdo realmente mudou, para que o parse só aconteça nesse caso.
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Protocol, Tuple
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+import circuito_metrics
+
+GITHUB_FILE_URL = "https://raw.githubusercontent.com/AlefeMiniPreco/circuito-minipreco/main/BaseCircuito.xlsx"
+# URL ou caminho local da planilha; a frequência de consulta vem de CIRCUITO_POLL_SECONDS.
+# SharePoint: https://<tenant>.sharepoint.com/sites/<site>/<biblioteca>/BaseCircuito.xlsx
+# (ou sharepoint+http(s)://... para outro host, como um mock local)
+WORKBOOK_SOURCE = os.environ.get("CIRCUITO_WORKBOOK", GITHUB_FILE_URL)
+DEFAULT_POLL_INTERVAL_S = float(os.environ.get("CIRCUITO_POLL_SECONDS", 300))
+DEFAULT_TIMEOUT_S = 60
+
+# ----------------------------------------------------------------------
+# Resultado da busca
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class FetchResult:
+    content: bytes
+    digest: str        # sha256 do conteúdo
+    version: str       # ETag / Last-Modified / mtime informado pela origem
+    changed: bool      # True quando o conteúdo difere da busca anterior
+    checked_at: float  # time.time() da última consulta à origem
+
+class FetchError(RuntimeError):
+    pass
+
+def _digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+# ----------------------------------------------------------------------
+# Origens
+# ----------------------------------------------------------------------
+class WorkbookSource(Protocol):
+    def fetch(self) -> Tuple[bytes, str, bool]:
+        # (conteúdo, versão informada pela origem, baixou agora?); falhas viram FetchError
+        ...
+
+class HttpSource:
+    def __init__(self, url: str, session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT_S):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._content: Optional[bytes] = None
+        self.requests_made = 0
+        self.not_modified = 0
+
+    def __repr__(self):
+        return f"HttpSource({self.url!r})"
+
+    def fetch(self):
+        # Retorna (conteúdo, versão, baixou?) — com 304 devolve o conteúdo já guardado
+        headers = {}
+        if self._content is not None:
+            if self._etag: headers["If-None-Match"] = self._etag
+            if self._last_modified: headers["If-Modified-Since"] = self._last_modified
+        try:
+            resp = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(f"Falha ao consultar {self.url}: {e}") from e
+        self.requests_made += 1
+        if resp.status_code == 304 and self._content is not None:
+            self.not_modified += 1
+            return self._content, self._etag or self._last_modified or "", False
+        if resp.status_code != 200:
+            raise FetchError(f"{self.url} respondeu HTTP {resp.status_code}")
+        self._etag = resp.headers.get("ETag")
+        self._last_modified = resp.headers.get("Last-Modified")
+        self._content = resp.content
+        return self._content, self._etag or self._last_modified or "", True
+
+class LocalFileSource:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._stamp = None
+        self._content: Optional[bytes] = None
+
+    def __repr__(self):
+        return f"LocalFileSource({str(self.path)!r})"
+
+    def fetch(self):
+        try:
+            st = self.path.stat()
+        except OSError as e:
+            raise FetchError(f"Arquivo {self.path} indisponível: {e}") from e
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp and self._content is not None:
+            return self._content, str(stamp[0]), False
+        self._content = self.path.read_bytes()
+        self._stamp = stamp
+        return self._content, str(stamp[0]), True
+
+class SharePointSource:
+    SELECT = ["ETag", "TimeLastModified", "Length"]
+
+    def __init__(self, site_url: str, file_path: str, credentials: Optional[dict] = None, ctx=None,
+                 session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT_S):
+        self.site_url = site_url.rstrip("/")
+        self.file_path = file_path
+        self.credentials = credentials
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._ctx = ctx
+        self._version: Optional[str] = None
+        self._content: Optional[bytes] = None
+        self.requests_made = 0
+        self.not_modified = 0
+
+    def __repr__(self):
+        return f"SharePointSource({self.site_url!r}, {self.file_path!r})"
+
+    @classmethod
+    def from_url(cls, url: str, credentials: Optional[dict] = None) -> "SharePointSource":
+        # O site é /sites/<nome> ou /teams/<nome>; sem isso, a raiz do host
+        url = url.removeprefix("sharepoint+")
+        parts = urlsplit(url)
+        path = unquote(parts.path)
+        segs = path.split("/")
+        site_path = "/".join(segs[:3]) if len(segs) > 3 and segs[1] in ("sites", "teams") else ""
+        return cls(f"{parts.scheme}://{parts.netloc}{site_path}", path, credentials)
+
+    def context(self):
+        # Um único contexto por origem: token, form digest e conexões são reaproveitados entre consultas
+        if self._ctx is None:
+            try:
+                from office365.sharepoint.client_context import ClientContext
+            except ImportError as e:
+                raise FetchError("Origem SharePoint requer o pacote office365-rest-python-client") from e
+
+            creds = self.credentials or sharepoint_credentials_from_env()
+            ctx = ClientContext(self.site_url).with_transport(session=self.session, timeout=self.timeout)
+            if creds.get("token"):
+                token = {"access_token": creds["token"], "token_type": "Bearer"}
+                ctx = ctx.with_access_token(lambda: token)
+            elif creds.get("client_id"):
+                ctx = ctx.with_client_credentials(creds["client_id"], creds["client_secret"])
+            elif creds.get("username"):
+                ctx = ctx.with_user_credentials(creds["username"], creds["password"])
+            else:
+                raise FetchError("Credenciais do SharePoint não configuradas (secrets.toml ou CIRCUITO_SHAREPOINT_*)")
+            self._ctx = ctx
+        return self._ctx
+
+    def fetch(self):
+        # Primeiro só os metadados; o conteúdo ($value) é baixado quando o ETag muda
+        from office365.runtime.client_request_exception import ClientRequestException
+
+        try:
+            arquivo = self.context().web.get_file_by_server_relative_path(self.file_path)
+            arquivo.get().select(self.SELECT).execute_query()
+            self.requests_made += 1
+            props = arquivo.properties
+            version = props.get("ETag") or f"{props.get('TimeLastModified')}|{props.get('Length')}"
+            if version == self._version and self._content is not None:
+                self.not_modified += 1
+                return self._content, version, False
+            content = arquivo.get_content().execute_query().value
+        except (ClientRequestException, requests.RequestException) as e:
+            raise FetchError(f"Falha ao consultar o SharePoint ({self.file_path}): {e}") from e
+        self._version, self._content = version, content
+        return content, version, True
+
+def sharepoint_credentials_from_env() -> dict:
+    env = {"token": "CIRCUITO_SHAREPOINT_TOKEN", "client_id": "CIRCUITO_SHAREPOINT_CLIENT_ID", "client_secret": "CIRCUITO_SHAREPOINT_CLIENT_SECRET",
+           "username": "CIRCUITO_SHAREPOINT_USER", "password": "CIRCUITO_SHAREPOINT_PASSWORD"}
+    return {k: os.environ[v] for k, v in env.items() if os.environ.get(v)}
+
+def sharepoint_credentials() -> dict:
+    # Credenciais do app e do circuito_warmup: [sharepoint_credentials] do .streamlit/secrets.toml,
+    # se houver; senão as variáveis CIRCUITO_SHAREPOINT_*. O streamlit só é importado aqui.
+    try:
+        import streamlit as st
+        return dict(st.secrets["sharepoint_credentials"])
+    except (ImportError, FileNotFoundError, KeyError):
+        return sharepoint_credentials_from_env()
+
+def make_source(location: str, credentials: Optional[dict] = None) -> WorkbookSource:
+    if location.startswith("sharepoint+") or urlsplit(location).netloc.endswith(".sharepoint.com"):
+        return SharePointSource.from_url(location, credentials)
+    if location.startswith(("http://", "https://")): return HttpSource(location)
+    return LocalFileSource(location)
+
+# ----------------------------------------------------------------------
+# Controle de frequência e detecção de mudança
+# ----------------------------------------------------------------------
+class WorkbookFetcher:
+    def __init__(self, source: WorkbookSource, poll_interval_s: float = DEFAULT_POLL_INTERVAL_S):
+        self.source = source
+        self.poll_interval_s = poll_interval_s
+        self._lock = threading.Lock()
+        self._last: Optional[FetchResult] = None
+        self.last_error: Optional[str] = None
+
+    def get(self, force: bool = False) -> FetchResult:
+        with self._lock:
+            now = time.time()
+            last = self._last
+            if last is not None and not force and now - last.checked_at < self.poll_interval_s:
+                circuito_metrics.count("fetch.throttled")
+                return FetchResult(last.content, last.digest, last.version, False, last.checked_at)
+            try:
+                with circuito_metrics.timer("fetch", source=repr(self.source)):
+                    content, version, downloaded = self.source.fetch()
+            except FetchError as e:
+                circuito_metrics.count("fetch.errors")
+                # Origem fora do ar: continua servindo a última versão conhecida
+                self.last_error = str(e)
+                if last is None: raise
+                self._last = FetchResult(last.content, last.digest, last.version, False, now)
+                return self._last
+            self.last_error = None
+            digest = _digest(content) if downloaded or last is None else last.digest
+            changed = last is None or digest != last.digest
+            circuito_metrics.count("fetch.downloaded" if downloaded else "fetch.not_modified")
+            self._last = FetchResult(content, digest, version, changed, now)
+            return self._last
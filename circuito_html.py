@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# circuito_html.py — Tabela HTML da "Classificação Completa" (sem Streamlit)
+#
+# Cada coluna da tabela é formatada de uma vez (operações de string do
+# pandas) em vez de célula a célula com iterrows, e só a página pedida é
+# montada. As classes CSS são as definidas no app (race-table, rank-N etc.).
+
+import math
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from circuito_engine import format_hours_and_minutes_series
+from circuito_metrics import timed
+
+TABELA_PAGE_SIZE = 50
+ROW_ANIMATION_STEP_S = 0.05
+
+def score_cols_with_data(df_final: pd.DataFrame, score_cols: List[str]) -> List[str]:
+    cols = [col for col in score_cols if col in df_final.columns]
+    if not cols: return []
+    com_dados = df_final[cols].sum() > 0
+    return [col for col in cols if com_dados[col]]
+
+def count_pages(n_rows: int, page_size: int = TABELA_PAGE_SIZE) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+@timed("build_ranking_html")
+def build_ranking_table_html(df_final: pd.DataFrame, score_cols: List[str], show_details: bool = False,
+                             page: int = 0, page_size: int = TABELA_PAGE_SIZE) -> str:
+    detail_cols = score_cols_with_data(df_final, score_cols) if show_details else []
+    headers = ["Rank", "Loja", "Tempo Restante", "Progresso", "Impulso Total"] + [col.replace('_Score', '') for col in detail_cols]
+    head = f"<table class='race-table'><thead><tr>{''.join(f'<th>{h}</th>' for h in headers)}</tr></thead><tbody>"
+
+    page_df = df_final.iloc[page * page_size:(page + 1) * page_size]
+    if page_df.empty: return head + "</tbody></table>"
+
+    # Zebra segue a posição no ranking completo; o atraso da animação recomeça a cada página
+    posicao = pd.Series(np.arange(page * page_size, page * page_size + len(page_df)), index=page_df.index)
+    zebra = pd.Series(np.where(posicao % 2 != 0, 'zebra', ''), index=page_df.index)
+    delay = (pd.Series(np.arange(len(page_df)), index=page_df.index) * ROW_ANIMATION_STEP_S).round(2).astype(str)
+    rank = page_df['Rank'].astype(int)
+    rank_str = rank.astype(str)
+    rank_class = pd.Series(np.where(rank <= 3, 'rank-' + rank_str, ''), index=page_df.index)
+    progresso = page_df['Progresso'].astype(float)
+    largura = progresso.clip(upper=100).astype(str)
+    prog_txt = progresso.map('{:.1f}'.format)
+
+    html = ("<tr class='" + zebra + " fade-in' style='animation-delay: " + delay + "s;'>"
+            + "<td class='rank-cell " + rank_class + "'>" + rank_str + "</td>"
+            + "<td class='loja-cell'>" + page_df['Nome_Exibicao'].astype(str) + "</td>"
+            + "<td>" + format_hours_and_minutes_series(page_df['Tempo_Faltante_Horas']) + "</td>"
+            + "<td><div class='progress-bar-container'><div class='progress-bar animated-progress-bar' style='--progress-width: "
+            + largura + "%; width: " + largura + "%;'>" + prog_txt + "%</div></div></td>"
+            + "<td>+" + format_hours_and_minutes_series(page_df['Boost_Total_Min'] / 60) + "</td>")
+    for col in detail_cols:
+        html = html + "<td>" + format_hours_and_minutes_series(page_df[col] / 60) + "</td>"
+    html = html + "</tr>"
+    return head + "".join(html.tolist()) + "</tbody></table>"
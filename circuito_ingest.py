@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# circuito_ingest.py — Leitura enxuta da planilha BaseCircuito
+#
+# Em vez de pd.read_excel(sheet_name=None), que carrega todas as abas e todas
+# as colunas, este módulo percorre só as abas de ETAPA_SHEETS em modo
+# read-only/streaming do openpyxl e guarda apenas as colunas usadas pelo motor.
+# As abas podem ser lidas em paralelo num pool de processos. O resultado
+# (dtypes e valores) é o mesmo que o pd.read_excel produziria para essas colunas.
+
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from circuito_engine import ETAPA_SHEETS
+from circuito_metrics import timed
+
+USED_COLUMNS = ("NomeLoja", "loja_key", "Nota", "Ciclo", "Período", "PesoDaEtapa", "Data Início", "Temporada")
+# Abaixo deste tamanho o custo de subir o pool supera o ganho do paralelismo
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+INGEST_MODE = os.environ.get("CIRCUITO_INGEST", "streaming")
+
+# ----------------------------------------------------------------------
+# Conversão célula a célula (mesmas regras do leitor openpyxl do pandas)
+# ----------------------------------------------------------------------
+def _convert_value(value):
+    if value is None: return ""
+    if isinstance(value, float) and value.is_integer(): return int(value)
+    return value
+
+def _is_blank(row) -> bool:
+    return all(v is None or v == "" for v in row)
+
+def _read_sheet(ws, columns: Iterable[str] = USED_COLUMNS) -> pd.DataFrame:
+    wanted = set(columns)
+    ws.reset_dimensions()
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None: return pd.DataFrame()
+    keep = [i for i, name in enumerate(header) if isinstance(name, str) and name.strip() in wanted]
+    if not keep: return pd.DataFrame()
+    data = [[_convert_value(header[i]) for i in keep]]
+    last_with_data = 0
+    for row in rows:
+        # Linhas em branco no meio são mantidas e as do final descartadas, como no pandas
+        if not _is_blank(row): last_with_data = len(data)
+        data.append([_convert_value(row[i]) if i < len(row) else "" for i in keep])
+    data = data[:last_with_data + 1]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+def _read_sheets_worker(content: bytes, sheet_names: List[str], columns) -> Dict[str, pd.DataFrame]:
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(content), read_only=True, data_only=True, keep_links=False)
+    try:
+        return {name: _read_sheet(wb[name], columns) for name in sheet_names if name in wb.sheetnames}
+    finally:
+        wb.close()
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+def read_etapa_sheets(content: bytes, sheet_names: Optional[List[str]] = None, columns=USED_COLUMNS,
+                      parallel: Optional[bool] = None, max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    sheet_names = list(sheet_names or ETAPA_SHEETS)
+    if parallel is None: parallel = len(content) >= PARALLEL_MIN_BYTES
+    workers = min(len(sheet_names), max_workers or os.cpu_count() or 1)
+    if not parallel or workers < 2:
+        sheets = _read_sheets_worker(content, sheet_names, columns)
+    else:
+        # spawn: o servidor Streamlit é multi-thread, e fork nesse cenário não é seguro
+        chunks = [sheet_names[i::workers] for i in range(workers)]
+        sheets = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for part in pool.map(_read_sheets_worker, [content] * workers, chunks, [columns] * workers):
+                sheets.update(part)
+    # Mantém a ordem das abas pedida
+    return {name: sheets[name] for name in sheet_names if name in sheets}
+
+@timed("read_workbook")
+def read_workbook(content: bytes, mode: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    if (mode or INGEST_MODE) == "pandas":
+        return pd.read_excel(io.BytesIO(content), sheet_name=None, engine="openpyxl")
+    return read_etapa_sheets(content)
@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 # circuito_lojas_app.py — VERSÃO COM ANIMAÇÕES CORRIGIDAS
 
-import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.graph_objects as go
-from datetime import datetime
 import math
-import time
+import os
+
+import circuito_cache
+import circuito_fetch
+import circuito_metrics
+import circuito_store
+# Plotly (circuito_charts) só é importado pelas páginas que desenham gráficos: cabeçalho, métricas
+# e pódio chegam ao navegador antes. Para aquecer tudo antes da primeira sessão, ver circuito_warmup.
+from circuito_html import TABELA_PAGE_SIZE, build_ranking_table_html, count_pages
+from circuito_engine import MONTH_MAP, format_hours_and_minutes
 
 # ----------------------------------------------------------------------
 # Configuração inicial do Streamlit
@@ -17,24 +23,8 @@ st.set_page_config(page_title="Circuito MiniPreço", page_icon="🏎️", layout
 # ----------------------------------------------------------------------
 # Fonte de dados e Constantes Globais
 # ----------------------------------------------------------------------
-GITHUB_FILE_URL = "https://raw.githubusercontent.com/AlefeMiniPreco/circuito-minipreco/main/BaseCircuito.xlsx"
-
-MONTH_MAP = {
-    'Janeiro': 1, 'Fevereiro': 2, 'Março': 3, 'Abril': 4, 'Maio': 5, 'Junho': 6,
-    'Julho': 7, 'Agosto': 8, 'Setembro': 9, 'Outubro': 10, 'Novembro': 11, 'Dezembro': 12
-}
-MONTH_DAYS_MAP = {
-    'Janeiro': 31, 'Fevereiro': 28, 'Março': 31, 'Abril': 30, 'Maio': 31, 'Junho': 30,
-    'Julho': 31, 'Agosto': 31, 'Setembro': 30, 'Outubro': 31, 'Novembro': 30, 'Dezembro': 31
-}
-
-ETAPA_SHEETS = [
-    "PlanoVoo", "ProjetoFast", "PontoPartida", "AcoesComerciais", "PainelVendas",
-    "Engajamento", "VisualMerchandising", "ModeloAtendimento", "EvolucaoComercial",
-    "Qualidade", "Meta"
-]
-MONTHLY_ETAPAS = ["Engajamento", "VisualMerchandising", "Meta"]
-JOKER_ETAPAS = ["Meta"]
+# Porta da API JSON (circuito_api) servida ao lado do app; vazio desliga
+API_PORT = os.environ.get("CIRCUITO_API_PORT", "")
 
 # ----------------------------------------------------------------------
 # CSS (visuais com otimização para Mobile)
@@ -105,114 +95,43 @@ st.markdown("""
 # ----------------------------------------------------------------------
 # Funções Utilitárias e de Processamento
 # ----------------------------------------------------------------------
-@st.cache_data(ttl=3600)
-def get_data_from_github():
-    try: return pd.read_excel(GITHUB_FILE_URL, sheet_name=None, engine="openpyxl")
+@st.cache_resource
+def start_api_server():
+    # Uma vez por processo, compartilhando o store (e portanto a planilha e os rankings) com o app
+    import circuito_api
+    return circuito_api.serve_in_background(get_data_store(), port=int(API_PORT))
+
+def get_data_store():
+    # Dados compartilhados por todas as sessões; st.session_state guarda só as seleções. Um único
+    # fetcher por processo (sessão HTTP ou contexto autenticado do SharePoint), e a thread de
+    # atualização busca a planilha e recalcula as partições alteradas sem bloquear as sessões.
+    # Com circuito_warmup, o store já chega aquecido.
+    return circuito_store.process_store(circuito_fetch.sharepoint_credentials())
+
+def get_data():
+    try: return get_data_store().current()
     except Exception as e:
-        st.error(f"Erro ao carregar os dados do GitHub: {e}")
-        return {}
+        st.error(f"Erro ao carregar os dados da planilha: {e}")
+        return None
 
 def set_page(page_name):
     st.session_state.page = page_name
 
-def format_hours_and_minutes(hours_float: float):
-    if pd.isna(hours_float): return "N/A"
-    if hours_float < 0: return "Finalizou!"
-    hours = math.floor(hours_float)
-    minutes = round((hours_float - hours) * 60)
-    return f"{hours}h {minutes:02d}min"
-
-def get_race_duration_hours(ciclo: str):
-    local_month_map = MONTH_DAYS_MAP.copy()
-    ano_atual = datetime.now().year
-    if (ano_atual % 4 == 0 and ano_atual % 100 != 0) or (ano_atual % 400 == 0):
-        local_month_map['Fevereiro'] = 29
-    return local_month_map.get(ciclo, 30)
-
-@st.cache_data(show_spinner="Processando dados...")
-def load_and_prepare_data(all_sheets: dict):
-    all_data, pesos_records = [], []
-    for sheet_name in ETAPA_SHEETS:
-        if sheet_name in all_sheets:
-            try:
-                df_etapa = all_sheets[sheet_name].copy()
-                df_etapa.columns = [c.strip() for c in df_etapa.columns]
-                if not all(col in df_etapa.columns for col in ['NomeLoja','loja_key','Nota','Ciclo','Período']): continue
-                df_etapa.rename(columns={'loja_key': 'Loja', 'NomeLoja': 'Nome_Exibicao', 'Período': 'Periodo'}, inplace=True)
-                for col in ['Ciclo', 'Periodo']: df_etapa[col] = df_etapa[col].astype(str)
-                if 'PesoDaEtapa' in df_etapa.columns:
-                    nota_num, peso_num = pd.to_numeric(df_etapa['Nota'], errors='coerce').fillna(0.0), pd.to_numeric(df_etapa['PesoDaEtapa'], errors='coerce').fillna(0.0)
-                    df_etapa['Score_Etapa'] = nota_num * peso_num
-                else:
-                    df_etapa['Score_Etapa'] = pd.to_numeric(df_etapa['Nota'], errors='coerce').fillna(0.0)
-                df_consolidado = df_etapa[['Loja', 'Nome_Exibicao', 'Ciclo', 'Periodo', 'Score_Etapa']].copy()
-                df_consolidado.rename(columns={'Score_Etapa': f'{sheet_name}_Score'}, inplace=True)
-                all_data.append(df_consolidado)
-                if 'PesoDaEtapa' in df_etapa.columns and sheet_name not in JOKER_ETAPAS:
-                    pesos_gp = df_etapa.groupby(['Ciclo','Periodo'])['PesoDaEtapa'].sum().reset_index()
-                    pesos_gp['Etapa'] = f'{sheet_name}_Score'
-                    for _, r in pesos_gp.iterrows():
-                        pesos_records.append({'Etapa': r['Etapa'], 'Ciclo': str(r['Ciclo']), 'Periodo': str(r['Periodo']), 'PesoMaximo': float(r['PesoDaEtapa'])})
-            except Exception: continue
-    if not all_data: return pd.DataFrame(), [], pd.DataFrame(), pd.DataFrame()
-    df_merged = pd.DataFrame(columns=['Loja', 'Nome_Exibicao', 'Ciclo', 'Periodo'])
-    unique_identifiers = ['Loja', 'Nome_Exibicao', 'Ciclo', 'Periodo']
-    for df in all_data:
-        df_merged = pd.merge(df_merged, df, on=unique_identifiers, how='outer')
-    month_order = list(MONTH_MAP.keys())
-    df_merged['Ciclo_Cat'] = pd.Categorical(df_merged['Ciclo'], categories=month_order, ordered=True)
-    df_merged.sort_values(['Ciclo_Cat','Periodo','Nome_Exibicao'], inplace=True, ignore_index=True)
-    for etapa in MONTHLY_ETAPAS:
-        score_col = f"{etapa}_Score"
-        if score_col in df_merged.columns:
-            df_merged[score_col] = df_merged.groupby(['Loja', 'Ciclo'])[score_col].transform('max')
-    etapas_scores_cols = [c for c in df_merged.columns if c.endswith('_Score')]
-    periodos_df = df_merged[["Ciclo","Periodo","Ciclo_Cat"]].drop_duplicates().sort_values(["Ciclo_Cat","Periodo"]).reset_index(drop=True)
-    etapas_pesos_df = pd.DataFrame(pesos_records)
-    return df_merged, etapas_scores_cols, periodos_df, etapas_pesos_df
-
-@st.cache_data(show_spinner=False)
-def calculate_final_scores(df: pd.DataFrame, etapas_scores_cols: list, duracao_total_horas: float, baseline_horas: float):
-    df_copy = df.copy()
-    for e in etapas_scores_cols:
-        if e not in df_copy.columns: df_copy[e] = 0.0
-    score_cols_sem_coringa = [c for c in etapas_scores_cols if not any(joker in c for joker in JOKER_ETAPAS)]
-    df_copy["Boost_Total_Min"] = df_copy[score_cols_sem_coringa].sum(axis=1)
-    df_copy["Posicao_Horas"] = baseline_horas + (df_copy["Boost_Total_Min"] / 60.0)
-    if duracao_total_horas > 0:
-        df_copy["Progresso"] = (df_copy["Posicao_Horas"] / duracao_total_horas) * 100.0
-    else:
-        df_copy["Progresso"] = 0.0
-    df_copy["Tempo_Faltante_Horas"] = duracao_total_horas - df_copy["Posicao_Horas"]
-    df_copy["Rank"] = df_copy["Posicao_Horas"].rank(method="dense", ascending=False).astype(int)
-    df_copy.sort_values(["Posicao_Horas","Nome_Exibicao"], ascending=[False,True], inplace=True, ignore_index=True)
-    return df_copy
-
-@st.cache_data(show_spinner="Calculando ranking...")
-def filter_and_aggregate_data(data_original: pd.DataFrame, etapas_scores_cols: list, ciclo: str):
-    if not ciclo: return pd.DataFrame(), 0, 0
-    df = data_original[data_original["Ciclo"] == str(ciclo)].copy()
-    if df.empty: return pd.DataFrame(), 0, 0
-    score_cols = [c for c in etapas_scores_cols if c in df.columns]
-    if not score_cols: return pd.DataFrame(), 0, 0
-    id_vars = ['Loja', 'Nome_Exibicao']
-    aggregated = df.groupby(id_vars, as_index=False)[score_cols].sum(min_count=0)
-    hoje = datetime.now()
-    baseline_horas = 0
-    if MONTH_MAP.get(ciclo) == hoje.month and hoje.year == 2025:
-        baseline_horas = hoje.day
-    duracao_horas = get_race_duration_hours(ciclo)
-    final_df = calculate_final_scores(aggregated, etapas_scores_cols, duracao_horas, baseline_horas)
-    return final_df, duracao_horas, baseline_horas
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_ranking_table(particao_version: str, ciclo: str, show_details: bool, page: int, _df_final: pd.DataFrame, _score_cols: list):
+    # O DataFrame não entra na chave: a versão da partição (Temporada, Ciclo) já o identifica (e
+    # sobrevive a atualizações que só mudaram outras partições)
+    circuito_metrics.cache_miss("render_ranking_table")
+    return build_ranking_table_html(_df_final, _score_cols, show_details, page)
 
 # ----------------------------------------------------------------------
 # Funções de Renderização da Interface
 # ----------------------------------------------------------------------
-def render_header_and_periodo(campaign_name: str, ciclo:str, duracao_horas: float, baseline_horas: float):
+def render_header_and_periodo(campaign_name: str, temporada: int, ciclo:str, duracao_horas: float, baseline_horas: float):
     st.markdown("<div class='app-header'>", unsafe_allow_html=True)
     st.markdown(f"<h1>{campaign_name}</h1>", unsafe_allow_html=True)
     baseline_str = f"| Avanço Base (Dia Atual): <b>{baseline_horas:.0f} horas</b>" if baseline_horas > 0 else ""
-    st.markdown(f"<p>Ciclo: <b>{ciclo}</b> | Duração da corrida: <b>{duracao_horas:.0f} horas</b> {baseline_str}</p>", unsafe_allow_html=True)
+    st.markdown(f"<p>Temporada: <b>{temporada}</b> | Ciclo: <b>{ciclo}</b> | Duração da corrida: <b>{duracao_horas:.0f} horas</b> {baseline_str}</p>", unsafe_allow_html=True)
     st.markdown("---")
 
 def render_podio_table(df_final: pd.DataFrame, baseline_horas: float):
@@ -231,85 +150,13 @@ def render_podio_table(df_final: pd.DataFrame, baseline_horas: float):
                 f"</div>", unsafe_allow_html=True
             )
 
-def build_pista_fig(data: pd.DataFrame, duracao_total_horas: float) -> go.Figure:
-    if data is None or data.empty: return go.Figure()
-    CAR_ICON_URL = "https://raw.githubusercontent.com/AlefeMiniPreco/circuito-minipreco/main/assets/carro-corrida_anim.webp"
-    fig = go.Figure()
-    max_posicao_carro = data['Posicao_Horas'].max() if not data.empty else 0
-    limite_eixo = max(duracao_total_horas, max_posicao_carro)
-    
-    # Adicionar faixas da pista
-    for i in range(len(data)):
-        fig.add_shape(type="rect", x0=0, y0=i-0.5, x1=limite_eixo, y1=i+0.5, line=dict(color='rgba(255, 255, 255, 0.1)', width=1.5), fillcolor="#2C3E50", layer="below")
-    
-    # Linha de partida
-    fig.add_shape(type="line", x0=0, y0=-0.5, x1=0, y1=len(data)-0.5, line=dict(color="#10B981", width=4, dash="solid"), layer="above")
-    
-    # Bandeira de chegada
-    square_size = max(0.5, duracao_total_horas / 40)
-    num_cols = 2 
-    for i in range(math.ceil((len(data)+0.5) / square_size)):
-        for j in range(num_cols):
-            color = "white" if (i + j) % 2 == 0 else "black"
-            fig.add_shape(type="rect", x0=duracao_total_horas + (j * square_size), y0=i*square_size - 0.5, x1=duracao_total_horas + ((j+1) * square_size), y1=(i+1)*square_size - 0.5, line=dict(width=0.5, color="black"), fillcolor=color, layer="above")
-    
-    # Texto com informações
-    hover_texts = [
-        f"<b>{row['Nome_Exibicao']}</b><br>Avanço: {row['Posicao_Horas']:.2f}h<br>Progresso: {row['Progresso']:.1f}%<br>Impulso: {format_hours_and_minutes(row['Boost_Total_Min'] / 60)}<br>Faltam: {format_hours_and_minutes(row['Tempo_Faltante_Horas'])}<br>Rank: #{row['Rank']}"
-        for i, row in data.iterrows()
-    ]
-    y_text = data.index - 0.35
-    fig.add_trace(go.Scatter(x=data['Posicao_Horas'], y=y_text, mode='text', text=data['Nome_Exibicao'], textposition="top center", textfont=dict(color='white', size=10), hoverinfo='text', hovertext=hover_texts, showlegend=False))
-    
-    # Adicionar carros (sem animação complexa por enquanto)
-    for i, row in data.iterrows():
-        fig.add_layout_image(dict(
-            source=CAR_ICON_URL, 
-            xref="x", 
-            yref="y", 
-            x=row['Posicao_Horas'], 
-            y=i, 
-            sizex=max(1.8, duracao_total_horas / 20), 
-            sizey=0.9, 
-            layer="below", 
-            xanchor="center", 
-            yanchor="middle"
-        ))
-    
-    # Configuração dos eixos e layout
-    fig.update_xaxes(
-        range=[-limite_eixo*0.02, limite_eixo * 1.05], 
-        title_text="Avanço na Pista (dias/horas) →", 
-        fixedrange=True, 
-        tick0=0, 
-        dtick=1, 
-        showgrid=False
-    )
-    fig.update_yaxes(
-        showgrid=False, 
-        zeroline=False, 
-        tickvals=list(range(len(data))), 
-        ticktext=[], 
-        fixedrange=True
-    )
-    
-    fig.update_layout(
-        height=max(600, 300 + 60*len(data)), 
-        margin=dict(l=10, r=10, t=80, b=40), 
-        plot_bgcolor="#1A2A3A", 
-        paper_bgcolor="rgba(26,42,58,0.7)"
-    )
-    
-    return fig
-
-def render_geral_page():
+def render_geral_page(particao: circuito_store.Particao):
+    from circuito_charts import PISTA_MAX_LANES, build_pista_fig, build_replay_fig, select_lanes
     st.header("Visão Geral da Corrida")
-    df_final = st.session_state.get('df_final')
-    if df_final is None or df_final.empty:
+    df_final, duracao_horas, baseline_horas = particao.ranking
+    if df_final.empty:
         st.warning("Sem dados para exibir com a seleção atual.")
         return
-    duracao_horas = st.session_state.get('duracao_horas', 0)
-    baseline_horas = st.session_state.get('baseline_horas', 0)
     dias_restantes = duracao_horas - baseline_horas
     
     # Métricas com animação
@@ -330,47 +177,42 @@ def render_geral_page():
     render_podio_table(df_final, baseline_horas)
     
     st.markdown("### Pista de Corrida do Circuito")
-    fig_pista = build_pista_fig(df_final, st.session_state.get('duracao_horas', 0))
+    pista_df, destaque = df_final, None
+    if len(df_final) > PISTA_MAX_LANES:
+        # Redes grandes: mostra uma janela do ranking e, opcionalmente, a loja do usuário
+        n_paginas = math.ceil(len(df_final) / PISTA_MAX_LANES)
+        col_pag, col_loja = st.columns(2)
+        pagina = col_pag.selectbox("Posições na pista", range(n_paginas), format_func=lambda p: f"{p*PISTA_MAX_LANES + 1}º a {min((p+1)*PISTA_MAX_LANES, len(df_final))}º")
+        destaque = col_loja.selectbox("Destacar loja", [None] + sorted(df_final["Nome_Exibicao"].unique().tolist()), format_func=lambda n: n or "Nenhuma")
+        pista_df = select_lanes(df_final, PISTA_MAX_LANES, destaque, pagina)
+    if st.toggle("Replay do ciclo por período", value=False):
+        # Os frames vão junto com a figura: a animação roda no navegador, sem rerun a cada período
+        fig_pista = build_replay_fig(pista_df, get_data_store().replay(particao), duracao_horas, destaque)
+    else:
+        fig_pista = build_pista_fig(pista_df, duracao_horas, destaque)
+    if circuito_metrics.enabled(): circuito_metrics.record_size("pista_fig_json", len(fig_pista.to_json()))
     st.plotly_chart(fig_pista, use_container_width=True)
     
     st.markdown("### Classificação Completa")
     show_details = st.toggle("Mostrar detalhes por etapa", value=False)
-    score_cols = st.session_state.get('etapas_scores_cols', [])
-    score_cols_with_data = [col for col in score_cols if col in df_final.columns and df_final[col].sum() > 0]
-    
-    # Tabela com animação
-    headers = ["Rank", "Loja", "Tempo Restante", "Progresso", "Impulso Total"]
-    if show_details:
-        headers.extend([col.replace('_Score', '') for col in score_cols_with_data])
-    
-    html = [f"<table class='race-table'><thead><tr>{''.join(f'<th>{h}</th>' for h in headers)}</tr></thead><tbody>"]
-    
-    for i, row in df_final.iterrows():
-        rank, zebra_class = row['Rank'], 'zebra' if i % 2 != 0 else ''
-        rank_class = f'rank-{rank}' if rank <= 3 else ''
-        prog_bar = f"<div class='progress-bar-container'><div class='progress-bar animated-progress-bar' style='--progress-width: {min(row['Progresso'], 100)}%; width: {min(row['Progresso'], 100)}%;'>{row['Progresso']:.1f}%</div></div>"
-        
-        html.append(f"<tr class='{zebra_class} fade-in' style='animation-delay: {i*0.05}s;'>")
-        html.append(f"<td class='rank-cell {rank_class}'>{rank}</td>")
-        html.append(f"<td class='loja-cell'>{row['Nome_Exibicao']}</td>")
-        html.append(f"<td>{format_hours_and_minutes(row['Tempo_Faltante_Horas'])}</td>")
-        html.append(f"<td>{prog_bar}</td>")
-        html.append(f"<td>+{format_hours_and_minutes(row['Boost_Total_Min'] / 60)}</td>")
-
-        if show_details:
-            for col in score_cols_with_data:
-                 html.append(f"<td>{format_hours_and_minutes(row.get(col, 0) / 60)}</td>")
-        html.append("</tr>")
-        
-    html.append("</tbody></table>")
-    st.markdown("".join(html), unsafe_allow_html=True)
-
-def render_loja_page():
+    score_cols = particao.prepared.etapas_scores_cols
+    page = 0
+    n_paginas = count_pages(len(df_final))
+    if n_paginas > 1:
+        page = st.selectbox("Posições na classificação", range(n_paginas), format_func=lambda p: f"{p*TABELA_PAGE_SIZE + 1}º a {min((p+1)*TABELA_PAGE_SIZE, len(df_final))}º")
+
+    # Tabela com animação (HTML em cache por ciclo, detalhes e página)
+    circuito_metrics.cache_call("render_ranking_table")
+    html = render_ranking_table(particao.version, particao.ciclo, show_details, page, df_final, score_cols)
+    circuito_metrics.record_size("ranking_table_html", len(html))
+    st.markdown(html, unsafe_allow_html=True)
+
+def render_loja_page(particao: circuito_store.Particao):
+    from circuito_charts import build_radar_fig
     st.header("Visão por Loja")
-    df_final = st.session_state.get('df_final')
-    etapas_pesos_df = st.session_state.get('etapas_pesos_df', pd.DataFrame())
+    df_final = particao.ranking.df_final
 
-    if df_final is None or df_final.empty:
+    if df_final.empty:
         st.warning("Selecione um Ciclo para ver os detalhes da loja.")
         return
 
@@ -380,7 +222,10 @@ def render_loja_page():
     if not loja_sel:
         return
 
-    loja_row = df_final[df_final["Nome_Exibicao"] == loja_sel].iloc[0]
+    # Gaps, rival e diferença de todas as lojas do ciclo já vêm calculados; aqui só se consulta a loja
+    gap_analysis = get_data_store().gap_analysis(particao)
+    analise = gap_analysis.for_loja(loja_sel)
+    loja_row, df_melhoria, rival = analise
 
     # Métricas principais
     col1, col2, col3, col4 = st.columns(4)
@@ -395,50 +240,30 @@ def render_loja_page():
 
     st.markdown("---")
 
-    # Preparação dos dados de melhoria
-    ciclo = st.session_state.ciclo
-    df_melhoria = pd.DataFrame()
-    if not etapas_pesos_df.empty:
-        df_pesos_ciclo = etapas_pesos_df[etapas_pesos_df['Ciclo'] == ciclo]
-        pesos_etapas = df_pesos_ciclo.groupby('Etapa')['PesoMaximo'].sum().to_dict()
-        etapas_data = []
-        for etapa_col in st.session_state.etapas_scores_cols:
-            peso_max = pesos_etapas.get(etapa_col, 0)
-            if peso_max > 0:
-                etapa_name = etapa_col.replace('_Score', '')
-                score_atual = loja_row.get(etapa_col, 0)
-                etapas_data.append({
-                    'Etapa': etapa_name,
-                    'Impulso Atual': score_atual,
-                    'Impulso Máximo': peso_max,
-                    'Gap': max(0, peso_max - score_atual)
-                })
-        if etapas_data:
-            df_melhoria = pd.DataFrame(etapas_data).sort_values('Gap', ascending=False, ignore_index=True)
-
     col_insight, col_chart = st.columns([1, 2])
 
     with col_insight:
         st.subheader("Análise Estratégica")
         if loja_row['Rank'] == 1:
-            if len(df_final) > 1:
-                loja_vice = df_final[df_final['Rank'] == 2].iloc[0]
-                vantagem_horas = (loja_row['Posicao_Horas'] - loja_vice['Posicao_Horas'])
+            if rival is not None:
                 st.success(f"""
                 **Você é o líder do Circuito! 🚀**
-                Sua vantagem sobre a loja **{loja_vice['Nome_Exibicao']}** é de **{format_hours_and_minutes(vantagem_horas)}**.
+                Sua vantagem sobre a loja **{rival['Rival_Nome']}** é de **{format_hours_and_minutes(rival['Diferenca_Horas'])}**.
                 """)
                 st.markdown("**Como manter a liderança:**")
             else:
                 st.success("**Você é o líder isolado do Circuito! 🏆**")
         else:
-            rank_alvo = loja_row['Rank'] - 1
-            loja_alvo = df_final[df_final['Rank'] == rank_alvo].iloc[0]
-            diff_horas = (loja_alvo['Posicao_Horas'] - loja_row['Posicao_Horas'])
             st.warning(f"""
-            **Meta: Ultrapassar {loja_alvo['Nome_Exibicao']}!**
-            A diferença é de apenas **{format_hours_and_minutes(diff_horas)}**.
+            **Meta: Ultrapassar {rival['Rival_Nome']}!**
+            A diferença é de apenas **{format_hours_and_minutes(rival['Diferenca_Horas'])}**.
             """)
+            # Relatório de ultrapassagens do ciclo: os gaps abertos bastam para passar o rival?
+            alvo = get_data_store().overtake_report(particao).iloc[gap_analysis.row_by_nome[loja_sel]]
+            if alvo['Pode_Ultrapassar']:
+                st.markdown(f"Fechando os gaps do plano, a loja ganha até **{format_hours_and_minutes(alvo['Potencial_Horas'])}**: dá para ultrapassar neste ciclo.")
+            else:
+                st.markdown(f"Mesmo fechando todos os gaps (até **{format_hours_and_minutes(alvo['Potencial_Horas'])}**), a loja não alcança {rival['Rival_Nome']} neste ciclo.")
             st.markdown("**Plano de Ação:**")
 
         top_melhorias = df_melhoria[df_melhoria['Gap'] > 0.1].head(3)
@@ -451,63 +276,26 @@ def render_loja_page():
     with col_chart:
         st.subheader("Desempenho por Etapa")
         if not df_melhoria.empty:
-            fig = go.Figure()
-
-            # Camada 1: Desempenho Atual (área preenchida)
-            fig.add_trace(go.Scatterpolar(
-                r=df_melhoria['Impulso Atual'],
-                theta=df_melhoria['Etapa'],
-                fill='toself',
-                fillcolor='rgba(0, 176, 246, 0.4)',
-                line=dict(color='rgba(0, 176, 246, 1)', width=2),
-                name='Impulso Atual (minutos)'
-            ))
-
-            # Layout adaptativo com EIXO RADIAL VISÍVEL
-            fig.update_layout(
-                showlegend=True,
-                legend=dict(x=0.5, y=-0.15, xanchor="center", orientation="h"),
-                polar=dict(
-                    # Configuração do eixo radial (notas) para ser visível
-                    radialaxis=dict(
-                        visible=True,
-                        showticklabels=True,
-                        range=[0, df_melhoria['Impulso Máximo'].max()],
-                        gridcolor="rgba(128, 128, 128, 0.3)" # Cor neutra para a grade
-                    ),
-                    # Configuração do eixo angular (etapas)
-                    angularaxis=dict(
-                        linewidth=1,
-                        gridcolor="rgba(128, 128, 128, 0.3)" # Cor neutra para a grade
-                    )
-                ),
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="rgba(0,0,0,0)",
-                margin=dict(l=60, r=60, t=80, b=60),
-                height=450
-            )
+            fig = build_radar_fig(df_melhoria)
 
             # O tema "streamlit" garante que os textos dos eixos se adaptem ao tema claro/escuro
             st.plotly_chart(fig, use_container_width=True, theme="streamlit")
         else:
             st.info("Não há dados de desempenho por etapa para exibir.")
 
-def render_etapa_page():
+def render_etapa_page(particao: circuito_store.Particao):
+    import plotly.graph_objects as go
     st.header("Visão por Etapa")
-    df_final = st.session_state.get('df_final')
-    etapas_scores_cols = st.session_state.get('etapas_scores_cols', [])
-    if df_final is None or df_final.empty:
+    if particao.ranking.df_final.empty:
         st.warning("Selecione um Ciclo para ver os detalhes da etapa.")
         return
     
-    etapa_options = [c.replace('_Score', '') for c in etapas_scores_cols if c in df_final.columns and df_final[c].sum() > 0]
-    etapa_sel = st.selectbox("Selecione a Etapa:", sorted(etapa_options))
+    # Top-K de todas as etapas do ciclo pré-calculado; o selectbox só escolhe qual mostrar
+    top_k = get_data_store().etapa_top_k(particao)
+    etapa_sel = st.selectbox("Selecione a Etapa:", top_k.etapas_com_dados)
     
     if etapa_sel:
-        col_name = f"{etapa_sel}_Score"
-        df_etapa = df_final[['Nome_Exibicao', col_name]].copy()
-        df_etapa.rename(columns={col_name: "Impulso na Etapa (min)"}, inplace=True)
-        df_etapa.sort_values("Impulso na Etapa (min)", ascending=False, inplace=True)
+        df_etapa = top_k.for_etapa(etapa_sel)
         
         st.subheader(f"Ranking da Etapa: {etapa_sel}")
         
@@ -515,8 +303,8 @@ def render_etapa_page():
         fig = go.Figure()
         
         fig.add_trace(go.Bar(
-            x=df_etapa.head(10)["Impulso na Etapa (min)"],
-            y=df_etapa.head(10)["Nome_Exibicao"],
+            x=df_etapa["Impulso na Etapa (min)"],
+            y=df_etapa["Nome_Exibicao"],
             orientation='h',
             marker=dict(color='#6EE7B7'),
             name=etapa_sel
@@ -535,7 +323,91 @@ def render_etapa_page():
         st.plotly_chart(fig, use_container_width=True)
         
         # Tabela com os dados
-        st.dataframe(df_etapa.head(10).reset_index(drop=True), use_container_width=True, hide_index=True)
+        st.dataframe(df_etapa, use_container_width=True, hide_index=True)
+
+def render_campeonato_page(dados: circuito_store.Snapshot, temporada: int):
+    from circuito_campeonato import PONTOS_POR_POSICAO
+    from circuito_charts import CAMPEONATO_TOP, build_campeonato_fig
+    # Classificação acumulada da temporada; o store só refaz os ciclos cujos dados mudaram
+    with st.spinner("Calculando o campeonato..."):
+        camp = get_data_store().campeonato(dados, temporada)
+    st.markdown("<div class='app-header'>", unsafe_allow_html=True)
+    st.markdown("<h1>Circuito MiniPreço</h1>", unsafe_allow_html=True)
+    st.markdown(f"<p>Temporada: <b>{temporada}</b> | Campeonato: <b>{len(camp.ciclos)} ciclo(s) disputado(s)</b></p>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.header("Campeonato da Temporada")
+    df_camp = camp.classificacao
+    if df_camp.empty:
+        st.warning("Sem dados para exibir com a seleção atual.")
+        return
+    st.caption("Pontos por posição final em cada ciclo: " + ", ".join(f"{i}º {p}" for i, p in enumerate(PONTOS_POR_POSICAO, 1)) + ".")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Líder do Campeonato", df_camp['Nome_Exibicao'].iloc[0])
+    col2.metric("Pontos do Líder", f"{df_camp['Pontos'].iloc[0]}")
+    col3.metric("Ciclos Disputados", f"{len(camp.ciclos)}")
+
+    st.markdown("### Pódio da Temporada")
+    cols = st.columns(3)
+    for i, row in df_camp.head(3).iterrows():
+        with cols[i]:
+            st.markdown(
+                f"<div class='podio-card fade-in' style='padding:18px; border-radius:12px; background:linear-gradient(180deg,#0f172a,#111827);color:white; text-align:center; height: 100%; border: 1px solid #374151; animation-delay: {i*0.2}s;'>"
+                f"<h3>{row['Posicao']}º — {row['Nome_Exibicao']}</h3>"
+                f"<p class='metric-label'>Pontos</p>"
+                f"<h2>{row['Pontos']}</h2>"
+                f"<p class='secondary-metric'>Vitórias: {row['Vitorias']} | Pódios: {row['Podios']}</p>"
+                f"</div>", unsafe_allow_html=True
+            )
+
+    st.markdown("### Evolução das Posições")
+    destaque = st.selectbox("Destacar loja no gráfico", [None] + sorted(df_camp['Nome_Exibicao'].tolist()), format_func=lambda n: n or "Nenhuma")
+    lojas = df_camp['Nome_Exibicao'].head(CAMPEONATO_TOP).tolist()
+    if destaque and destaque not in lojas: lojas.append(destaque)
+    st.plotly_chart(build_campeonato_fig(camp.evolucao, lojas, destaque), use_container_width=True)
+
+    st.markdown("### Classificação")
+    movimento = df_camp['Movimento'].map(lambda m: f"▲ {m}" if m > 0 else (f"▼ {-m}" if m < 0 else "—"))
+    tabela = df_camp.drop(columns=['Loja']).assign(Movimento=movimento).rename(columns={
+        'Posicao': 'Posição', 'Nome_Exibicao': 'Loja', 'Vitorias': 'Vitórias', 'Podios': 'Pódios', 'Melhor_Posicao': 'Melhor Posição'})
+    st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+def render_diagnostico_page():
+    # Página oculta: só aparece com CIRCUITO_METRICS=1. Os números são do processo inteiro, não só desta sessão
+    st.header("Diagnóstico")
+    snap = circuito_metrics.snapshot()
+    if st.button("Zerar métricas"):
+        circuito_metrics.reset()
+        st.rerun()
+
+    st.subheader("Tempo por etapa")
+    if snap["stages"]:
+        df_stages = pd.DataFrame.from_dict(snap["stages"], orient="index")
+        df_stages["media_ms"] = df_stages["total_s"] / df_stages["calls"] * 1000
+        for col in ("total_s", "max_s", "last_s"):
+            df_stages[col.replace("_s", "_ms")] = df_stages.pop(col) * 1000
+        st.dataframe(df_stages.sort_values("total_ms", ascending=False).round(2), use_container_width=True)
+    else:
+        st.info("Nenhuma medição ainda.")
+
+    col_cache, col_disco = st.columns(2)
+    with col_cache:
+        st.subheader("Caches (Streamlit e store)")
+        st.dataframe(pd.DataFrame.from_dict(snap["caches"], orient="index"), use_container_width=True)
+    with col_disco:
+        st.subheader("Cache em disco (Parquet)")
+        st.json(circuito_cache.cache_stats())
+
+    st.subheader("Payloads (bytes) e contadores")
+    st.json({"sizes": snap["sizes"], "counters": snap["counters"]})
+    st.subheader("Última atualização dos dados")
+    st.json(get_data_store().last_refresh or {})
+    st.subheader("Partições em memória (LRU: a primeira é a próxima a sair)")
+    st.dataframe(pd.DataFrame(get_data_store().particoes_em_memoria()), use_container_width=True, hide_index=True)
+    fetcher = get_data_store().fetcher
+    source = fetcher.source
+    st.caption(f"Origem: {source!r} | último erro: {fetcher.last_error or 'nenhum'}"
+               + (f" | requisições: {source.requests_made} (304: {source.not_modified})" if hasattr(source, "requests_made") else ""))
 
 # ----------------------------------------------------------------------
 # Estrutura Principal do App
@@ -543,16 +415,19 @@ def render_etapa_page():
 if 'page' not in st.session_state: st.session_state.page = "Geral"
 
 with st.spinner("Carregando base de dados..."):
-    all_sheets = get_data_from_github()
-if not all_sheets: st.stop()
-
-data, etapas_scores, periodos_df, etapas_pesos_df = load_and_prepare_data(all_sheets)
-st.session_state.update({'data_original': data, 'etapas_scores_cols': etapas_scores, 'periodos_df': periodos_df, 'etapas_pesos_df': etapas_pesos_df})
+    dados = get_data()
+if dados is None: st.stop()
+if API_PORT: start_api_server()
 
 with st.sidebar:
     st.image("https://cdn-retailhub.com/minipreco/096c9b29-4ac3-425f-8322-be76b794f040.webp", use_container_width=True)
     st.markdown("---<h3>Seleção de Ciclo</h3>", unsafe_allow_html=True)
-    ciclos_unicos = periodos_df["Ciclo"].dropna().unique().tolist() if not periodos_df.empty else []
+    # Só o catálogo está carregado aqui; a partição (Temporada, Ciclo) escolhida é lida sob demanda
+    temporadas = dados.temporadas()
+    if not temporadas: st.stop()
+    temporada_selecionada = st.selectbox("Temporada", temporadas, index=len(temporadas)-1, label_visibility="collapsed")
+    st.session_state.temporada = temporada_selecionada
+    ciclos_unicos = dados.ciclos(temporada_selecionada)
     if not ciclos_unicos: st.stop()
     sort_order_map = {name: i for i, name in enumerate(MONTH_MAP.keys())}
     sorted_ciclos = sorted(ciclos_unicos, key=lambda m: sort_order_map.get(m, -1))
@@ -562,17 +437,28 @@ with st.sidebar:
     st.button("Visão Geral", on_click=set_page, args=("Geral",), use_container_width=True, type="primary" if st.session_state.page == "Geral" else "secondary")
     st.button("Visão por Loja", on_click=set_page, args=("Loja",), use_container_width=True, type="primary" if st.session_state.page == "Loja" else "secondary")
     st.button("Visão por Etapa", on_click=set_page, args=("Etapa",), use_container_width=True, type="primary" if st.session_state.page == "Etapa" else "secondary")
+    st.button("Campeonato", on_click=set_page, args=("Campeonato",), use_container_width=True, type="primary" if st.session_state.page == "Campeonato" else "secondary")
+    if circuito_metrics.enabled():
+        st.button("Diagnóstico", on_click=set_page, args=("Diagnostico",), use_container_width=True, type="primary" if st.session_state.page == "Diagnostico" else "secondary")
 
 if st.session_state.get('ciclo'):
-    df_final, duracao_horas, baseline_horas = filter_and_aggregate_data(st.session_state.data_original, st.session_state.etapas_scores_cols, st.session_state.ciclo)
-    st.session_state.update({'df_final': df_final, 'duracao_horas': duracao_horas, 'baseline_horas': baseline_horas})
-    
-    render_header_and_periodo("Circuito MiniPreço", st.session_state.ciclo, st.session_state.get('duracao_horas', 0), st.session_state.get('baseline_horas', 0))
-    
+    temporada, ciclo = st.session_state.temporada, st.session_state.ciclo
     page = st.session_state.page
-    if page == "Geral":
-        render_geral_page()
-    elif page == "Loja":
-        render_loja_page()
-    elif page == "Etapa":
-        render_etapa_page()
+    # O Campeonato é da temporada inteira: não precisa da partição do ciclo selecionado
+    if page != "Campeonato":
+        with st.spinner("Carregando ciclo..."):
+            particao = get_data_store().particao(dados, temporada, ciclo)
+        _, duracao_horas, baseline_horas = particao.ranking
+        render_header_and_periodo("Circuito MiniPreço", temporada, ciclo, duracao_horas, baseline_horas)
+
+    with circuito_metrics.timer("render_page", page=page):
+        if page == "Campeonato":
+            render_campeonato_page(dados, temporada)
+        elif page == "Geral":
+            render_geral_page(particao)
+        elif page == "Loja":
+            render_loja_page(particao)
+        elif page == "Etapa":
+            render_etapa_page(particao)
+        elif page == "Diagnostico" and circuito_metrics.enabled():
+            render_diagnostico_page()
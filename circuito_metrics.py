@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# circuito_metrics.py — Cronômetros e contadores por etapa do carregamento
+#
+# Mede busca da planilha, leitura do xlsx, preparo dos dados, cálculo do
+# ranking, montagem da pista e da tabela HTML, além de acertos/faltas dos
+# caches do Streamlit e tamanho dos payloads. Cada medição vira uma linha de
+# log JSON (logger "circuito.metrics") e alimenta a página de diagnóstico.
+# Desligado (padrão), timer() devolve um contexto vazio e timed() chama a
+# função direto: o custo é uma verificação de flag.
+#
+# Ligar: CIRCUITO_METRICS=1 (ou enable() em tempo de execução).
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+logger = logging.getLogger("circuito.metrics")
+
+_enabled = os.environ.get("CIRCUITO_METRICS", "") not in ("", "0")
+_NULL = nullcontext()
+
+# ----------------------------------------------------------------------
+# Registro
+# ----------------------------------------------------------------------
+@dataclass
+class StageStats:
+    calls: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    last_s: float = 0.0
+
+_stages: Dict[str, StageStats] = {}
+_counters: Dict[str, int] = {}
+_sizes: Dict[str, int] = {}
+_lock = threading.Lock()
+
+def enabled() -> bool:
+    return _enabled
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+    if on and not logger.handlers and not logging.getLogger().handlers:
+        # Sem configuração de logging no processo: as linhas JSON vão para o stderr
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+def _log(event: str, **fields):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False, default=str))
+
+def record_stage(stage: str, seconds: float, **fields):
+    with _lock:
+        st = _stages.setdefault(stage, StageStats())
+        st.calls += 1
+        st.total_s += seconds
+        st.max_s = max(st.max_s, seconds)
+        st.last_s = seconds
+    _log("stage", stage=stage, ms=round(seconds * 1000, 3), **fields)
+
+@contextmanager
+def _timer(stage: str, fields: dict):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, **fields)
+
+def timer(stage: str, **fields):
+    return _timer(stage, fields) if _enabled else _NULL
+
+def timed(stage: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled: return fn(*args, **kwargs)
+            with _timer(stage, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name: str, n: int = 1):
+    if not _enabled: return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def record_size(name: str, nbytes: int):
+    if not _enabled: return
+    with _lock:
+        _sizes[name] = nbytes
+    _log("size", name=name, bytes=nbytes)
+
+# ----------------------------------------------------------------------
+# Caches do Streamlit: a chamada conta no ponto de uso, a falta dentro da função cacheada
+# ----------------------------------------------------------------------
+def cache_call(name: str):
+    count(f"cache.{name}.calls")
+
+def cache_miss(name: str):
+    count(f"cache.{name}.misses")
+    if _enabled: _log("cache_miss", cache=name)
+
+def cache_summary() -> Dict[str, dict]:
+    with _lock:
+        nomes = {k.split(".")[1] for k in _counters if k.startswith("cache.")}
+        resumo = {}
+        for nome in sorted(nomes):
+            calls, misses = _counters.get(f"cache.{nome}.calls", 0), _counters.get(f"cache.{nome}.misses", 0)
+            resumo[nome] = {"calls": calls, "hits": max(0, calls - misses), "misses": misses}
+        return resumo
+
+# ----------------------------------------------------------------------
+# Leitura
+# ----------------------------------------------------------------------
+def snapshot() -> dict:
+    with _lock:
+        stages = {name: asdict(st) for name, st in _stages.items()}
+        counters, sizes = dict(_counters), dict(_sizes)
+    return {"enabled": _enabled, "stages": stages, "caches": cache_summary(), "counters": counters, "sizes": sizes}
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _sizes.clear()
+
+if _enabled: enable()
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+# circuito_store.py — Dados do Circuito compartilhados por todas as sessões
+#
+# Um único store por processo guarda a versão atual da planilha (Snapshot):
+# o catálogo das partições (Temporada, Ciclo) do cache em disco. Todas as
+# sessões do app e a API JSON recebem referências aos mesmos objetos, em vez
+# de cópias por sessão: st.session_state fica só com as seleções (página,
+# temporada, ciclo, loja). Os quadros são somente leitura — quem precisar
+# alterar algo trabalha numa cópia.
+#
+# Partições: cada (Temporada, Ciclo) é carregada do Parquet só quando alguma
+# sessão a seleciona, com o ranking calculado junto, e fica num LRU de até
+# CIRCUITO_MAX_PARTICOES partições; as menos usadas saem. A chave é o hash do
+# conteúdo da partição e o avanço base do dia, então uma planilha nova só
+# invalida as partições que de fato mudaram. Resultados derivados (gaps,
+# top-K por etapa, replay) são calculados sob demanda uma vez por partição.
+#
+# Campeonato: a classificação da temporada guarda o resultado de cada ciclo
+# pelo hash da partição; uma planilha nova só recalcula os ciclos alterados
+# (em geral, o corrente), a partir da partição já em memória quando houver.
+#
+# Atualização em segundo plano: com start_refresher(), uma thread consulta a
+# origem periodicamente e monta o próximo Snapshot fora do caminho das
+# sessões, que continuam lendo o atual sem esperar. As partições alteradas
+# que estavam em memória são recalculadas antes da troca.
+#
+# process_store() devolve o store do processo; circuito_warmup o cria e
+# aquece (warm_up) antes de o servidor aceitar conexões, e o app reaproveita.
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+import circuito_analysis
+import circuito_cache
+import circuito_campeonato
+import circuito_engine as engine
+import circuito_fetch
+import circuito_metrics
+
+logger = logging.getLogger("circuito.store")
+
+# Intervalo entre consultas da thread de atualização; a origem em si só é
+# consultada quando o intervalo do fetcher (CIRCUITO_POLL_SECONDS) permite
+REFRESH_INTERVAL_S = float(os.environ.get("CIRCUITO_REFRESH_SECONDS", 30))
+# Partições (Temporada, Ciclo) mantidas em memória ao mesmo tempo
+MAX_PARTICOES = int(os.environ.get("CIRCUITO_MAX_PARTICOES", 12))
+
+class Snapshot(NamedTuple):
+    version: str                             # "<hash da planilha>|<dia>"
+    digest: str
+    dia: str
+    catalog: circuito_cache.Catalog
+
+    def temporadas(self) -> List[int]:
+        return self.catalog.temporadas()
+
+    def temporada_atual(self) -> Optional[int]:
+        temporadas = self.temporadas()
+        return temporadas[-1] if temporadas else None
+
+    def ciclos(self, temporada: int) -> List[str]:
+        return self.catalog.ciclos(temporada)
+
+class Particao(NamedTuple):
+    temporada: int
+    ciclo: str
+    hoje: datetime
+    prepared: engine.PreparedData
+    ranking: engine.CicloRanking
+    version: str                             # muda só quando o ranking da partição muda: chave para caches
+    memo: dict                               # nome -> resultado derivado
+    travas: dict                             # nome -> lock do cálculo desse derivado
+
+def changed_etapas(antes: Optional[Dict[str, str]], depois: Optional[Dict[str, str]]) -> List[str]:
+    if antes is None or depois is None: return ["*"]
+    return sorted(k for k in set(antes) | set(depois) if antes.get(k) != depois.get(k))
+
+# ----------------------------------------------------------------------
+# Store
+# ----------------------------------------------------------------------
+class DataStore:
+    def __init__(self, fetcher: circuito_fetch.WorkbookFetcher, cache_dir=None, max_particoes: int = MAX_PARTICOES):
+        self.fetcher = fetcher
+        self.cache_dir = cache_dir
+        self.max_particoes = max(1, max_particoes)
+        self._lock = threading.Lock()
+        # Só protege a criação dos locks por (partição, derivado); nenhum cálculo roda com ele preso
+        self._memo_lock = threading.Lock()
+        # LRU das partições; cada chave em carga tem o seu lock, para duas sessões não carregarem a mesma
+        self._lru_lock = threading.Lock()
+        self._particoes: "OrderedDict[tuple, Particao]" = OrderedDict()
+        self._carregando: Dict[tuple, threading.Lock] = {}
+        # Campeonato por temporada: (hashes das partições, Campeonato, resultados por (ciclo, hash))
+        self._campeonato_lock = threading.Lock()
+        self._campeonatos: Dict[int, tuple] = {}
+        self._snapshot: Optional[Snapshot] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_refresh: Optional[dict] = None   # resumo da última troca de Snapshot (página Diagnóstico)
+
+    def current(self, dia: Optional[str] = None) -> Snapshot:
+        # Com a thread de atualização rodando, as sessões nunca esperam: leem o Snapshot atual.
+        # Sem ela (ou antes da primeira carga), a atualização acontece aqui mesmo.
+        snap = self._snapshot
+        if snap is not None and dia is None and self._refresher is not None: return snap
+        return self.refresh(dia)
+
+    def refresh(self, dia: Optional[str] = None, force: bool = False) -> Snapshot:
+        # A busca já é limitada pelo fetcher; só há trabalho quando a planilha ou o dia mudam
+        workbook = self.fetcher.get(force)
+        dia = dia or date.today().isoformat()
+        snap = self._snapshot
+        if snap is not None and snap.digest == workbook.digest and snap.dia == dia: return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.digest == workbook.digest and snap.dia == dia: return snap
+            circuito_metrics.cache_miss("data_store")
+            with circuito_metrics.timer("store_refresh"):
+                novo = self._build(workbook, dia, snap)
+            # Troca atômica: quem já leu o Snapshot anterior continua com ele
+            self._snapshot = novo
+            return novo
+
+    def _build(self, workbook: circuito_fetch.FetchResult, dia: str, old: Optional[Snapshot]) -> Snapshot:
+        start = time.perf_counter()
+        # Mesmo conteúdo em outro dia: o catálogo é reaproveitado, só o avanço base pode mudar
+        catalog = old.catalog if old is not None and old.digest == workbook.digest else \
+            circuito_cache.load_catalog(workbook.content, self.cache_dir, digest=workbook.digest)
+        novo = Snapshot(f"{workbook.digest}|{dia}", workbook.digest, dia, catalog)
+        antes = old.catalog.partitions if old is not None else {}
+        alteradas = {f"{t}/{c}": changed_etapas(antes[(t, c)].digests if (t, c) in antes else None, p.digests)
+                     for (t, c), p in catalog.partitions.items() if (t, c) not in antes or antes[(t, c)].digest != p.digest}
+
+        # Partições em uso que mudaram (conteúdo ou avanço base) são recalculadas antes da troca,
+        # para nenhuma sessão pagar a carga; as que não mudaram seguem no LRU como estão
+        with self._lru_lock:
+            # (Temporada, Ciclo) em uso, da mais para a menos recente, e a chave de cada uma no novo Snapshot
+            em_uso = list({k[:2]: self._key(novo, *k[:2]) for k in reversed(self._particoes)}.items())[:self.max_particoes]
+            recalculadas = [f"{t}/{c}" for (t, c), key in em_uso if key is not None and key not in self._particoes]
+        for (t, c), key in reversed(em_uso):   # recarrega mantendo a ordem do LRU
+            if key is not None: self.particao(novo, t, c)
+        # Campeonatos já abertos: só os ciclos alterados são refeitos, com as partições recém-carregadas
+        campeonatos = [t for t in list(self._campeonatos) if t in catalog.temporadas()]
+        for t in campeonatos: self.campeonato(novo, t)
+
+        self.last_refresh = {
+            "em": datetime.now().isoformat(timespec="seconds"), "versao": f"{workbook.digest[:12]}|{dia}",
+            "temporadas": catalog.temporadas(), "particoes_alteradas": alteradas, "particoes_recalculadas": recalculadas,
+            "campeonatos": campeonatos, "ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        circuito_metrics.count("store.particoes_alteradas", len(alteradas))
+        logger.info("Dados atualizados (%s): partições alteradas %s, recalculadas %s", self.last_refresh["versao"], list(alteradas), recalculadas)
+        return novo
+
+    # ------------------------------------------------------------------
+    # Partições (Temporada, Ciclo) sob demanda, com LRU
+    # ------------------------------------------------------------------
+    def _key(self, snap: Snapshot, temporada: int, ciclo: str) -> Optional[tuple]:
+        info = snap.catalog.partition(temporada, ciclo)
+        if info is None: return None
+        return (temporada, ciclo, info.digest, engine.get_baseline_horas(ciclo, datetime.fromisoformat(snap.dia), temporada))
+
+    def _cached(self, key: tuple) -> Optional[Particao]:
+        with self._lru_lock:
+            part = self._particoes.get(key)
+            if part is not None: self._particoes.move_to_end(key)
+            return part
+
+    def particao(self, snap: Snapshot, temporada: Optional[int], ciclo: str) -> Optional[Particao]:
+        if temporada is None: temporada = snap.temporada_atual()
+        key = self._key(snap, temporada, ciclo)
+        if key is None: return None
+        circuito_metrics.cache_call("particao")
+        part = self._cached(key)
+        if part is not None: return part
+        with self._lru_lock:
+            carga = self._carregando.setdefault(key, threading.Lock())
+        with carga:
+            part = self._cached(key)
+            if part is not None: return part
+            circuito_metrics.cache_miss("particao")
+            with circuito_metrics.timer("store_particao"):
+                part = self._load(snap, temporada, ciclo, key)
+            with self._lru_lock:
+                # Versões antigas de uma partição alterada não são mais pedidas e saem primeiro pelo LRU
+                self._particoes[key] = part
+                self._carregando.pop(key, None)
+                while len(self._particoes) > self.max_particoes:
+                    self._particoes.popitem(last=False)
+                    circuito_metrics.count("store.particoes_descartadas")
+        return part
+
+    def _load(self, snap: Snapshot, temporada: int, ciclo: str, key: tuple) -> Particao:
+        hoje = datetime.fromisoformat(snap.dia)
+        prepared = snap.catalog.load(temporada, ciclo)
+        ranking = engine.compute_all_rankings(prepared, hoje).get(ciclo, engine.CicloRanking(pd.DataFrame(), 0, 0))
+        version = hashlib.sha1(f"{key}|{ranking.duracao_horas}".encode()).hexdigest()[:16]
+        circuito_metrics.count("store.particoes_carregadas")
+        return Particao(temporada, ciclo, hoje, prepared, ranking, version, {}, {})
+
+    def warm_up(self, temporada: Optional[int] = None) -> dict:
+        # Planilha, partições, rankings e derivados de todos os ciclos da temporada (a mais recente),
+        # para a primeira sessão não pagar nada disso
+        start = time.perf_counter()
+        snap = self.current()
+        temporada = temporada if temporada is not None else snap.temporada_atual()
+        ciclos = snap.ciclos(temporada)[-self.max_particoes:] if temporada is not None else []
+        for ciclo in ciclos:
+            part = self.particao(snap, temporada, ciclo)
+            self.gap_analysis(part)
+            self.etapa_top_k(part)
+            self.replay(part)
+        if temporada is not None: self.campeonato(snap, temporada)
+        return {"versao": snap.version, "temporada": temporada, "ciclos": ciclos, "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def campeonato(self, snap: Snapshot, temporada: Optional[int] = None) -> circuito_campeonato.Campeonato:
+        # Classificação da temporada. Posições e pontos de um ciclo só dependem dos dados da partição
+        # (o avanço base do dia soma o mesmo para todas as lojas), então o hash da partição basta
+        if temporada is None: temporada = snap.temporada_atual()
+        ciclos = snap.ciclos(temporada) if temporada is not None else []
+        hashes = {c: snap.catalog.partition(temporada, c).digest for c in ciclos}
+        circuito_metrics.cache_call("campeonato")
+        anterior = self._campeonatos.get(temporada)
+        if anterior is not None and anterior[0] == hashes: return anterior[1]
+        with self._campeonato_lock:
+            anterior = self._campeonatos.get(temporada)
+            if anterior is not None and anterior[0] == hashes: return anterior[1]
+            circuito_metrics.cache_miss("campeonato")
+            with circuito_metrics.timer("store_campeonato"):
+                guardados = anterior[2] if anterior is not None else {}
+                resultados, faltando = {}, []
+                for c in ciclos:
+                    if (c, hashes[c]) in guardados:
+                        resultados[c] = guardados[(c, hashes[c])]
+                        continue
+                    circuito_metrics.count("store.campeonato_ciclos_recalculados")
+                    part = self._cached(self._key(snap, temporada, c))
+                    if part is not None: resultados[c] = circuito_campeonato.resultado_ciclo(part.ranking.df_final)
+                    else: faltando.append(c)
+                if faltando:
+                    # Os ciclos que faltam saem de uma única passada sobre as partições deles
+                    prepared = snap.catalog.load_temporada(temporada, faltando)
+                    resultados.update(circuito_campeonato.resultados_temporada(prepared, datetime.fromisoformat(snap.dia), faltando))
+                campeonato = circuito_campeonato.compute_campeonato(temporada, resultados, ciclos)
+            self._campeonatos[temporada] = (hashes, campeonato, {(c, hashes[c]): r for c, r in resultados.items()})
+            return campeonato
+
+    def particoes_em_memoria(self) -> List[dict]:
+        # Da menos para a mais usada recentemente (a primeira é a próxima a sair)
+        with self._lru_lock:
+            return [{"temporada": p.temporada, "ciclo": p.ciclo, "lojas": len(p.ranking.df_final), "versao": p.version,
+                     "mb": round(p.prepared.data.memory_usage(deep=True).sum() / 1e6, 3)} for p in self._particoes.values()]
+
+    # ------------------------------------------------------------------
+    # Atualização em segundo plano
+    # ------------------------------------------------------------------
+    def start_refresher(self, interval_s: float = REFRESH_INTERVAL_S) -> threading.Thread:
+        # Idempotente; a primeira carga também acontece na thread, e current() espera por ela no lock
+        with self._lock:
+            if self._refresher is not None: return self._refresher
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, args=(interval_s,), name="circuito-refresh", daemon=True)
+            self._refresher.start()
+            return self._refresher
+
+    def stop_refresher(self):
+        self._stop.set()
+        if self._refresher is not None: self._refresher.join()
+        self._refresher = None
+
+    def _refresh_loop(self, interval_s: float):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # Origem fora do ar ou planilha inválida: o Snapshot anterior continua valendo
+                circuito_metrics.count("store.refresh_errors")
+                logger.exception("Falha ao atualizar os dados do Circuito")
+            if self._stop.wait(interval_s): return
+
+    # ------------------------------------------------------------------
+    # Resultados derivados por partição
+    # ------------------------------------------------------------------
+    def derived(self, part: Particao, nome: str, fn: Callable):
+        circuito_metrics.cache_call(nome)
+        if nome in part.memo: return part.memo[nome]
+        # Um lock por (partição, derivado): quem pede o mesmo resultado espera o cálculo em curso;
+        # os demais derivados e partições seguem livres, e fn pode pedir outros derivados
+        with self._memo_lock:
+            trava = part.travas.setdefault(nome, threading.Lock())
+        with trava:
+            if nome not in part.memo:
+                circuito_metrics.cache_miss(nome)
+                part.memo[nome] = fn()
+        return part.memo[nome]
+
+    def gap_analysis(self, part: Particao) -> circuito_analysis.GapAnalysis:
+        p = part.prepared
+        return self.derived(part, "gap_analysis", lambda: circuito_analysis.compute_gap_analysis(
+            part.ranking.df_final, p.etapas_pesos_df, p.etapas_scores_cols, part.ciclo))
+
+    def overtake_report(self, part: Particao) -> pd.DataFrame:
+        # Uma linha por loja (ordem de df_final): rival, diferença e se os gaps bastam para ultrapassá-lo
+        return self.derived(part, "overtake_report", lambda: circuito_analysis.overtake_report(self.gap_analysis(part)))
+
+    def etapa_top_k(self, part: Particao, k: int = circuito_analysis.ETAPA_TOP_K) -> circuito_analysis.EtapaTopK:
+        return self.derived(part, f"etapa_top_k_{k}", lambda: circuito_analysis.compute_etapa_top_k(
+            part.ranking.df_final, part.prepared.etapas_scores_cols, k))
+
+    def replay(self, part: Particao):
+        return self.derived(part, "replay_positions", lambda: engine.compute_replay_positions(part.prepared, part.hoje).get(part.ciclo))
+
+# ----------------------------------------------------------------------
+# Store do processo
+# ----------------------------------------------------------------------
+_process_store: Optional[DataStore] = None
+_process_lock = threading.Lock()
+
+def process_store(credentials: Optional[dict] = None) -> DataStore:
+    # Um store por processo, criado por quem chegar primeiro (o aquecimento ou a primeira sessão),
+    # com a thread de atualização já rodando
+    global _process_store
+    with _process_lock:
+        if _process_store is None:
+            source = circuito_fetch.make_source(circuito_fetch.WORKBOOK_SOURCE, credentials)
+            _process_store = DataStore(circuito_fetch.WorkbookFetcher(source))
+            _process_store.start_refresher()
+        return _process_store
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# circuito_warmup.py — Aquece o processo do app antes de aceitar conexões
+#
+# Com `streamlit run`, o primeiro visitante de uma réplica nova paga a
+# cadeia inteira: busca da planilha, preparo (ou leitura do cache Parquet),
+# rankings do ciclo e a primeira figura do plotly. Este lançador faz tudo
+# isso no próprio processo do servidor e só depois sobe o Streamlit, que
+# reaproveita o store já aquecido (circuito_store.process_store): a porta só
+# abre quando a primeira página já pode sair rápida.
+#
+# Uso:
+#   python circuito_warmup.py                          # aquece e sobe o app
+#   python circuito_warmup.py --server.port 8080       # opções repassadas ao `streamlit run`
+#   python circuito_warmup.py --sem-servidor           # só aquece (grava o cache Parquet) e sai
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent / "circuito_lojas_app.py"
+
+logger = logging.getLogger("circuito.warmup")
+
+def warm_up() -> dict:
+    start = time.perf_counter()
+    # Módulos que o app importa: a primeira execução do script os encontra em sys.modules
+    import circuito_charts
+    import circuito_fetch
+    import circuito_html  # noqa: F401
+    import circuito_store
+
+    # As mesmas credenciais do app, pelo mesmo helper: o store aquecido é o que as sessões vão usar
+    resumo = circuito_store.process_store(circuito_fetch.sharepoint_credentials()).warm_up()
+    circuito_charts.warm_up()
+    resumo["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return resumo
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    sem_servidor = "--sem-servidor" in argv
+    if sem_servidor: argv.remove("--sem-servidor")
+    try:
+        resumo = warm_up()
+        logger.info("Aquecimento concluído: %s", resumo)
+    except Exception:
+        # Origem fora do ar: o servidor sobe assim mesmo e a primeira sessão tenta de novo
+        logger.exception("Falha no aquecimento; o app carrega os dados na primeira sessão")
+    if sem_servidor: return
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", str(APP_PATH), *argv]
+    sys.exit(stcli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# conftest.py — Fixtures compartilhadas pelos testes
+#
+# Os testes importam os módulos circuito_* da raiz do repositório. O servidor
+# de planilha é um ThreadingHTTPServer local (sem rede) que responde com ETag
+# e Last-Modified e honra If-None-Match / If-Modified-Since.
+
+import hashlib
+import sys
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class PlanilhaHttp:
+    def __init__(self):
+        self.content = b"v1"
+        self.versao = 1          # muda o ETag / Last-Modified sem mudar o conteúdo
+        self.etag = True
+        self.last_modified = True
+        self.falhar = False      # responde HTTP 500
+        self.pedidos = []        # cabeçalhos de cada GET recebido
+        self.url = ""
+
+    def publicar(self, content: bytes):
+        self.content, self.versao = content, self.versao + 1
+
+    def cabecalhos(self) -> dict:
+        h = {}
+        if self.etag: h["ETag"] = '"%s-%d"' % (hashlib.md5(self.content).hexdigest()[:8], self.versao)
+        if self.last_modified: h["Last-Modified"] = formatdate(1_700_000_000 + self.versao, usegmt=True)
+        return h
+
+def _handler(planilha: PlanilhaHttp):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args): pass
+
+        def do_GET(self):
+            planilha.pedidos.append(dict(self.headers))
+            if planilha.falhar:
+                self.send_error(500)
+                return
+            h = planilha.cabecalhos()
+            inm, ims = self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")
+            igual = (inm == h["ETag"]) if inm and "ETag" in h else (ims is not None and ims == h.get("Last-Modified"))
+            self.send_response(304 if igual else 200)
+            for k, v in h.items(): self.send_header(k, v)
+            self.send_header("Content-Length", "0" if igual else str(len(planilha.content)))
+            self.end_headers()
+            if not igual: self.wfile.write(planilha.content)
+    return Handler
+
+@pytest.fixture
+def planilha_http():
+    planilha = PlanilhaHttp()
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _handler(planilha))
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    planilha.url = f"http://127.0.0.1:{srv.server_port}/BaseCircuito.xlsx"
+    yield planilha
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def sharepoint():
+    from mock_sharepoint import MockSharePoint
+
+    mock = MockSharePoint(token="teste").start()
+    yield mock
+    mock.stop()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# mock_sharepoint.py — Servidor local com a parte da API REST do SharePoint usada por SharePointSource
+#
+# Uso (na raiz do repositório):
+#   python tests/mock_sharepoint.py --planilha BaseCircuito.xlsx --porta 8000 --token teste
+#   CIRCUITO_WORKBOOK=sharepoint+http://localhost:8000/sites/Circuito/Documentos/BaseCircuito.xlsx \
+#   CIRCUITO_SHAREPOINT_TOKEN=teste streamlit run circuito_lojas_app.py
+#
+# Responde POST /_api/contextInfo (form digest), os metadados do arquivo
+# (getFileByServerRelativePath(...)?$select=ETag,...) e o conteúdo ($value).
+# Toda chamada exige "Authorization: Bearer <token>" (401 sem ele). O ETag
+# muda a cada publicação; na linha de comando, o arquivo é relido quando
+# o mtime muda. Os testes usam MockSharePoint diretamente e conferem os
+# pedidos recebidos em .pedidos.
+
+import argparse
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+ARQUIVO_RE = re.compile(r"/_api/Web/getFileByServerRelativePath\(DecodedUrl='(?P<path>.*)'\)(?P<value>/\$value)?$", re.IGNORECASE)
+
+class MockSharePoint:
+    def __init__(self, token: str = "teste", host: str = "127.0.0.1", port: int = 0):
+        self.token = token
+        self.arquivos = {}      # caminho relativo ao servidor -> (conteúdo, versão, data)
+        self.pedidos = []       # (método, tipo, status): tipo é contextinfo, metadados ou conteudo
+        self.fontes = {}        # caminho -> arquivo local (linha de comando)
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"sharepoint+http://{host}:{port}"
+
+    def publicar(self, path: str, content: bytes):
+        with self._lock:
+            versao = self.arquivos[path][1] + 1 if path in self.arquivos else 1
+            self.arquivos[path] = (content, versao, datetime.now(timezone.utc))
+
+    def arquivo(self, path: str):
+        fonte = self.fontes.get(path)
+        if fonte is not None and self._mtimes.get(path) != fonte.stat().st_mtime_ns:
+            self._mtimes[path] = fonte.stat().st_mtime_ns
+            self.publicar(path, fonte.read_bytes())
+        return self.arquivos.get(path)
+
+    def contagem(self, tipo: str, status: int = 200) -> int:
+        return sum(1 for _, t, s in self.pedidos if t == tipo and s == status)
+
+    def start(self) -> "MockSharePoint":
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _handler(mock: MockSharePoint):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args): pass
+
+        def _json(self, tipo: str, status: int, body: dict):
+            self._enviar(tipo, status, json.dumps(body).encode(), "application/json;odata=verbose;charset=utf-8")
+
+        def _enviar(self, tipo: str, status: int, payload: bytes, content_type: str):
+            mock.pedidos.append((self.command, tipo, status))
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _autorizado(self, tipo: str) -> bool:
+            if self.headers.get("Authorization") == f"Bearer {mock.token}": return True
+            self._json(tipo, 401, {"error": {"code": "-2147024891, System.UnauthorizedAccessException",
+                                             "message": {"lang": "pt-BR", "value": "Acesso negado."}}})
+            return False
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if not urlsplit(self.path).path.lower().endswith("/_api/contextinfo"):
+                self._json("desconhecido", 404, {"error": {"message": {"value": self.path}}})
+            elif self._autorizado("contextinfo"):
+                self._json("contextinfo", 200, {"d": {"GetContextWebInformation": {
+                    "FormDigestValue": "0xMOCK", "FormDigestTimeoutSeconds": 1800, "LibraryVersion": "16.0",
+                    "WebFullUrl": self.path.split("/_api")[0]}}})
+
+        def do_GET(self):
+            m = ARQUIVO_RE.search(unquote(urlsplit(self.path).path))
+            if m is None:
+                self._json("desconhecido", 404, {"error": {"message": {"value": self.path}}})
+                return
+            tipo = "conteudo" if m.group("value") else "metadados"
+            if not self._autorizado(tipo): return
+            arquivo = mock.arquivo(m.group("path").replace("''", "'"))
+            if arquivo is None:
+                self._json(tipo, 404, {"error": {"code": "-2130575338, Microsoft.SharePoint.SPException",
+                                                 "message": {"lang": "pt-BR", "value": "Arquivo não encontrado."}}})
+            elif tipo == "conteudo":
+                self._enviar(tipo, 200, arquivo[0], "application/octet-stream")
+            else:
+                content, versao, data = arquivo
+                self._json(tipo, 200, {"d": {"ETag": f'"{{MOCK}},{versao}"', "Length": str(len(content)),
+                                             "TimeLastModified": data.strftime("%Y-%m-%dT%H:%M:%SZ")}})
+    return Handler
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Mock local da API REST do SharePoint para a origem sharepoint+http://")
+    parser.add_argument("--planilha", default="BaseCircuito.xlsx")
+    parser.add_argument("--caminho", default="/sites/Circuito/Documentos/BaseCircuito.xlsx")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--token", default="teste")
+    args = parser.parse_args(argv)
+
+    mock = MockSharePoint(args.token, "localhost", args.porta)
+    mock.fontes[args.caminho] = Path(args.planilha).resolve()
+    print(f"CIRCUITO_WORKBOOK={mock.url}{args.caminho}")
+    print(f"CIRCUITO_SHAREPOINT_TOKEN={args.token}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# test_analysis.py — Top-K por etapa
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import circuito_analysis
+
+def _df_final(n: int = 6) -> pd.DataFrame:
+    return pd.DataFrame({"Nome_Exibicao": [f"Loja {i}" for i in range(n)],
+                         "PlanoVoo_Score": np.arange(n, dtype=float), "Qualidade_Score": [5.0] * n})
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_k_invalido(k):
+    with pytest.raises(ValueError, match="k deve ser positivo"):
+        circuito_analysis.compute_etapa_top_k(_df_final(), ["PlanoVoo_Score"], k)
+
+@pytest.mark.parametrize("k", [1, 3, 6, 10])
+def test_top_k(k):
+    top = circuito_analysis.compute_etapa_top_k(_df_final(), ["PlanoVoo_Score", "Qualidade_Score"], k)
+    assert top.etapas_com_dados == ["PlanoVoo", "Qualidade"]
+    plano = top.for_etapa("PlanoVoo")
+    assert plano["Nome_Exibicao"].tolist() == [f"Loja {i}" for i in range(5, 5 - min(k, 6), -1)]
+    # Empate em toda a etapa: desempata pela ordem do ranking
+    assert top.for_etapa("Qualidade")["Nome_Exibicao"].tolist() == [f"Loja {i}" for i in range(min(k, 6))]
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# test_api.py — API JSON: respostas, ETag e erros sempre em JSON
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+import circuito_api
+import circuito_fetch
+import circuito_store
+
+PLANILHA = Path(__file__).resolve().parent.parent / "BaseCircuito.xlsx"
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    store = circuito_store.DataStore(circuito_fetch.WorkbookFetcher(circuito_fetch.LocalFileSource(PLANILHA)),
+                                     cache_dir=tmp_path_factory.mktemp("cache"))
+    service = circuito_api.RankingService(store)
+    server = circuito_api.make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.service = service
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _get(api, path: str, etag=None):
+    req = urllib.request.Request(api.base_url + path, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(req) as r:
+            return r.status, r.headers.get("ETag"), json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        corpo = e.read()
+        return e.code, e.headers.get("ETag"), json.loads(corpo) if corpo else None
+
+def test_ciclos_e_etag(api):
+    status, etag, body = _get(api, "/api/ciclos")
+    assert status == 200 and etag and body
+    assert _get(api, "/api/ciclos", etag)[0] == 304
+
+def test_erros_de_cliente(api):
+    assert _get(api, "/api/inexistente")[0] == 404
+    assert _get(api, "/api/campeonato?limit=abc")[0] == 400
+
+def test_falha_inesperada_ao_carregar_os_dados(api, monkeypatch, caplog):
+    def quebra(): raise KeyError("Ciclo")
+    monkeypatch.setattr(api.service.store, "current", quebra)
+    status, etag, body = _get(api, "/api/ciclos")
+    assert status == 503 and etag is None and "erro" in body
+    assert "Falha ao carregar os dados" in caplog.text
+
+def test_falha_inesperada_ao_montar_a_resposta(api, monkeypatch, caplog):
+    def quebra(path, query): raise RuntimeError("boom")
+    monkeypatch.setattr(api.service, "route", quebra)
+    status, etag, body = _get(api, "/api/ciclos")
+    assert status == 500 and etag is None and body == {"erro": "Erro interno"}
+    assert "boom" in caplog.text
+
+def test_ultrapassagens(api):
+    status, _, body = _get(api, "/api/ciclos/Setembro/ultrapassagens?limit=5")
+    assert status == 200 and body["total"] >= len(body["lojas"]) > 0
+    for loja in body["lojas"]:
+        assert loja["Pode_Ultrapassar"] and loja["Rank"] > 1
+        assert loja["Potencial_Horas"] > loja["Diferenca_Horas"]
+        assert loja["Rival_Rank"] == loja["Rank"] - 1
+    # A loja traz o mesmo veredito no detalhe do rival
+    nome = body["lojas"][0]["Nome_Exibicao"]
+    rival = _get(api, f"/api/ciclos/Setembro/lojas/{urllib.request.quote(nome)}")[2]["loja"]["rival"]
+    assert rival["Pode_Ultrapassar"] and rival["Rival_Nome"] == body["lojas"][0]["Rival_Nome"]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# test_cache.py — Cache Parquet: reconstrução, acerto e contadores (cache_stats)
+
+from dataclasses import asdict
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import circuito_cache
+
+PLANILHA = (Path(__file__).resolve().parent.parent / "BaseCircuito.xlsx").read_bytes()
+
+@pytest.fixture(autouse=True)
+def stats_zerados():
+    # Os contadores são do processo: cada teste começa do zero
+    circuito_cache.reset_cache_stats()
+    yield
+    circuito_cache.reset_cache_stats()
+
+def test_miss_e_depois_hit(tmp_path):
+    primeira = circuito_cache.load_catalog(PLANILHA, tmp_path)
+    stats = circuito_cache.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (0, 1, 0)
+    segunda = circuito_cache.load_catalog(PLANILHA, tmp_path)
+    stats = circuito_cache.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1) and stats["last_key"] == segunda.key == primeira.key
+    t, c = primeira.temporadas()[-1], primeira.ciclos(primeira.temporadas()[-1])[-1]
+    pd.testing.assert_frame_equal(segunda.load(t, c).data, primeira.load(t, c).data)
+
+def test_reset_zera_os_contadores(tmp_path):
+    circuito_cache.load_catalog(PLANILHA, tmp_path)
+    circuito_cache.reset_cache_stats()
+    assert circuito_cache.cache_stats() == asdict(circuito_cache.CacheStats())
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# test_engine.py — Motor de pontuação: modo compacto x modo texto
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import circuito_engine as engine
+
+HOJE = datetime(2025, 10, 15)
+
+def _planilha(n_lojas: int = 300, seed: int = 0) -> dict:
+    # Notas com uma casa decimal e PesoDaEtapa fracionário: somas que deveriam empatar
+    # só empatam se as notas forem somadas em float64
+    rng = np.random.default_rng(seed)
+    sheets = {}
+    for etapa in ["PlanoVoo", "ProjetoFast", "Qualidade"]:
+        linhas = []
+        for ciclo, mes in [("Agosto", 8), ("Setembro", 9), ("Outubro", 10)]:
+            for p in range(2):
+                linhas.append(pd.DataFrame({
+                    "NomeLoja": [f"Loja {i:03d}" for i in range(1, n_lojas + 1)],
+                    "loja_key": np.arange(1, n_lojas + 1),
+                    "Nota": rng.integers(0, 31, n_lojas) / 10,
+                    "PesoDaEtapa": 1.1,
+                    "Ciclo": ciclo,
+                    "Período": f"Semana {p + 1}",
+                    "Data Início": datetime(2025, mes, 1 + 7 * p),
+                }))
+        sheets[etapa] = pd.concat(linhas, ignore_index=True)
+    return sheets
+
+def _rankings(sheets: dict, compact: bool, monkeypatch) -> dict:
+    monkeypatch.setattr(engine, "COMPACT", compact)
+    return engine.compute_all_rankings(engine.load_and_prepare_data(sheets), HOJE)
+
+def test_compacto_mantem_empates_com_notas_fracionarias(monkeypatch):
+    sheets = _planilha()
+    texto, compacto = _rankings(sheets, False, monkeypatch), _rankings(sheets, True, monkeypatch)
+    assert list(texto) == list(compacto) == ["Agosto", "Setembro", "Outubro"]
+    for ciclo in texto:
+        esperado, obtido = texto[ciclo].df_final, compacto[ciclo].df_final
+        # Há empates de fato; eles precisam sobreviver ao modo compacto
+        assert esperado["Rank"].nunique() < len(esperado)
+        assert obtido["Rank"].nunique() == esperado["Rank"].nunique()
+        pd.testing.assert_series_equal(obtido["Rank"], esperado["Rank"])
+        pd.testing.assert_series_equal(obtido["Posicao_Horas"], esperado["Posicao_Horas"])
+        assert obtido["Posicao_Horas"].dtype == np.float64
+
+def test_compacto_notas_em_float64(monkeypatch):
+    monkeypatch.setattr(engine, "COMPACT", True)
+    prepared = engine.load_and_prepare_data(_planilha(20))
+    assert isinstance(prepared.data["Ciclo"].dtype, pd.CategoricalDtype)
+    assert all(prepared.data[c].dtype == np.float64 for c in prepared.etapas_scores_cols)
+
+def _aba(datas, ciclos=None, periodos=None) -> pd.DataFrame:
+    n = len(datas)
+    return pd.DataFrame({
+        "NomeLoja": [f"Loja {i}" for i in range(n)], "loja_key": np.arange(n), "Nota": 1.0, "PesoDaEtapa": 2,
+        "Ciclo": ciclos or ["Setembro"] * n, "Período": periodos or ["Semana 1"] * n, "Data Início": datas,
+    })
+
+def test_temporada_sem_data_herda_do_mesmo_periodo():
+    prepared = engine.load_and_prepare_data({
+        "PlanoVoo": _aba([datetime(2024, 9, 1), None, datetime(2024, 9, 1)]),
+        # Aba inteira sem Data Início: vale o mesmo (Ciclo, Período) das outras abas
+        "Qualidade": _aba([None, None]),
+    })
+    assert engine.temporadas(prepared) == [2024]
+    assert len(prepared.data) == 3
+
+def test_temporada_sem_data_herda_da_aba():
+    prepared = engine.load_and_prepare_data({
+        "PlanoVoo": _aba([datetime(2024, 9, 1), datetime(2024, 9, 8), None],
+                         periodos=["Semana 1", "Semana 2", "Semana 3"]),
+    })
+    assert engine.temporadas(prepared) == [2024]
+    assert set(prepared.periodos_df["Periodo"]) == {"Semana 1", "Semana 2", "Semana 3"}
+
+def test_temporada_sem_referencia_descarta_linha(caplog):
+    prepared = engine.load_and_prepare_data({
+        "PlanoVoo": _aba([datetime(2024, 9, 1)]),
+        "Qualidade": _aba([None], ciclos=["Outubro"]),
+    })
+    assert "Outubro" not in set(prepared.periodos_df["Ciclo"])
+    assert engine.temporadas(prepared) == [2024]
+    assert "descartadas" in caplog.text
+
+def test_duracao_do_ciclo_segue_o_ano_da_temporada():
+    assert engine.get_race_duration_hours("Fevereiro", 2024) == 29
+    assert engine.get_race_duration_hours("Fevereiro", 2025) == 28
+    assert engine.get_race_duration_hours("Setembro", 2025) == 30
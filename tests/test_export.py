@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# test_export.py — Nomes dos PDFs por loja
+
+import json
+from datetime import datetime
+
+import pandas as pd
+
+import circuito_engine as engine
+import circuito_export
+
+def test_nomes_que_colidem_levam_o_loja_key():
+    lojas = pd.DataFrame({"Loja": [7, 8, 9, 10], "Nome_Exibicao": ["Loja 1/A", "Loja 1 A", "Centro", "CENTRO"]})
+    assert circuito_export.file_names(lojas) == {
+        "Loja 1/A": "Loja_1_A_7", "Loja 1 A": "Loja_1_A_8", "Centro": "Centro_9", "CENTRO": "CENTRO_10"}
+
+def test_nomes_distintos_ficam_sem_sufixo():
+    lojas = pd.DataFrame({"Loja": [1, 2], "Nome_Exibicao": ["Torres", "São João"]})
+    assert circuito_export.file_names(lojas) == {"Torres": "Torres", "São João": "São_João"}
+
+def test_export_nao_sobrescreve_pdf_de_outra_loja(tmp_path):
+    nomes = ["Loja 1/A", "Loja 1 A", "Torres"]
+    aba = pd.DataFrame({"NomeLoja": nomes, "loja_key": [1, 2, 3], "Nota": [3.0, 2.0, 1.0], "PesoDaEtapa": 2,
+                        "Ciclo": "Setembro", "Período": "Semana 1", "Data Início": datetime(2025, 9, 1)})
+    prepared = engine.load_and_prepare_data({"PlanoVoo": aba, "Qualidade": aba})
+    resultado = circuito_export.export_ciclo(prepared, "Setembro", tmp_path, workers=1, hoje=datetime(2025, 10, 1))
+    pasta = tmp_path / "2025" / "Setembro"
+    assert sorted(resultado.gerados) == sorted(nomes)
+    assert sorted(p.name for p in pasta.glob("*.pdf")) == ["Loja_1_A_1.pdf", "Loja_1_A_2.pdf", "Torres.pdf"]
+    assert set(json.loads((pasta / circuito_export.MANIFEST_NAME).read_text())) == set(nomes)
+    # Sem mudança nos dados nada é refeito
+    assert sorted(circuito_export.export_ciclo(prepared, "Setembro", tmp_path, workers=1, hoje=datetime(2025, 10, 1)).inalterados) == sorted(nomes)
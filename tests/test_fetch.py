@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# test_fetch.py — Busca condicional (HttpSource) e controle de frequência (WorkbookFetcher)
+
+import pytest
+
+import circuito_fetch
+from circuito_fetch import FetchError, HttpSource, WorkbookFetcher
+
+def test_304_com_etag(planilha_http):
+    fetcher = WorkbookFetcher(circuito_fetch.make_source(planilha_http.url), poll_interval_s=0)
+    primeira, segunda = fetcher.get(), fetcher.get()
+    assert primeira.changed and primeira.content == b"v1"
+    assert not segunda.changed and segunda.content == b"v1" and segunda.digest == primeira.digest
+    assert "If-None-Match" not in planilha_http.pedidos[0]
+    assert planilha_http.pedidos[1]["If-None-Match"] == primeira.version
+    assert fetcher.source.requests_made == 2 and fetcher.source.not_modified == 1
+
+def test_304_com_if_modified_since(planilha_http):
+    planilha_http.etag = False
+    source = HttpSource(planilha_http.url)
+    fetcher = WorkbookFetcher(source, poll_interval_s=0)
+    assert fetcher.get().changed
+    assert not fetcher.get().changed
+    assert "If-None-Match" not in planilha_http.pedidos[1]
+    assert planilha_http.pedidos[1]["If-Modified-Since"] == planilha_http.cabecalhos()["Last-Modified"]
+    assert source.not_modified == 1
+
+def test_mudanca_pelo_hash_do_conteudo(planilha_http):
+    fetcher = WorkbookFetcher(HttpSource(planilha_http.url), poll_interval_s=0)
+    primeira = fetcher.get()
+    # ETag novo com o mesmo conteúdo: baixa de novo, mas não conta como mudança
+    planilha_http.publicar(b"v1")
+    mesma = fetcher.get()
+    assert mesma.version != primeira.version and not mesma.changed and mesma.digest == primeira.digest
+    planilha_http.publicar(b"v2")
+    nova = fetcher.get()
+    assert nova.changed and nova.content == b"v2" and nova.digest != primeira.digest
+    assert fetcher.source.not_modified == 0
+
+def test_limite_de_frequencia(planilha_http):
+    source = HttpSource(planilha_http.url)
+    fetcher = WorkbookFetcher(source, poll_interval_s=3600)
+    fetcher.get()
+    planilha_http.publicar(b"v2")
+    # Dentro do intervalo a origem não é consultada, mesmo que tenha mudado
+    assert [fetcher.get().content for _ in range(3)] == [b"v1"] * 3
+    assert source.requests_made == 1
+    forcada = fetcher.get(force=True)
+    assert forcada.changed and forcada.content == b"v2" and source.requests_made == 2
+
+def test_serve_a_ultima_versao_quando_a_origem_falha(planilha_http):
+    fetcher = WorkbookFetcher(HttpSource(planilha_http.url), poll_interval_s=0)
+    primeira = fetcher.get()
+    planilha_http.falhar = True
+    antiga = fetcher.get()
+    assert antiga.content == b"v1" and antiga.digest == primeira.digest and not antiga.changed
+    assert "500" in fetcher.last_error
+    planilha_http.falhar = False
+    assert fetcher.get().content == b"v1" and fetcher.last_error is None
+
+def test_falha_sem_versao_anterior(planilha_http):
+    planilha_http.falhar = True
+    fetcher = WorkbookFetcher(HttpSource(planilha_http.url), poll_interval_s=0)
+    with pytest.raises(FetchError):
+        fetcher.get()
+    assert fetcher.last_error
+
+def test_credenciais_do_sharepoint_vem_do_ambiente_sem_secrets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CIRCUITO_SHAREPOINT_TOKEN", "abc")
+    assert circuito_fetch.sharepoint_credentials() == {"token": "abc"}
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# test_sharepoint.py — SharePointSource contra o mock local da API REST (tests/mock_sharepoint.py)
+
+import pytest
+
+import circuito_fetch
+from circuito_fetch import FetchError, SharePointSource, WorkbookFetcher
+
+CAMINHO = "/sites/Circuito/Documentos/BaseCircuito.xlsx"
+
+def _source(sharepoint, token="teste") -> SharePointSource:
+    return circuito_fetch.make_source(sharepoint.url + CAMINHO, {"token": token})
+
+def test_make_source_com_prefixo(sharepoint):
+    source = _source(sharepoint)
+    assert isinstance(source, SharePointSource)
+    assert source.site_url == sharepoint.url.removeprefix("sharepoint+") + "/sites/Circuito"
+    assert source.file_path == CAMINHO
+
+def test_autenticacao(sharepoint):
+    sharepoint.publicar(CAMINHO, b"v1")
+    with pytest.raises(FetchError):
+        _source(sharepoint, token="errado").fetch()
+    assert sharepoint.contagem("metadados") == 0 and sharepoint.contagem("conteudo") == 0
+    assert sharepoint.contagem("contextinfo", 401) >= 1
+    assert _source(sharepoint).fetch() == (b"v1", '"{MOCK},1"', True)
+
+def test_sem_credenciais(sharepoint, monkeypatch):
+    for var in ("TOKEN", "CLIENT_ID", "CLIENT_SECRET", "USER", "PASSWORD"):
+        monkeypatch.delenv(f"CIRCUITO_SHAREPOINT_{var}", raising=False)
+    with pytest.raises(FetchError, match="Credenciais"):
+        circuito_fetch.make_source(sharepoint.url + CAMINHO).fetch()
+
+def test_consulta_so_o_etag_enquanto_nao_muda(sharepoint):
+    sharepoint.publicar(CAMINHO, b"v1")
+    fetcher = WorkbookFetcher(_source(sharepoint), poll_interval_s=0)
+    primeira = fetcher.get()
+    assert primeira.changed and primeira.content == b"v1"
+    for _ in range(3):
+        assert not fetcher.get().changed
+    # Quatro consultas de metadados, um único download e um único form digest (contexto reaproveitado)
+    assert sharepoint.contagem("metadados") == 4
+    assert sharepoint.contagem("conteudo") == 1
+    assert sharepoint.contagem("contextinfo") == 1
+    assert fetcher.source.requests_made == 4 and fetcher.source.not_modified == 3
+
+def test_baixa_quando_o_etag_muda(sharepoint):
+    sharepoint.publicar(CAMINHO, b"v1")
+    fetcher = WorkbookFetcher(_source(sharepoint), poll_interval_s=0)
+    primeira = fetcher.get()
+    sharepoint.publicar(CAMINHO, b"v2")
+    nova = fetcher.get()
+    assert nova.changed and nova.content == b"v2" and nova.version != primeira.version
+    assert sharepoint.contagem("conteudo") == 2
+    # Mesmo conteúdo republicado: baixa pelo ETag novo, mas não conta como mudança
+    sharepoint.publicar(CAMINHO, b"v2")
+    assert not fetcher.get().changed and sharepoint.contagem("conteudo") == 3
+
+def test_arquivo_inexistente(sharepoint):
+    with pytest.raises(FetchError):
+        _source(sharepoint).fetch()
+    assert sharepoint.contagem("metadados", 404) == 1
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# test_store.py — Derivados por partição: um cálculo por (partição, derivado), sem travar os demais
+
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import circuito_engine as engine
+import circuito_store
+
+def _particao(ciclo: str) -> circuito_store.Particao:
+    vazio = engine.PreparedData(pd.DataFrame(), [], pd.DataFrame(), pd.DataFrame(), 2025)
+    return circuito_store.Particao(2025, ciclo, datetime(2025, 9, 1), vazio, engine.CicloRanking(pd.DataFrame(), 30, 0), ciclo, {}, {})
+
+def test_calculo_lento_nao_trava_outra_particao():
+    store = circuito_store.DataStore(fetcher=None)
+    setembro, outubro = _particao("Setembro"), _particao("Outubro")
+    liberar, iniciou = threading.Event(), threading.Event()
+
+    def lento():
+        iniciou.set()
+        liberar.wait(5)
+        return "setembro"
+
+    t = threading.Thread(target=store.derived, args=(setembro, "replay_positions", lento))
+    t.start()
+    assert iniciou.wait(5)
+    inicio = time.perf_counter()
+    # Outra partição e outro derivado da mesma partição respondem enquanto o replay de Setembro roda
+    assert store.derived(outubro, "replay_positions", lambda: "outubro") == "outubro"
+    assert store.derived(setembro, "gap_analysis", lambda: "gaps") == "gaps"
+    assert time.perf_counter() - inicio < 1
+    liberar.set()
+    t.join(5)
+    assert setembro.memo["replay_positions"] == "setembro"
+
+def test_mesmo_derivado_calculado_uma_vez():
+    store = circuito_store.DataStore(fetcher=None)
+    part, chamadas = _particao("Setembro"), []
+
+    def calcula():
+        chamadas.append(1)
+        time.sleep(0.05)
+        return len(chamadas)
+
+    threads = [threading.Thread(target=store.derived, args=(part, "gap_analysis", calcula)) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join(5)
+    assert chamadas == [1] and part.memo["gap_analysis"] == 1
+
+def test_derivado_pode_pedir_outro_derivado():
+    store = circuito_store.DataStore(fetcher=None)
+    part = _particao("Setembro")
+    base = lambda: store.derived(part, "base", lambda: 2)
+    assert store.derived(part, "dobro", lambda: base() * 2) == 4
+    assert store.derived(part, "dobro", lambda: 0) == 4